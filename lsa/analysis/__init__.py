@@ -1,41 +1,68 @@
-"""Analysis module for LSA."""
-
-from .hypotheses import generate_hypotheses
-from .similarity import find_similar_cases
-from .external_signals import (
-    extract_external_signals,
-    extract_services_from_text,
-    get_infotrac_missing_ids,
-    ExternalSignal,
-    ExternalSignalEvidence,
-)
-from .planner import (
-    generate_plan,
-    format_plan_output,
-    format_plan_json,
-    format_cursor_prompt,
-    parse_title,
-    build_intent,
-    PlanIntent,
-    BundleFile,
-    BundleCandidate,
-)
-
-__all__ = [
-    "generate_hypotheses",
-    "find_similar_cases",
-    "extract_external_signals",
-    "extract_services_from_text",
-    "get_infotrac_missing_ids",
-    "ExternalSignal",
-    "ExternalSignalEvidence",
-    "generate_plan",
-    "format_plan_output",
-    "format_plan_json",
-    "format_cursor_prompt",
-    "parse_title",
-    "build_intent",
-    "PlanIntent",
-    "BundleFile",
-    "BundleCandidate",
-]
+"""Analysis module for LSA.
+
+Public names are imported from their submodules on first access (PEP 562),
+so importing one analysis helper does not pull in the planner and friends.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .hypotheses import generate_hypotheses
+    from .similarity import find_similar_cases, find_similar_cases_prepared
+    from .external_signals import (
+        extract_external_signals,
+        extract_external_signals_stream,
+        extract_services_from_text,
+        get_infotrac_missing_ids,
+        ExternalSignal,
+        ExternalSignalEvidence,
+    )
+    from .planner import (
+        generate_plan,
+        format_plan_output,
+        format_plan_json,
+        format_cursor_prompt,
+        parse_title,
+        build_intent,
+        PlanIntent,
+        BundleFile,
+        BundleCandidate,
+    )
+
+# Public name -> submodule that defines it
+_LAZY_EXPORTS = {
+    "generate_hypotheses": ".hypotheses",
+    "find_similar_cases": ".similarity",
+    "find_similar_cases_prepared": ".similarity",
+    "extract_external_signals": ".external_signals",
+    "extract_external_signals_stream": ".external_signals",
+    "extract_services_from_text": ".external_signals",
+    "get_infotrac_missing_ids": ".external_signals",
+    "ExternalSignal": ".external_signals",
+    "ExternalSignalEvidence": ".external_signals",
+    "generate_plan": ".planner",
+    "format_plan_output": ".planner",
+    "format_plan_json": ".planner",
+    "format_cursor_prompt": ".planner",
+    "parse_title": ".planner",
+    "build_intent": ".planner",
+    "PlanIntent": ".planner",
+    "BundleFile": ".planner",
+    "BundleCandidate": ".planner",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value  # Cache so later lookups bypass __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
@@ -6,21 +6,47 @@ Designed for detecting external system / configuration failures
 (InfoTrac, APIs, databases, network issues).
 """
 
+import os
 import re
 import json
+import multiprocessing
+import pickle
+import tempfile
+import threading
+from operator import attrgetter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import IO, Any
 
-# Try to import yaml, but don't fail if not available
-try:
-    import yaml
-    YAML_AVAILABLE = True
-except ImportError:
-    YAML_AVAILABLE = False
+# Characters read per block by extract_external_signals_stream()
+STREAM_BLOCK_SIZE = 1 << 20
 
+# Texts shorter than this are always scanned in-process, even when the
+# caller asks for workers: below it, shipping chunks to worker processes
+# costs more than the scan itself
+PARALLEL_MIN_SIZE = 32 * 1024 * 1024
+MAX_SCAN_WORKERS = 4
 
-@dataclass
+# Numeric rank per severity (higher = more severe)
+SEVERITY_RANKS = {"F": 4, "E": 3, "W": 2, "I": 1}
+
+# Signal score bonus per rule category
+CATEGORY_SCORES = {
+    "CONFIG": 5,  # Configuration issues are often root causes
+    "DATABASE": 4,
+    "EXTERNAL_API": 3,
+    "NETWORK": 3,
+    "AUTH": 2,
+    "RESOURCE": 2,
+}
+
+# Bump when the cached rules payload changes shape
+_RULES_CACHE_VERSION = 1
+
+
+@dataclass(slots=True)
 class ExternalSignalEvidence:
     """Evidence line for an external signal."""
     line_no: int
@@ -30,7 +56,7 @@ class ExternalSignalEvidence:
         return {"line_no": self.line_no, "line_text": self.line_text}
 
 
-@dataclass
+@dataclass(slots=True)
 class ExternalSignal:
     """An external signal extracted from log text."""
     id: str
@@ -38,14 +64,18 @@ class ExternalSignal:
     category: str
     captures: dict[str, str] = field(default_factory=dict)
     evidence: list[ExternalSignalEvidence] = field(default_factory=list)
-    hints: list[str] = field(default_factory=list)
+    hints: tuple[str, ...] = ()  # Shared with the rule; never mutated
     hypothesis_template: str | None = None
     score: float = 0.0
+    # Derived once at construction (higher rank = more severe)
+    severity_rank: int = field(init=False, default=0)
+    _sort_key: tuple[int, float] = field(
+        init=False, default=(0, 0.0), repr=False, compare=False
+    )
 
-    @property
-    def severity_rank(self) -> int:
-        """Get numeric rank for severity (higher = more severe)."""
-        return {"F": 4, "E": 3, "W": 2, "I": 1}.get(self.severity, 0)
+    def __post_init__(self) -> None:
+        self.severity_rank = SEVERITY_RANKS.get(self.severity, 0)
+        self._sort_key = (-self.severity_rank, -self.score)
 
     def captures_json(self) -> str:
         """Get captures as JSON string."""
@@ -58,25 +88,87 @@ class ExternalSignal:
             "category": self.category,
             "captures": self.captures,
             "evidence": [e.to_dict() for e in self.evidence],
-            "hints": self.hints,
+            "hints": list(self.hints),
             "score": self.score,
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class _CompiledRule:
     """Internal: a compiled rule with regex patterns."""
     id: str
     severity: str
     category: str
     patterns: list[re.Pattern]
-    hints: list[str]
+    hints: tuple[str, ...]
     hypothesis_template: str | None = None
+    # Per pattern: lowercased literal every match must contain (or None)
+    anchors: tuple[str | None, ...] = ()
+    # Score of a signal from this rule before the per-capture bonus
+    base_score: float = 0.0
+
+
+@dataclass
+class _Dispatch:
+    """Internal: per-line dispatch from anchor hits to rule patterns."""
+    # Flattened (rule, pattern) pairs in rule order, then pattern order
+    table: list[tuple[_CompiledRule, re.Pattern]]
+    # Zero-width lookahead alternation of all anchors, longest first, so
+    # findall() reports every anchor occurrence even when they overlap
+    anchor_re: re.Pattern | None
+    # Anchor -> table indexes of patterns it (or any anchor it starts with)
+    # guards; a shorter anchor at the same position is hidden by a longer one
+    implied: dict[str | bytes, tuple[int, ...]]
+    # Table indexes of patterns without an anchor (always tried)
+    unanchored: tuple[int, ...]
+
+    def candidates(self, line_lower: str | bytes) -> tuple[int, ...] | list[int]:
+        """Table indexes worth searching on a line, in table order."""
+        if self.anchor_re is None:
+            return self.unanchored
+        hits = self.anchor_re.findall(line_lower)
+        if not hits:
+            return self.unanchored
+        if len(hits) == 1 and not self.unanchored:
+            return self.implied[hits[0]]
+        indexes = set(self.unanchored)
+        for anchor in hits:
+            indexes.update(self.implied[anchor])
+        return sorted(indexes)
+
+
+@dataclass(slots=True)
+class _Matcher:
+    """Internal: scan state derived from the rules for one text type."""
+    newline: str | bytes
+    # Combined alternation of every rule pattern (captures stripped), used
+    # to screen out lines that cannot match any rule
+    screen: re.Pattern | None
+    # Same alternation with literals lowercased, matched case-sensitively
+    # against text.lower(); IGNORECASE disables most of sre's fast paths
+    folded_screen: re.Pattern | None
+    # Union of rule anchors; text containing none of them cannot match any
+    # rule. None when some pattern has no anchor (the filter would be unsound)
+    literals: tuple[str | bytes, ...] | None
+    dispatch: _Dispatch
 
 
 # Module-level cache for rules
 _rules_cache: list[_CompiledRule] | None = None
 _rules_load_error: str | None = None
+# Matchers keyed by text type (str, bytes); None if one cannot be built
+_matcher_cache: dict[type, _Matcher | None] = {}
+
+# Worker pool for parallel scans, kept across calls; rebuilt when the rules
+# or the worker count change
+_scan_pool: ProcessPoolExecutor | None = None
+_scan_pool_rules: list[_CompiledRule] | None = None
+_scan_pool_workers = 0
+_scan_pool_lock = threading.Lock()
+
+_NAMED_GROUP_RE = re.compile(r"\(\?P<\w+>")
+# Escapes that may spell a literal character (hex, unicode, named, octal)
+_CHAR_ESCAPES = set("xuUN0123456789")
 
 
 def _get_rules_path() -> Path:
@@ -84,6 +176,59 @@ def _get_rules_path() -> Path:
     return Path(__file__).parent.parent / "rules" / "external_signals.yaml"
 
 
+def _get_rules_cache_path() -> Path:
+    """Get path to the on-disk cache of parsed rules."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "lsa" / "rules.pkl"
+
+
+def _read_rules_data(rules_path: Path) -> Any:
+    """
+    Parse the rules YAML, reusing a pickled copy when the file is unchanged.
+
+    The cache is keyed by path, mtime and size of the YAML file. Any cache
+    problem (missing, stale, unreadable, unwritable) falls back to parsing.
+    PyYAML is only imported on a cache miss.
+
+    Raises:
+        ImportError: If the YAML must be parsed and PyYAML is not installed
+    """
+    stat = rules_path.stat()
+    cache_key = (_RULES_CACHE_VERSION, str(rules_path), stat.st_mtime_ns, stat.st_size)
+    cache_path = _get_rules_cache_path()
+
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key, cached_data = pickle.load(f)
+        if cached_key == cache_key:
+            return cached_data
+    except Exception:
+        pass
+
+    import yaml
+
+    # libyaml-backed loader is several times faster when available
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(rules_path, "r", encoding="utf-8") as f:
+        data = yaml.load(f, Loader=loader)
+
+    # Write atomically so concurrent CLI runs never see a partial file
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((cache_key, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_name, cache_path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+    except Exception:
+        pass
+
+    return data
+
+
 def _load_rules() -> tuple[list[_CompiledRule], str | None]:
     """
     Load and compile rules from YAML file.
@@ -91,16 +236,14 @@ def _load_rules() -> tuple[list[_CompiledRule], str | None]:
     Returns:
         Tuple of (compiled_rules, error_message_or_none)
     """
-    if not YAML_AVAILABLE:
-        return [], "PyYAML not installed; external signals disabled"
-
     rules_path = _get_rules_path()
     if not rules_path.exists():
         return [], f"Rules file not found: {rules_path}"
 
     try:
-        with open(rules_path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+        data = _read_rules_data(rules_path)
+    except ImportError:
+        return [], "PyYAML not installed; external signals disabled"
     except Exception as e:
         return [], f"Failed to parse rules YAML: {e}"
 
@@ -114,20 +257,23 @@ def _load_rules() -> tuple[list[_CompiledRule], str | None]:
             severity = rule_data.get("severity", "I")
             category = rule_data.get("category", "UNKNOWN")
             patterns_raw = rule_data.get("patterns", [])
-            hints = rule_data.get("hints", [])
+            hints = tuple(rule_data.get("hints", []))
             hypothesis_template = rule_data.get("hypothesis_template")
 
             # Compile patterns
             patterns = []
+            anchors = []
             for pat in patterns_raw:
                 try:
                     compiled_pat = re.compile(pat, re.IGNORECASE)
                     patterns.append(compiled_pat)
+                    anchors.append(_required_literal(pat))
                 except re.error:
                     # Skip invalid pattern, continue with others
                     pass
 
             if patterns:  # Only add rule if it has at least one valid pattern
+                severity_rank = SEVERITY_RANKS.get(severity, 0)
                 compiled.append(_CompiledRule(
                     id=rule_id,
                     severity=severity,
@@ -135,6 +281,10 @@ def _load_rules() -> tuple[list[_CompiledRule], str | None]:
                     patterns=patterns,
                     hints=hints,
                     hypothesis_template=hypothesis_template,
+                    anchors=tuple(anchors),
+                    base_score=float(
+                        severity_rank * 10 + CATEGORY_SCORES.get(category, 1)
+                    ),
                 ))
         except Exception:
             # Skip malformed rule, continue
@@ -143,12 +293,290 @@ def _load_rules() -> tuple[list[_CompiledRule], str | None]:
     return compiled, None
 
 
+def _skip_bracketed(pattern: str, i: int) -> int:
+    """Return the index just past the character class or group at ``i``."""
+    depth = 0
+    in_class = False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_class:
+            # A ']' right after '[' or '[^' is a literal member
+            if char == "]" and pattern[i - 1] not in "[^":
+                in_class = False
+                if depth == 0:
+                    return i + 1
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def _required_literal(pattern: str) -> str | None:
+    """
+    Find a literal substring that every match of ``pattern`` must contain.
+
+    Heuristic: the longest run of plain characters outside groups and
+    character classes, dropping characters made optional by a quantifier.
+    Patterns with a top-level alternation have no single required literal.
+
+    Returns:
+        Lowercased ASCII literal, or None if none could be derived
+    """
+    runs: list[str] = []
+    current: list[str] = []
+
+    def close_run() -> None:
+        if current:
+            runs.append("".join(current))
+            current.clear()
+
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            escaped = pattern[i + 1:i + 2]
+            if escaped and not escaped.isalnum():
+                current.append(escaped)  # Escaped punctuation is literal
+            else:
+                close_run()  # Class (\\d, \\s, ...) or special escape
+            i += 2
+        elif char in "[(":
+            close_run()
+            i = _skip_bracketed(pattern, i)
+        elif char == "|":
+            return None
+        elif char in "?*":
+            if current:
+                current.pop()  # Preceding character is optional
+            close_run()
+            i += 1
+        elif char == "{":
+            quantifier = re.match(r"\{(\d*)(?:,(\d*))?\}", pattern[i:])
+            if quantifier is None:
+                current.append(char)
+                i += 1
+                continue
+            if not quantifier.group(1) or int(quantifier.group(1)) == 0:
+                if current:
+                    current.pop()
+            close_run()
+            i += quantifier.end()
+        elif char in "+.^$)":
+            close_run()
+            i += 1
+        else:
+            current.append(char)
+            i += 1
+    close_run()
+
+    candidates = [run for run in runs if run.isascii()]
+    if not candidates:
+        return None
+    return max(candidates, key=len).lower()
+
+
+def _depends_on_line_edges(pattern: str) -> bool:
+    """
+    Check whether a pattern looks at what surrounds its match.
+
+    Anchors (^, $, \\A, \\Z) and lookarounds see the stripped line's edges
+    when a rule is applied, but neighbouring whitespace and lines when the
+    screen runs over the whole text, so the two can disagree.
+    """
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            if pattern[i + 1:i + 2] in ("A", "Z"):
+                return True
+            i += 2
+        elif char == "[":
+            # Skip the class; a ']' right after '[' or '[^' is a member
+            i += 2 if pattern[i + 1:i + 2] == "^" else 1
+            if pattern[i:i + 1] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+        elif char in "^$":
+            return True
+        elif pattern.startswith(("(?=", "(?!", "(?<=", "(?<!"), i):
+            return True
+        else:
+            i += 1
+    return False
+
+
+def _build_screen(rules: list[_CompiledRule]) -> str | None:
+    """
+    Fuse all rule patterns into a single alternation.
+
+    Named groups are turned into non-capturing groups so that sub-patterns
+    from different rules cannot clash. The result only answers "does any
+    rule match here"; captures still come from the per-rule patterns.
+
+    Returns:
+        Screen pattern source, or None if there are no patterns or some
+        pattern depends on line edges (every line is then tried instead)
+    """
+    if any(
+        _depends_on_line_edges(pattern.pattern)
+        for rule in rules
+        for pattern in rule.patterns
+    ):
+        return None
+    alternatives = [
+        "(?:" + _NAMED_GROUP_RE.sub("(?:", pattern.pattern) + ")"
+        for rule in rules
+        for pattern in rule.patterns
+    ]
+    if not alternatives:
+        return None
+    return "|".join(alternatives)
+
+
+def _fold_pattern(pattern: str) -> str | None:
+    """
+    Lowercase the literal characters of a regex pattern.
+
+    Escape sequences are kept verbatim (so \\S stays \\S). Returns None for
+    patterns whose escapes could encode an uppercase character.
+    """
+    folded = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            escaped = pattern[i + 1:i + 2]
+            if escaped in _CHAR_ESCAPES:
+                return None
+            folded.append(pattern[i:i + 2])
+            i += 2
+            continue
+        folded.append(char.lower())
+        i += 1
+    return "".join(folded)
+
+
+def _build_literal_filter(rules: list[_CompiledRule]) -> tuple[str, ...] | None:
+    """Collect the distinct anchors of all rules, or None if any is missing."""
+    literals: dict[str, None] = {}
+    for rule in rules:
+        for anchor in rule.anchors:
+            if anchor is None:
+                return None
+            literals[anchor] = None
+    return tuple(literals) or None
+
+
+def _build_dispatch(rules: list[_CompiledRule], as_bytes: bool) -> _Dispatch:
+    """Index rule patterns by anchor for per-line dispatch."""
+    table: list[tuple[_CompiledRule, re.Pattern]] = []
+    anchor_indexes: dict[str, list[int]] = {}
+    unanchored: list[int] = []
+
+    for rule in rules:
+        for pattern, anchor in zip(rule.patterns, rule.anchors):
+            if anchor is None:
+                unanchored.append(len(table))
+            else:
+                anchor_indexes.setdefault(anchor, []).append(len(table))
+            if as_bytes:
+                # Bytes IGNORECASE is ASCII-only, like the anchors themselves
+                pattern = re.compile(pattern.pattern.encode("utf-8"), re.IGNORECASE)
+            table.append((rule, pattern))
+
+    anchors = sorted(anchor_indexes, key=len, reverse=True)
+    implied = {
+        anchor: tuple(sorted(
+            index
+            for prefix in anchors if anchor.startswith(prefix)
+            for index in anchor_indexes[prefix]
+        ))
+        for anchor in anchors
+    }
+    anchor_re = None
+    if anchors:
+        anchor_re = _compile_for(
+            "(?=(" + "|".join(re.escape(anchor) for anchor in anchors) + "))",
+            as_bytes,
+        )
+
+    if as_bytes:
+        implied = {anchor.encode("ascii"): idx for anchor, idx in implied.items()}
+    return _Dispatch(
+        table=table,
+        anchor_re=anchor_re,
+        implied=implied,
+        unanchored=tuple(unanchored),
+    )
+
+
+def _compile_for(source: str, as_bytes: bool, flags: int = 0) -> re.Pattern:
+    """Compile a pattern source for str or (UTF-8 encoded) bytes text."""
+    return re.compile(source.encode("utf-8") if as_bytes else source, flags)
+
+
+def _build_matcher(rules: list[_CompiledRule], as_bytes: bool) -> _Matcher:
+    """Derive the screens, literal filter and dispatch for one text type."""
+    literals = _build_literal_filter(rules)
+    if literals is not None and as_bytes:
+        literals = tuple(literal.encode("ascii") for literal in literals)
+
+    screen = folded_screen = None
+    screen_source = _build_screen(rules)
+    if screen_source is not None:
+        try:
+            screen = _compile_for(screen_source, as_bytes, re.IGNORECASE)
+        except re.error:
+            pass
+        folded = _fold_pattern(screen_source)
+        if folded is not None:
+            try:
+                folded_screen = _compile_for(folded, as_bytes)
+            except re.error:
+                pass
+
+    return _Matcher(
+        newline=b"\n" if as_bytes else "\n",
+        screen=screen,
+        folded_screen=folded_screen,
+        literals=literals,
+        dispatch=_build_dispatch(rules, as_bytes),
+    )
+
+
+def _get_matcher(rules: list[_CompiledRule], text_type: type) -> _Matcher | None:
+    """
+    Get the (cached) matcher for str or bytes text.
+
+    The bytes matcher is built on first use; None if some rule pattern
+    cannot be used on bytes, in which case callers decode the text.
+    """
+    if text_type not in _matcher_cache:
+        try:
+            _matcher_cache[text_type] = _build_matcher(rules, text_type is bytes)
+        except (re.error, UnicodeError, ValueError):
+            _matcher_cache[text_type] = None
+    return _matcher_cache[text_type]
+
+
 def get_rules() -> list[_CompiledRule]:
     """Get compiled rules (cached)."""
     global _rules_cache, _rules_load_error
 
     if _rules_cache is None:
         _rules_cache, _rules_load_error = _load_rules()
+        _matcher_cache.clear()
 
     return _rules_cache
 
@@ -168,20 +596,320 @@ def reload_rules() -> None:
     global _rules_cache, _rules_load_error
     _rules_cache = None
     _rules_load_error = None
+    _matcher_cache.clear()
+
+
+def _iter_candidate_lines(
+    text: str | bytes,
+    newline: str | bytes,
+    screen: re.Pattern | None,
+    haystack: str | bytes | None = None,
+):
+    """
+    Yield (line_no, stripped_line) for lines that may match a rule.
+
+    With a screen pattern the whole text is searched in one pass and only
+    lines holding a screen hit are produced; line numbers are recovered by
+    counting newlines between hits, so the text is never split into a list.
+    The screen runs over ``haystack`` (a same-length transform of ``text``,
+    e.g. lowercased) when given; lines are always sliced from ``text``.
+    Without a screen every non-blank line is produced.
+    """
+    if haystack is None:
+        haystack = text
+    search = screen.search if screen is not None else None
+    text_len = len(text)
+    pos = 0  # Start of the line numbered line_no
+    line_no = 1
+
+    while pos < text_len:
+        if search is None:
+            hit = pos  # No screen: every line is a candidate
+        else:
+            match = search(haystack, pos)
+            if match is None:
+                return
+            hit = match.start()
+
+        line_start = haystack.rfind(newline, pos, hit) + 1
+        if line_start:
+            line_no += haystack.count(newline, pos, line_start)
+            pos = line_start
+
+        end = haystack.find(newline, hit)
+        if end < 0:
+            end = text_len
+
+        line = text[pos:end].strip()
+        if line:
+            yield line_no, line
+
+        # Resume on the next line: a hit may span a newline, but rules are
+        # evaluated per line so the following line must be screened again
+        pos = end + 1
+        line_no += 1
+
+
+def _scan_text(
+    text: str | bytes,
+    rules: list[_CompiledRule],
+    signals_map: dict[tuple[str, tuple], ExternalSignal],
+    first_line_no: int,
+    max_evidence_per_signal: int,
+    max_line_length: int,
+) -> None:
+    """
+    Scan a block of log text, merging matches into ``signals_map``.
+
+    Bytes are scanned as UTF-8 without decoding the block; only captures
+    and evidence of matching lines are decoded.
+
+    Args:
+        text: Block of whole lines (str or UTF-8 bytes)
+        rules: Compiled rules to apply
+        signals_map: Signals keyed by (rule id, captures key), updated in place
+        first_line_no: Line number of the first line in ``text``
+        max_evidence_per_signal: Max evidence lines to keep per signal
+        max_line_length: Max length for evidence line snippets
+    """
+    is_bytes = isinstance(text, bytes)
+    matcher = _get_matcher(rules, type(text))
+    if matcher is None:
+        text = text.decode("utf-8", "replace")
+        is_bytes = False
+        matcher = _get_matcher(rules, str)
+    lowered = text.lower()
+
+    # Most logs contain none of the rule literals: bail out before scanning
+    literals = matcher.literals
+    if literals is not None and not any(lit in lowered for lit in literals):
+        return
+
+    screen = matcher.screen
+    haystack = None
+    # lower() can change the length of some non-ASCII text; offsets must
+    # line up with the original, so fall back to the IGNORECASE screen then
+    if matcher.folded_screen is not None and len(lowered) == len(text):
+        screen, haystack = matcher.folded_screen, lowered
+
+    dispatch = matcher.dispatch
+    table = dispatch.table
+    line_base = first_line_no - 1
+
+    for line_no, line_stripped in _iter_candidate_lines(
+        text, matcher.newline, screen, haystack
+    ):
+        line_no += line_base
+        matched_rule = None
+        evidence = None
+
+        # One fused anchor search picks the patterns worth trying; they come
+        # in rule order, then pattern order within a rule
+        for index in dispatch.candidates(line_stripped.lower()):
+            rule, pattern = table[index]
+            if rule is matched_rule:
+                continue  # One match per rule per line is enough
+
+            match = pattern.search(line_stripped)
+            if not match:
+                continue
+            matched_rule = rule
+
+            # Extract captures from named groups
+            captures = {
+                k: v for k, v in match.groupdict().items()
+                if v is not None
+            }
+            if is_bytes:
+                captures = {
+                    k: v.decode("utf-8", "replace") for k, v in captures.items()
+                }
+
+            # Create dedup key
+            captures_key = tuple(sorted(captures.items()))
+            signal_key = (rule.id, captures_key)
+
+            if evidence is None:
+                # Truncate once per line; every rule matching it shares the
+                # same (never mutated) evidence object
+                evidence_line = line_stripped
+                if is_bytes:
+                    evidence_line = evidence_line.decode("utf-8", "replace")
+                if len(evidence_line) > max_line_length:
+                    evidence_line = evidence_line[:max_line_length] + "..."
+                evidence = ExternalSignalEvidence(
+                    line_no=line_no,
+                    line_text=evidence_line,
+                )
+
+            if signal_key in signals_map:
+                # Add evidence to existing signal (up to max)
+                existing = signals_map[signal_key]
+                if len(existing.evidence) < max_evidence_per_signal:
+                    existing.evidence.append(evidence)
+            else:
+                # Create new signal
+                signal = ExternalSignal(
+                    id=rule.id,
+                    severity=rule.severity,
+                    category=rule.category,
+                    captures=captures,
+                    evidence=[evidence],
+                    hints=rule.hints,
+                    hypothesis_template=rule.hypothesis_template,
+                    # Severity and category are folded into base_score at
+                    # load; more captures means a more specific signal
+                    score=rule.base_score + len(captures) * 2,
+                )
+                signals_map[signal_key] = signal
+
+
+def _sorted_signals(
+    signals_map: dict[tuple[str, tuple], ExternalSignal],
+) -> list[ExternalSignal]:
+    """Order collected signals by severity (F > E > W > I), then by score."""
+    signals = list(signals_map.values())
+    signals.sort(key=attrgetter("_sort_key"))
+    return signals
+
+
+def _split_at_newlines(
+    text: str | bytes, parts: int
+) -> list[tuple[int, int, int]]:
+    """
+    Split text into roughly equal ranges that end on line boundaries.
+
+    Returns:
+        List of (start, end, first_line_no); the newline at each cut belongs
+        to neither range
+    """
+    newline = b"\n" if isinstance(text, bytes) else "\n"
+    ranges = []
+    start = 0
+    line_no = 1
+    step = len(text) // parts + 1
+
+    while start < len(text):
+        end = text.find(newline, start + step)
+        if end < 0 or len(ranges) == parts - 1:
+            end = len(text)
+        ranges.append((start, end, line_no))
+        line_no += text.count(newline, start, end) + 1
+        start = end + 1
+
+    return ranges
+
+
+def _init_scan_worker(rules: list[_CompiledRule]) -> None:
+    """Worker initializer: use the parent's rules instead of loading them."""
+    global _rules_cache, _rules_load_error
+    _rules_cache, _rules_load_error = rules, None
+    _matcher_cache.clear()
+
+
+def _get_scan_pool(rules: list[_CompiledRule], workers: int) -> ProcessPoolExecutor:
+    """Get the shared worker pool, (re)starting it for these rules if needed."""
+    global _scan_pool, _scan_pool_rules, _scan_pool_workers
+
+    with _scan_pool_lock:
+        if (
+            _scan_pool is None
+            or _scan_pool_rules is not rules
+            or _scan_pool_workers != workers
+        ):
+            if _scan_pool is not None:
+                _scan_pool.shutdown(wait=False)
+            # spawn: this is reachable from the threaded web server, where
+            # forking could copy held locks into the children
+            _scan_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_scan_worker,
+                initargs=(rules,),
+            )
+            _scan_pool_rules = rules
+            _scan_pool_workers = workers
+        return _scan_pool
+
+
+def _discard_scan_pool() -> None:
+    """Drop the shared worker pool (e.g. after it broke)."""
+    global _scan_pool, _scan_pool_rules, _scan_pool_workers
+
+    with _scan_pool_lock:
+        if _scan_pool is not None:
+            _scan_pool.shutdown(wait=False, cancel_futures=True)
+        _scan_pool = None
+        _scan_pool_rules = None
+        _scan_pool_workers = 0
+
+
+def _scan_chunk(
+    text: str | bytes,
+    first_line_no: int,
+    max_evidence_per_signal: int,
+    max_line_length: int,
+) -> list[tuple[tuple[str, tuple], ExternalSignal]]:
+    """Worker entry point: scan one chunk with the rules set by the initializer."""
+    signals_map: dict[tuple[str, tuple], ExternalSignal] = {}
+    _scan_text(
+        text, get_rules(), signals_map, first_line_no,
+        max_evidence_per_signal, max_line_length,
+    )
+    return list(signals_map.items())
+
+
+def _scan_parallel(
+    text: str | bytes,
+    rules: list[_CompiledRule],
+    workers: int,
+    signals_map: dict[tuple[str, tuple], ExternalSignal],
+    max_evidence_per_signal: int,
+    max_line_length: int,
+) -> None:
+    """Scan newline-aligned chunks in worker processes and merge in order."""
+    executor = _get_scan_pool(rules, workers)
+    futures = [
+        executor.submit(
+            _scan_chunk, text[start:end], first_line_no,
+            max_evidence_per_signal, max_line_length,
+        )
+        for start, end, first_line_no in _split_at_newlines(text, workers)
+    ]
+    # Merging chunk results in text order keeps first-seen signal order
+    # and evidence order identical to a sequential scan
+    for future in futures:
+        for signal_key, signal in future.result():
+            existing = signals_map.get(signal_key)
+            if existing is None:
+                signals_map[signal_key] = signal
+                continue
+            room = max_evidence_per_signal - len(existing.evidence)
+            if room > 0:
+                existing.evidence.extend(signal.evidence[:room])
 
 
 def extract_external_signals(
-    text: str,
+    text: str | bytes,
     max_evidence_per_signal: int = 5,
     max_line_length: int = 200,
+    max_workers: int = 1,
 ) -> list[ExternalSignal]:
     """
     Extract external signals from log text.
 
+    With max_workers > 1, texts of PARALLEL_MIN_SIZE or more are split on
+    line boundaries and scanned in a shared pool of worker processes;
+    results are identical to a serial scan.
+    Raw UTF-8 bytes (e.g. straight from a binary file read) are scanned
+    without decoding the whole text.
+
     Args:
-        text: Log text to scan
+        text: Log text to scan (str or UTF-8 bytes)
         max_evidence_per_signal: Max evidence lines to keep per signal
         max_line_length: Max length for evidence line snippets
+        max_workers: Worker processes for large texts, capped at
+            MAX_SCAN_WORKERS (default 1: scan in-process)
 
     Returns:
         List of ExternalSignal objects, sorted by severity (F > E > W > I)
@@ -192,126 +920,132 @@ def extract_external_signals(
 
     # Track signals by (id, captures_key) for deduplication
     # captures_key is a hashable representation of captures
-    signals_map: dict[tuple[str, str], ExternalSignal] = {}
-
-    lines = text.split('\n')
+    signals_map: dict[tuple[str, tuple], ExternalSignal] = {}
 
-    for line_no, line in enumerate(lines, 1):
-        line_stripped = line.strip()
-        if not line_stripped:
-            continue
-
-        for rule in rules:
-            for pattern in rule.patterns:
-                match = pattern.search(line_stripped)
-                if match:
-                    # Extract captures from named groups
-                    captures = {
-                        k: v for k, v in match.groupdict().items()
-                        if v is not None
-                    }
-
-                    # Create dedup key
-                    captures_key = json.dumps(captures, sort_keys=True)
-                    signal_key = (rule.id, captures_key)
-
-                    # Truncate line for evidence
-                    evidence_line = line_stripped
-                    if len(evidence_line) > max_line_length:
-                        evidence_line = evidence_line[:max_line_length] + "..."
-
-                    evidence = ExternalSignalEvidence(
-                        line_no=line_no,
-                        line_text=evidence_line,
-                    )
-
-                    if signal_key in signals_map:
-                        # Add evidence to existing signal (up to max)
-                        existing = signals_map[signal_key]
-                        if len(existing.evidence) < max_evidence_per_signal:
-                            existing.evidence.append(evidence)
-                    else:
-                        # Create new signal
-                        signal = ExternalSignal(
-                            id=rule.id,
-                            severity=rule.severity,
-                            category=rule.category,
-                            captures=captures,
-                            evidence=[evidence],
-                            hints=rule.hints.copy(),
-                            hypothesis_template=rule.hypothesis_template,
-                        )
-                        # Calculate score based on severity and category
-                        signal.score = _calculate_signal_score(signal)
-                        signals_map[signal_key] = signal
-
-                    break  # One match per rule per line is enough
-
-    # Sort by severity (F > E > W > I), then by score
-    signals = list(signals_map.values())
-    signals.sort(key=lambda s: (-s.severity_rank, -s.score))
-
-    return signals
-
-
-def _calculate_signal_score(signal: ExternalSignal) -> float:
-    """Calculate score for a signal based on severity and category."""
-    score = 0.0
-
-    # Severity score
-    score += signal.severity_rank * 10
-
-    # Category bonuses
-    category_scores = {
-        "CONFIG": 5,  # Configuration issues are often root causes
-        "DATABASE": 4,
-        "EXTERNAL_API": 3,
-        "NETWORK": 3,
-        "AUTH": 2,
-        "RESOURCE": 2,
-    }
-    score += category_scores.get(signal.category, 1)
+    max_workers = min(max_workers, MAX_SCAN_WORKERS)
+    if max_workers > 1 and len(text) >= PARALLEL_MIN_SIZE:
+        try:
+            _scan_parallel(
+                text, rules, max_workers, signals_map,
+                max_evidence_per_signal, max_line_length,
+            )
+            return _sorted_signals(signals_map)
+        except (BrokenProcessPool, OSError):
+            # No usable process pool here; fall back to scanning in-process
+            _discard_scan_pool()
+            signals_map.clear()
+
+    _scan_text(
+        text, rules, signals_map, 1, max_evidence_per_signal, max_line_length
+    )
+    return _sorted_signals(signals_map)
+
+
+def extract_external_signals_stream(
+    fp: IO[str] | IO[bytes],
+    max_evidence_per_signal: int = 5,
+    max_line_length: int = 200,
+    block_size: int = STREAM_BLOCK_SIZE,
+) -> list[ExternalSignal]:
+    """
+    Extract external signals from a text stream without reading it whole.
 
-    # Bonus for having captures (more specific)
-    if signal.captures:
-        score += len(signal.captures) * 2
+    The stream is read in blocks cut at the last newline; the partial line
+    at the end of each block is carried into the next one. Results are the
+    same as extract_external_signals() on the full text.
 
-    return score
+    Args:
+        fp: Text or binary (UTF-8) file object (anything with read(size))
+        max_evidence_per_signal: Max evidence lines to keep per signal
+        max_line_length: Max length for evidence line snippets
+        block_size: Characters (or bytes) to read per block
 
+    Returns:
+        List of ExternalSignal objects, sorted by severity (F > E > W > I)
+    """
+    rules = get_rules()
+    if not rules:
+        return []
 
-# Service extraction patterns (for best-effort service detection)
+    signals_map: dict[tuple[str, tuple], ExternalSignal] = {}
+    line_no = 1
+    tail = None
+    newline = None
+
+    while True:
+        block = fp.read(block_size)
+        if not block:
+            break
+        if newline is None:
+            newline = b"\n" if isinstance(block, bytes) else "\n"
+        if tail:
+            block = tail + block
+        cut = block.rfind(newline)
+        if cut < 0:
+            tail = block  # No complete line yet
+            continue
+        tail = block[cut + 1:]
+        lines = block[:cut]
+        _scan_text(
+            lines, rules, signals_map, line_no,
+            max_evidence_per_signal, max_line_length,
+        )
+        line_no += lines.count(newline) + 1
+
+    if tail:
+        _scan_text(
+            tail, rules, signals_map, line_no,
+            max_evidence_per_signal, max_line_length,
+        )
+
+    return _sorted_signals(signals_map)
+
+
+# Service extraction patterns (for best-effort service detection). Each is
+# scanned on its own, so a span one pattern consumes is still seen by the
+# others (services=estmt|service=paper yields both). Matched case-sensitively
+# against lowercased text (IGNORECASE is much slower); results are lowercased
+# anyway.
 SERVICE_PATTERNS = [
     # Query param: services=estmt|paper|print
-    re.compile(r"services?=(?P<service>[\w|]+)", re.IGNORECASE),
+    re.compile(r"services?=(?P<service>[\w|]+)"),
     # Path segment: /services/estmt/ or /service/paper/
-    re.compile(r"/services?/(?P<service>\w+)", re.IGNORECASE),
+    re.compile(r"/services?/(?P<service>\w+)"),
     # JSON key: "service": "estmt" or "service_type": "paper"
-    re.compile(r"[\"']service(?:_type)?[\"']\s*:\s*[\"'](?P<service>\w+)[\"']", re.IGNORECASE),
+    re.compile(r"[\"']service(?:_type)?[\"']\s*:\s*[\"'](?P<service>\w+)[\"']"),
     # service=estmt in various formats
-    re.compile(r"service\s*[=:]\s*[\"']?(?P<service>\w+)[\"']?", re.IGNORECASE),
+    re.compile(r"service\s*[=:]\s*[\"']?(?P<service>\w+)[\"']?"),
 ]
+SERVICE_PATTERNS_BYTES = [re.compile(p.pattern.encode("ascii")) for p in SERVICE_PATTERNS]
 
 
-def extract_services_from_text(text: str) -> list[str]:
+def extract_services_from_text(text: str | bytes) -> list[str]:
     """
     Extract service names from log text (best-effort).
 
     Looks for patterns like services=estmt, /services/paper/, etc.
+    Accepts str or UTF-8 bytes.
 
     Returns:
         List of unique service names found (lowercased)
     """
-    services = set()
+    is_bytes = isinstance(text, bytes)
+    text = text.lower()
+    # Every pattern needs the literal, so most logs skip the scans entirely
+    if (b"service" if is_bytes else "service") not in text:
+        return []
 
-    for pattern in SERVICE_PATTERNS:
+    services = set()
+    for pattern in SERVICE_PATTERNS_BYTES if is_bytes else SERVICE_PATTERNS:
         for match in pattern.finditer(text):
             service = match.group("service")
-            if service:
-                # Handle pipe-separated services like "estmt|paper|print"
-                for svc in service.lower().split('|'):
-                    svc = svc.strip()
-                    if svc and len(svc) > 1:
-                        services.add(svc)
+            if is_bytes:
+                service = service.decode("utf-8", "replace")
+            # Handle pipe-separated services like "estmt|paper|print"
+            for svc in service.split('|'):
+                svc = svc.strip()
+                if svc and len(svc) > 1:
+                    services.add(svc)
 
     return sorted(services)
 
@@ -326,10 +1060,11 @@ def get_infotrac_missing_ids(signals: list[ExternalSignal]) -> list[str]:
     Returns:
         List of message IDs (as strings)
     """
-    ids = []
+    # dict keeps first-seen order with O(1) membership
+    ids: dict[str, None] = {}
     for signal in signals:
         if signal.id == "INFOTRAC_MISSING_MESSAGE_ID":
             msg_id = signal.captures.get("message_id")
-            if msg_id and msg_id not in ids:
-                ids.append(msg_id)
-    return ids
+            if msg_id:
+                ids[msg_id] = None
+    return list(ids)
@@ -2,11 +2,13 @@
 
 import re
 from dataclasses import dataclass, field
+from functools import lru_cache
+from string import Formatter
 
 from ..parsers.log_parser import LogSignal, LogAnalysis
 
 
-@dataclass
+@dataclass(slots=True)
 class Hypothesis:
     """A hypothesis about the root cause."""
 
@@ -20,240 +22,328 @@ class Hypothesis:
     external_signal_id: str | None = None  # ID of external signal rule
 
 
+@dataclass(slots=True, frozen=True)
+class HypothesisRule:
+    """A pattern-based rule for hypotheses from log signals."""
+
+    pattern: str
+    hypothesis: str
+    confirm: tuple[str, ...]
+    confidence: float
+    is_wrapper_noise: bool = False
+    compiled: re.Pattern = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Compile once here instead of going through re's shared cache
+        object.__setattr__(self, "compiled", re.compile(self.pattern, re.IGNORECASE))
+
+
+# A parsed template: (literal, field_name) segments, or None when the template
+# needs the full str.format machinery (format specs, conversions, indexing).
+TemplatePlan = tuple[tuple[str, str | None], ...] | None
+
+
+@lru_cache(maxsize=256)
+def parse_template(template: str) -> TemplatePlan:
+    """Parse a ``{name}`` template once into a plan for :func:`fast_format`."""
+    segments = []
+    try:
+        parsed = list(Formatter().parse(template))
+    except ValueError:
+        return None
+    for literal, field_name, format_spec, conversion in parsed:
+        if format_spec or conversion:
+            return None
+        if field_name is not None and not field_name.isidentifier():
+            return None
+        segments.append((literal, field_name))
+    return tuple(segments)
+
+
+def fast_format(template: str, plan: TemplatePlan, captures: dict) -> str:
+    """
+    Substitute captures into a parsed template.
+
+    Missing fields are left as ``{name}`` instead of raising KeyError.
+    """
+    if plan is None:
+        try:
+            return template.format(**captures)
+        except (KeyError, IndexError, ValueError):
+            return template
+    return "".join(
+        literal if name is None else literal + str(captures.get(name, "{" + name + "}"))
+        for literal, name in plan
+    )
+
+
+@dataclass(slots=True, frozen=True)
+class ExternalSignalHypothesis:
+    """Hypothesis template and confirm steps for an external signal id."""
+
+    hypothesis_template: str
+    confirm: tuple[str, ...]
+    confidence: float
+    template_plan: TemplatePlan = field(init=False, repr=False, compare=False)
+    confirm_plans: tuple[TemplatePlan, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "template_plan", parse_template(self.hypothesis_template))
+        object.__setattr__(
+            self, "confirm_plans", tuple(parse_template(step) for step in self.confirm)
+        )
+
+
 # External signal hypothesis templates and confirm steps
-EXTERNAL_SIGNAL_HYPOTHESES = {
-    "INFOTRAC_MISSING_MESSAGE_ID": {
-        "hypothesis_template": "Message ID {message_id} not found in InfoTrac DB for service={service}. Likely configuration/Message Manager mapping issue (not Papyrus resource).",
-        "confirm": [
+EXTERNAL_SIGNAL_HYPOTHESES: dict[str, ExternalSignalHypothesis] = {
+    "INFOTRAC_MISSING_MESSAGE_ID": ExternalSignalHypothesis(
+        hypothesis_template="Message ID {message_id} not found in InfoTrac DB for service={service}. Likely configuration/Message Manager mapping issue (not Papyrus resource).",
+        confirm=(
             "Confirm message_id exists/mapped in InfoTrac for service (estmt/paper/print)",
             "Check whether message is paper-only vs estmt",
             "If expected behavior, treat as config expectation / non-bug",
             "Review InfoTrac DB: SELECT * FROM message_map WHERE message_id = {message_id}",
-        ],
-        "confidence": 0.95,  # High confidence - specific external config issue
-    },
-    "API_SUCCESS_FALSE_JSON": {
-        "hypothesis_template": "External API returned success=false. Check API payload, configuration, or upstream service.",
-        "confirm": [
+        ),
+        confidence=0.95,  # High confidence - specific external config issue
+    ),
+    "API_SUCCESS_FALSE_JSON": ExternalSignalHypothesis(
+        hypothesis_template="External API returned success=false. Check API payload, configuration, or upstream service.",
+        confirm=(
             "Review full API response in log for error details",
             "Check API endpoint configuration and credentials",
             "Verify upstream service health and connectivity",
-        ],
-        "confidence": 0.85,
-    },
-    "API_ERROR_MESSAGE_JSON": {
-        "hypothesis_template": "API returned error: {api_message}",
-        "confirm": [
+        ),
+        confidence=0.85,
+    ),
+    "API_ERROR_MESSAGE_JSON": ExternalSignalHypothesis(
+        hypothesis_template="API returned error: {api_message}",
+        confirm=(
             "Review the error message for root cause",
             "Check API request payload for issues",
             "Verify API configuration and permissions",
-        ],
-        "confidence": 0.85,
-    },
-    "HTTP_ERROR_STATUS": {
-        "hypothesis_template": "HTTP error {status_code} detected. Check network/API configuration.",
-        "confirm": [
+        ),
+        confidence=0.85,
+    ),
+    "HTTP_ERROR_STATUS": ExternalSignalHypothesis(
+        hypothesis_template="HTTP error {status_code} detected. Check network/API configuration.",
+        confirm=(
             "Verify target URL is correct and accessible",
             "Check authentication/authorization",
             "Review server-side logs for details",
-        ],
-        "confidence": 0.85,
-    },
-    "CONNECTION_REFUSED": {
-        "hypothesis_template": "Connection refused to {host}. Service may be down or unreachable.",
-        "confirm": [
+        ),
+        confidence=0.85,
+    ),
+    "CONNECTION_REFUSED": ExternalSignalHypothesis(
+        hypothesis_template="Connection refused to {host}. Service may be down or unreachable.",
+        confirm=(
             "Check if target service is running",
             "Verify network/firewall configuration",
             "Check service port and host configuration",
-        ],
-        "confidence": 0.90,
-    },
-    "CONNECTION_TIMEOUT": {
-        "hypothesis_template": "Network connection or read timed out.",
-        "confirm": [
+        ),
+        confidence=0.90,
+    ),
+    "CONNECTION_TIMEOUT": ExternalSignalHypothesis(
+        hypothesis_template="Network connection or read timed out.",
+        confirm=(
             "Check network latency and connectivity",
             "Verify service responsiveness",
             "Review timeout configuration",
-        ],
-        "confidence": 0.85,
-    },
-    "DB_CONNECTION_ERROR": {
-        "hypothesis_template": "Database connection error detected.",
-        "confirm": [
+        ),
+        confidence=0.85,
+    ),
+    "DB_CONNECTION_ERROR": ExternalSignalHypothesis(
+        hypothesis_template="Database connection error detected.",
+        confirm=(
             "Check database server status",
             "Verify connection string and credentials",
             "Review database server logs",
-        ],
-        "confidence": 0.90,
-    },
-    "AUTH_FAILURE": {
-        "hypothesis_template": "Authentication/authorization failure detected.",
-        "confirm": [
+        ),
+        confidence=0.90,
+    ),
+    "AUTH_FAILURE": ExternalSignalHypothesis(
+        hypothesis_template="Authentication/authorization failure detected.",
+        confirm=(
             "Check credentials and tokens",
             "Verify user permissions",
             "Review authentication configuration",
-        ],
-        "confidence": 0.85,
-    },
-    "SERVICE_UNAVAILABLE": {
-        "hypothesis_template": "Service is temporarily unavailable.",
-        "confirm": [
+        ),
+        confidence=0.85,
+    ),
+    "SERVICE_UNAVAILABLE": ExternalSignalHypothesis(
+        hypothesis_template="Service is temporarily unavailable.",
+        confirm=(
             "Check service health and status",
             "Review service deployment and load",
             "Check for scheduled maintenance",
-        ],
-        "confidence": 0.85,
-    },
+        ),
+        confidence=0.85,
+    ),
 }
 
 
 # Rules for hypothesis generation
-HYPOTHESIS_RULES = [
-    {
-        "pattern": r"ORA-\d{5}",
-        "hypothesis": "Database connection or query error (Oracle)",
-        "confirm": [
+HYPOTHESIS_RULES: list[HypothesisRule] = [
+    HypothesisRule(
+        pattern=r"ORA-\d{5}",
+        hypothesis="Database connection or query error (Oracle)",
+        confirm=(
             "Check Oracle listener status: lsnrctl status",
             "Verify TNS configuration in tnsnames.ora",
             "Check database logs for details",
-        ],
-        "confidence": 0.9,
-    },
-    {
-        "pattern": r"PPDE\d{4}E",
-        "hypothesis": "Document generation error (Papyrus DocExec)",
-        "confirm": [
+        ),
+        confidence=0.9,
+    ),
+    HypothesisRule(
+        pattern=r"PPDE\d{4}E",
+        hypothesis="Document generation error (Papyrus DocExec)",
+        confirm=(
             "Check DOCDEF syntax in .dfa file",
             "Verify input data format matches expected",
             "Review variable declarations in docdef",
-        ],
-        "confidence": 0.85,
-    },
-    {
-        "pattern": r"PPCS\d{4}E",
-        "hypothesis": "Papyrus application/converter error",
-        "confirm": [
+        ),
+        confidence=0.85,
+    ),
+    HypothesisRule(
+        pattern=r"PPCS\d{4}E",
+        hypothesis="Papyrus application/converter error",
+        confirm=(
             "Check application configuration",
             "Verify profile (.prf) file settings",
             "Review input file format",
-        ],
-        "confidence": 0.85,
-    },
-    {
-        "pattern": r"failed to open|cannot open|No such file",
-        "hypothesis": "Missing input file or permission issue",
-        "confirm": [
+        ),
+        confidence=0.85,
+    ),
+    HypothesisRule(
+        pattern=r"failed to open|cannot open|No such file",
+        hypothesis="Missing input file or permission issue",
+        confirm=(
             "Verify file exists at expected path",
             "Check file permissions (ls -la)",
             "Validate path in .ins configuration",
-        ],
-        "confidence": 0.9,
-    },
-    {
-        "pattern": r"Permission denied",
-        "hypothesis": "File or directory permission error",
-        "confirm": [
+        ),
+        confidence=0.9,
+    ),
+    HypothesisRule(
+        pattern=r"Permission denied",
+        hypothesis="File or directory permission error",
+        confirm=(
             "Check file permissions: ls -la <path>",
             "Verify user has access to directory",
             "Check if file is locked by another process",
-        ],
-        "confidence": 0.95,
-    },
-    {
-        "pattern": r"mismatch|do not match",
-        "hypothesis": "Data validation or count mismatch",
-        "confirm": [
+        ),
+        confidence=0.95,
+    ),
+    HypothesisRule(
+        pattern=r"mismatch|do not match",
+        hypothesis="Data validation or count mismatch",
+        confirm=(
             "Compare input vs output record counts",
             "Check for duplicate records in input",
             "Validate data format matches expected schema",
-        ],
-        "confidence": 0.8,
-    },
-    {
-        "pattern": r"timeout|timed out",
-        "hypothesis": "Operation timeout (network, database, or process)",
-        "confirm": [
+        ),
+        confidence=0.8,
+    ),
+    HypothesisRule(
+        pattern=r"timeout|timed out",
+        hypothesis="Operation timeout (network, database, or process)",
+        confirm=(
             "Check network connectivity",
             "Verify database is responding",
             "Review process resource usage",
-        ],
-        "confidence": 0.85,
-    },
-    {
-        "pattern": r"missing file_id|missing operand",
-        "hypothesis": "Missing required parameter or input",
-        "confirm": [
+        ),
+        confidence=0.85,
+    ),
+    HypothesisRule(
+        pattern=r"missing file_id|missing operand",
+        hypothesis="Missing required parameter or input",
+        confirm=(
             "Verify all required parameters are set in .ins file",
             "Check input file contains expected fields",
             "Review calling script for parameter passing",
-        ],
-        "confidence": 0.85,
-    },
-    {
-        "pattern": r"Error line \d+ has",
-        "hypothesis": "Data parsing error (CSV/input format)",
-        "confirm": [
+        ),
+        confidence=0.85,
+    ),
+    HypothesisRule(
+        pattern=r"Error line \d+ has",
+        hypothesis="Data parsing error (CSV/input format)",
+        confirm=(
             "Check input file line N for malformed data",
             "Verify CSV quoting and escaping",
             "Compare with expected column count",
-        ],
-        "confidence": 0.9,
-    },
-    {
-        "pattern": r"RC=\d+[^0]|status \[-\d+\]",
-        "hypothesis": "Non-zero return code from subprocess",
-        "confirm": [
+        ),
+        confidence=0.9,
+    ),
+    HypothesisRule(
+        pattern=r"RC=\d+[^0]|status \[-\d+\]",
+        hypothesis="Non-zero return code from subprocess",
+        confirm=(
             "Check logs from the failing subprocess",
             "Verify input files for subprocess exist",
             "Review subprocess configuration",
-        ],
-        "confidence": 0.75,
-    },
-    {
-        "pattern": r"Generator returns a non-zero|Generator.*non-zero",
-        "hypothesis": "Wrapper message from isisdisk.sh (often ignored per ops/Ya Mee)",
-        "confirm": [
+        ),
+        confidence=0.75,
+    ),
+    HypothesisRule(
+        pattern=r"Generator returns a non-zero|Generator.*non-zero",
+        hypothesis="Wrapper message from isisdisk.sh (often ignored per ops/Ya Mee)",
+        confirm=(
             "Check if there are other error codes (PP*E, ORA-*) in the same log",
             "Review preceding log lines for actual failure cause",
             "If no other errors present, this may be a false alarm",
             "Check DOCDEF and input files if Generator genuinely failed",
-        ],
-        "confidence": 0.4,  # Low confidence - wrapper noise
-        "is_wrapper_noise": True,
-    },
-    {
-        "pattern": r"^ERROR:|ERROR\s*:",
-        "hypothesis": "Application error - review message for details",
-        "confirm": [
+        ),
+        confidence=0.4,  # Low confidence - wrapper noise
+        is_wrapper_noise=True,
+    ),
+    HypothesisRule(
+        pattern=r"^ERROR:|ERROR\s*:",
+        hypothesis="Application error - review message for details",
+        confirm=(
             "Check the specific error message for root cause",
             "Review preceding log lines for context",
             "Verify input files and configuration",
-        ],
-        "confidence": 0.7,
-    },
-    {
-        "pattern": r"CSV file.*is bad|CSV.*bad",
-        "hypothesis": "Malformed CSV input file",
-        "confirm": [
+        ),
+        confidence=0.7,
+    ),
+    HypothesisRule(
+        pattern=r"CSV file.*is bad|CSV.*bad",
+        hypothesis="Malformed CSV input file",
+        confirm=(
             "Check CSV file for encoding issues",
             "Verify quote/escape handling",
             "Compare column count with expected schema",
-        ],
-        "confidence": 0.9,
-    },
-    {
-        "pattern": r"Failed in \w+",
-        "hypothesis": "Script or process failed during execution",
-        "confirm": [
+        ),
+        confidence=0.9,
+    ),
+    HypothesisRule(
+        pattern=r"Failed in \w+",
+        hypothesis="Script or process failed during execution",
+        confirm=(
             "Check the specific script mentioned in error",
             "Review script logs for details",
             "Verify input parameters and files",
-        ],
-        "confidence": 0.85,
-    },
+        ),
+        confidence=0.85,
+    ),
 ]
 
 
+# The isisdisk.sh wrapper-noise rule, checked before all others
+WRAPPER_RULE = next((r for r in HYPOTHESIS_RULES if r.is_wrapper_noise), None)
+WRAPPER_RULE_INDEX = HYPOTHESIS_RULES.index(WRAPPER_RULE) if WRAPPER_RULE else -1
+
+# All non-wrapper rule patterns fused into one alternation (group r<i> is
+# HYPOTHESIS_RULES[i]); a message that misses it cannot match any rule
+COMBINED_HYPOTHESIS_RE = re.compile(
+    "|".join(
+        f"(?P<r{i}>{rule.pattern})"
+        for i, rule in enumerate(HYPOTHESIS_RULES)
+        if not rule.is_wrapper_noise
+    ),
+    re.IGNORECASE,
+)
+
+
 def _generate_external_signal_hypotheses(
     log_analysis: LogAnalysis | None,
 ) -> list[Hypothesis]:
@@ -278,34 +368,25 @@ def _generate_external_signal_hypotheses(
 
         if hyp_config:
             # Use template with captures
-            template = hyp_config["hypothesis_template"]
+            template = hyp_config.hypothesis_template
             captures = dict(ext_signal.captures)
             captures["service"] = service_str  # Add service to captures
 
-            try:
-                hypothesis_text = template.format(**captures)
-            except KeyError:
-                # Missing capture, use template as-is
-                hypothesis_text = template
-
-            confirm_steps = []
-            for step in hyp_config["confirm"]:
-                try:
-                    confirm_steps.append(step.format(**captures))
-                except KeyError:
-                    confirm_steps.append(step)
+            hypothesis_text = fast_format(template, hyp_config.template_plan, captures)
+            confirm_steps = [
+                fast_format(step, plan, captures)
+                for step, plan in zip(hyp_config.confirm, hyp_config.confirm_plans)
+            ]
 
-            confidence = hyp_config["confidence"]
+            confidence = hyp_config.confidence
         elif ext_signal.hypothesis_template:
             # Use template from rule
-            try:
-                hypothesis_text = ext_signal.hypothesis_template.format(
-                    **ext_signal.captures, service=service_str
-                )
-            except KeyError:
-                hypothesis_text = ext_signal.hypothesis_template
-
-            confirm_steps = ext_signal.hints.copy()
+            template = ext_signal.hypothesis_template
+            captures = dict(ext_signal.captures)
+            captures["service"] = service_str
+            hypothesis_text = fast_format(template, parse_template(template), captures)
+
+            confirm_steps = list(ext_signal.hints)
             # Severity-based confidence
             confidence = {
                 "F": 0.95,
@@ -318,7 +399,7 @@ def _generate_external_signal_hypotheses(
             hypothesis_text = f"External signal: {ext_signal.id} ({ext_signal.category})"
             if ext_signal.hints:
                 hypothesis_text = ext_signal.hints[0]
-            confirm_steps = ext_signal.hints[1:] if len(ext_signal.hints) > 1 else []
+            confirm_steps = list(ext_signal.hints[1:])
             confidence = 0.75
 
         # Get evidence from first evidence line
@@ -382,35 +463,41 @@ def generate_hypotheses(
 
     for signal in error_signals:
         # First check if this is wrapper noise
-        wrapper_rule = next((r for r in HYPOTHESIS_RULES if r.get("is_wrapper_noise")), None)
-        if wrapper_rule and re.search(wrapper_rule["pattern"], signal.message, re.IGNORECASE):
+        wrapper_rule = WRAPPER_RULE
+        if wrapper_rule and wrapper_rule.compiled.search(signal.message):
             wrapper_noise_signals.add(signal.line_number)
-            if wrapper_rule["pattern"] not in seen_patterns:
-                seen_patterns.add(wrapper_rule["pattern"])
+            if WRAPPER_RULE_INDEX not in seen_patterns:
+                seen_patterns.add(WRAPPER_RULE_INDEX)
                 evidence = signal.message
                 if len(evidence) > 100:
                     evidence = evidence[:100] + "..."
                 hypotheses.append(Hypothesis(
-                    hypothesis=wrapper_rule["hypothesis"],
+                    hypothesis=wrapper_rule.hypothesis,
                     evidence=evidence,
                     line_number=signal.line_number,
-                    confirm_steps=wrapper_rule["confirm"],
-                    confidence=wrapper_rule["confidence"],
+                    confirm_steps=list(wrapper_rule.confirm),
+                    confidence=wrapper_rule.confidence,
                     is_wrapper_noise=True,
                 ))
             continue  # Skip other patterns for this signal
 
-        # Check other patterns
-        for rule in HYPOTHESIS_RULES:
-            if rule.get("is_wrapper_noise"):
+        # One fused search decides whether any rule can match this signal
+        match = COMBINED_HYPOTHESIS_RE.search(signal.message)
+        if match is None:
+            continue
+
+        # The leftmost hit names one matching rule; others may still match
+        # further along the message, so each unseen rule is checked in order
+        matched_index = int(match.lastgroup[1:])
+        for index, rule in enumerate(HYPOTHESIS_RULES):
+            if rule.is_wrapper_noise:
                 continue  # Already handled above
 
-            pattern = rule["pattern"]
-            if pattern in seen_patterns:
+            if index in seen_patterns:
                 continue
 
-            if re.search(pattern, signal.message, re.IGNORECASE):
-                seen_patterns.add(pattern)
+            if index == matched_index or rule.compiled.search(signal.message):
+                seen_patterns.add(index)
 
                 # Truncate evidence for display
                 evidence = signal.message
@@ -418,11 +505,11 @@ def generate_hypotheses(
                     evidence = evidence[:100] + "..."
 
                 hypotheses.append(Hypothesis(
-                    hypothesis=rule["hypothesis"],
+                    hypothesis=rule.hypothesis,
                     evidence=evidence,
                     line_number=signal.line_number,
-                    confirm_steps=rule["confirm"],
-                    confidence=rule["confidence"],
+                    confirm_steps=list(rule.confirm),
+                    confidence=rule.confidence,
                     is_wrapper_noise=False,
                 ))
 
@@ -7,14 +7,23 @@ that can be opened in an IDE.
 
 from __future__ import annotations
 
+import heapq
 import json
 import re
 import sqlite3
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable
 
+from ..db.connection import DOCDEF_CODE_MIN_LEN
 from ..graph.call_parser import find_script_calls
 
+try:  # optional accelerator for the cursor prompt's JSON block
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # ── Data structures ──────────────────────────────────────────────────────────
 
@@ -32,6 +41,7 @@ class BundleFile:
     path: str       # snapshot-relative ("procs/wccuds1.procs")
     kind: str       # "procs", "script", "insert", "control", "docdef"
     source: str     # "proc_file", "RUNS_edge", "READS_edge", etc.
+    abs_path: str | None = None  # str(snapshot_path / path), set by build_bundle
 
 
 @dataclass
@@ -53,10 +63,52 @@ _STOPWORDS = frozenset({
 })
 
 
+# ── SQL ──────────────────────────────────────────────────────────────────────
+# Statements are kept as constants so every call passes the identical string
+# and sqlite3's per-connection statement cache can reuse the prepared form.
+# Values (including LIKE patterns) are always bound as parameters; IN lists
+# only vary in their placeholder count.
+
+_SQL_PROC_NODE_BY_KEY = (
+    "SELECT id, key, display_name, canonical_path FROM nodes WHERE type='proc' AND key = ?"
+)
+_SQL_PROC_NODES_BY_PREFIX_EXCEPT = (
+    "SELECT id, key, display_name, canonical_path FROM nodes WHERE type='proc' AND key LIKE ? AND key != ?"
+)
+_SQL_PROC_NODES_BY_PREFIX = (
+    "SELECT id, key, display_name, canonical_path FROM nodes WHERE type='proc' AND key LIKE ?"
+)
+_SQL_ALL_PROCS = "SELECT proc_name, parsed_json FROM procs"
+_SQL_PROCS_FTS_MATCH = (
+    "SELECT p.proc_name, p.parsed_json, n.key, n.display_name "
+    "FROM procs_fts f "
+    "JOIN procs p ON p.id = f.rowid "
+    "JOIN nodes n ON n.key = 'proc:' || p.proc_name "
+    "WHERE procs_fts MATCH ? ORDER BY p.id"
+)
+_SQL_NODE_BY_KEY = "SELECT id, key, display_name FROM nodes WHERE key = ?"
+_SQL_ALL_DOCDEFS = "SELECT path FROM artifacts WHERE kind = 'docdef' ORDER BY id"
+_SQL_DOCDEFS_BY_CODE = (
+    "SELECT DISTINCT a.id, a.path FROM docdef_codes dc "
+    "JOIN artifacts a ON a.id = dc.artifact_id "
+    "WHERE dc.code >= ? AND dc.code < ? ORDER BY a.id"
+)
+_SQL_INSERT_LIKE = "SELECT path FROM artifacts WHERE kind='insert' AND path LIKE ?"
+_SQL_SCRIPT_LIKE = "SELECT path FROM artifacts WHERE kind = 'script' AND path LIKE ?"
+_SQL_ALL_SCRIPTS = "SELECT path FROM artifacts WHERE kind = 'script'"
+
+
+def _placeholders(values) -> str:
+    """Return a ``?,?,...`` placeholder list for an SQL IN clause."""
+    return ",".join("?" for _ in values)
+
+
 # ── Title parsing ────────────────────────────────────────────────────────────
 
 _CID_RE = re.compile(r"\b([A-Z]{4})\b")
 _LETTER_RE = re.compile(r"(?:Letter\s*|DL)(\d{2,3})\b", re.IGNORECASE)
+# Alphanumeric runs of 3+ chars, i.e. the keyword-sized tokens of a title
+_KEYWORD_RE = re.compile(r"[A-Za-z0-9]{3,}")
 
 
 def parse_title(title: str) -> tuple[str | None, str | None, list[str]]:
@@ -77,12 +129,11 @@ def parse_title(title: str) -> tuple[str | None, str | None, list[str]]:
     if m:
         letter_number = m.group(1).zfill(3)
 
-    # Keywords: split on non-alphanumeric, filter short/stopwords
-    tokens = re.split(r"[^A-Za-z0-9]+", title)
+    # Keywords: alphanumeric runs of 3+ chars, minus stopwords
     keywords = [
-        t.lower()
-        for t in tokens
-        if len(t) >= 3 and t.lower() not in _STOPWORDS
+        t
+        for t in (tok.lower() for tok in _KEYWORD_RE.findall(title))
+        if t not in _STOPWORDS
     ]
 
     return cid, letter_number, keywords
@@ -128,7 +179,7 @@ def find_candidates(
         # Exact key lookup
         exact_key = f"proc:{intent.cid}{intent.job_id}"
         rows = conn.execute(
-            "SELECT id, key, display_name, canonical_path FROM nodes WHERE type='proc' AND key = ?",
+            _SQL_PROC_NODE_BY_KEY,
             (exact_key,),
         ).fetchall()
         for row in rows:
@@ -141,7 +192,7 @@ def find_candidates(
         # Also add prefix matches (other jobs for same CID)
         prefix = f"proc:{intent.cid}%"
         rows = conn.execute(
-            "SELECT id, key, display_name, canonical_path FROM nodes WHERE type='proc' AND key LIKE ? AND key != ?",
+            _SQL_PROC_NODES_BY_PREFIX_EXCEPT,
             (prefix, exact_key),
         ).fetchall()
         for row in rows:
@@ -155,7 +206,7 @@ def find_candidates(
         # Prefix match only
         prefix = f"proc:{intent.cid}%"
         rows = conn.execute(
-            "SELECT id, key, display_name, canonical_path FROM nodes WHERE type='proc' AND key LIKE ?",
+            _SQL_PROC_NODES_BY_PREFIX,
             (prefix,),
         ).fetchall()
         for row in rows:
@@ -167,27 +218,60 @@ def find_candidates(
 
     if not candidates and intent.title_keywords:
         # Fallback: keyword search in procs parsed_json
-        rows = conn.execute(
-            "SELECT proc_name, parsed_json FROM procs",
-        ).fetchall()
+        try:
+            rows = conn.execute(
+                _SQL_PROCS_FTS_MATCH,
+                (" OR ".join(f'"{kw}"' for kw in intent.title_keywords),),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # No trigram index (older SQLite / database): scan every proc
+            rows = _keyword_scan_procs(conn)
         for row in rows:
+            # Recheck on the real text: the index is a prefilter only
             pj = (row["parsed_json"] or "").lower()
-            if any(kw in pj for kw in intent.title_keywords):
-                # Find corresponding node
-                node = conn.execute(
-                    "SELECT id, key, display_name FROM nodes WHERE key = ?",
-                    (f"proc:{row['proc_name']}",),
-                ).fetchone()
-                if node:
-                    candidates.append(BundleCandidate(
-                        proc_key=node["key"],
-                        proc_name=row["proc_name"],
-                        display_name=node["display_name"],
-                    ))
+            if _has_keyword(intent.title_keywords, pj):
+                candidates.append(BundleCandidate(
+                    proc_key=row["key"],
+                    proc_name=row["proc_name"],
+                    display_name=row["display_name"],
+                ))
 
     return candidates
 
 
+def _keyword_hits(keywords: list[str], text: str) -> list[str]:
+    """Return the keywords (in order, duplicates kept) found in lowercased text.
+
+    Titles yield only a handful of keywords, and CPython's substring search
+    beats a combined alternation regex by 5-20x at that size, so this stays a
+    plain ``in`` test per keyword.
+    """
+    return [kw for kw in keywords if kw in text]
+
+
+def _has_keyword(keywords: list[str], text: str) -> bool:
+    """Return True if any keyword occurs in lowercased text."""
+    return any(kw in text for kw in keywords)
+
+
+def _keyword_scan_procs(conn: sqlite3.Connection) -> list:
+    """Return every proc row joined to its node, for the unindexed fallback."""
+    rows = []
+    for row in conn.execute(_SQL_ALL_PROCS).fetchall():
+        node = conn.execute(
+            _SQL_NODE_BY_KEY,
+            (f"proc:{row['proc_name']}",),
+        ).fetchone()
+        if node:
+            rows.append({
+                "proc_name": row["proc_name"],
+                "parsed_json": row["parsed_json"],
+                "key": node["key"],
+                "display_name": node["display_name"],
+            })
+    return rows
+
+
 # ── Control & DFA helpers ────────────────────────────────────────────────────
 
 # Matches: format_dfa="WCCUDL014", ind_pdf_format_dfa = WCCUDL014, etc.
@@ -204,14 +288,20 @@ def _extract_dfa_codes_from_control(content: str) -> list[str]:
 
     Parses lines like ``format_dfa="WCCUDL014"`` and all ``*_format_dfa`` variants.
     """
-    codes: list[str] = []
-    seen: set[str] = set()
+    codes: dict[str, None] = {}
     for m in _FORMAT_DFA_RE.finditer(content):
-        code = m.group(1).upper()
-        if code not in seen:
-            seen.add(code)
-            codes.append(code)
-    return codes
+        codes[m.group(1).upper()] = None
+    return list(codes)
+
+
+@lru_cache(maxsize=32)
+def _dfa_token_re_for(prefix: str) -> re.Pattern:
+    """Return _DFA_TOKEN_RE restricted to tokens starting with ``prefix``.
+
+    The lookahead lets the regex engine reject other CIDs' tokens itself
+    instead of a Python-level ``startswith`` over every hit.
+    """
+    return re.compile(rf"\b(?={re.escape(prefix)})([A-Z]{{4}}[A-Z0-9]{{2,}})\b")
 
 
 def _extract_dfa_tokens_from_procs(parsed_json: str, cid: str) -> list[str]:
@@ -219,15 +309,7 @@ def _extract_dfa_tokens_from_procs(parsed_json: str, cid: str) -> list[str]:
 
     E.g. for cid="wccu", finds WCCUDL014, WCCUDL015.
     """
-    prefix = cid.upper()
-    codes: list[str] = []
-    seen: set[str] = set()
-    for m in _DFA_TOKEN_RE.finditer(parsed_json):
-        token = m.group(1)
-        if token.startswith(prefix) and token not in seen:
-            seen.add(token)
-            codes.append(token)
-    return codes
+    return list(dict.fromkeys(_dfa_token_re_for(cid.upper()).findall(parsed_json)))
 
 
 def _filter_dfa_by_letter(codes: list[str], letter_number: str | None) -> list[str]:
@@ -242,27 +324,78 @@ def _filter_dfa_by_letter(codes: list[str], letter_number: str | None) -> list[s
     return [c for c in codes if c[-3:] == letter_number]
 
 
-def _resolve_dfa(
+def _dfa_path_matcher(dfa_code: str):
+    """Return a predicate for uppercased paths equivalent to ``LIKE '%CODE%'``.
+
+    ``dfa_code`` must be uppercased. Codes are word characters, so the only
+    LIKE wildcard they can carry is ``_``.
+    """
+    if "_" not in dfa_code:
+        return lambda path_upper: dfa_code in path_upper
+    return re.compile(
+        ".".join(re.escape(part) for part in dfa_code.split("_")), re.DOTALL,
+    ).search
+
+
+def _docdef_paths_for(
     conn: sqlite3.Connection,
     dfa_code: str,
-    source: str,
+    cache: dict[str, list[str]],
+) -> list[str]:
+    """Return docdef artifact paths matching ``UPPER(path) LIKE '%CODE%'``.
+
+    Plain alphanumeric codes are an index seek on docdef_codes: the code is a
+    prefix of one of the path's keys. Short codes, codes with a ``_`` wildcard
+    and databases without the table fall back to scanning docdef paths.
+    Results are memoized in ``cache``, shared by all candidates of a plan.
+    """
+    code = dfa_code.upper()
+    if code in cache:
+        return cache[code]
+
+    paths: list[str] | None = None
+    if len(code) >= DOCDEF_CODE_MIN_LEN and code.isascii() and code.isalnum():
+        try:
+            # Keys are [A-Z0-9]+, so every key starting with code sorts below code + DEL
+            paths = [
+                row["path"]
+                for row in conn.execute(_SQL_DOCDEFS_BY_CODE, (code, code + "\x7f"))
+            ]
+        except sqlite3.OperationalError:
+            pass  # No docdef_codes table (older database)
+
+    if paths is None:
+        matches = _dfa_path_matcher(code)
+        paths = [
+            row["path"]
+            for row in conn.execute(_SQL_ALL_DOCDEFS)
+            if matches(row["path"].upper())
+        ]
+
+    cache[code] = paths
+    return paths
+
+
+def _resolve_dfa(
+    conn: sqlite3.Connection,
+    dfa_codes: dict[str, str],
+    docdef_cache: dict[str, list[str]],
     candidate: BundleCandidate,
-    seen_paths: set[str],
 ) -> None:
-    """Resolve a DFA code to docdef artifact(s) and add to candidate files."""
-    # Accept .dfa and any extension starting with .dfa (case-insensitive path match)
-    rows = conn.execute(
-        "SELECT path FROM artifacts WHERE kind = 'docdef' AND UPPER(path) LIKE ?",
-        (f"%{dfa_code}%",),
-    ).fetchall()
-    for row in rows:
-        if row["path"] not in seen_paths:
-            seen_paths.add(row["path"])
-            candidate.files.append(BundleFile(
-                path=row["path"],
-                kind="docdef",
-                source=source,
-            ))
+    """Resolve DFA codes (code → source) to docdef artifacts on the candidate.
+
+    Accepts .dfa and any extension starting with .dfa (case-insensitive match).
+    """
+    seen_paths: set[str] = set()
+    for code, source in dfa_codes.items():
+        for path in _docdef_paths_for(conn, code, docdef_cache):
+            if path not in seen_paths:
+                seen_paths.add(path)
+                candidate.files.append(BundleFile(
+                    path=path,
+                    kind="docdef",
+                    source=source,
+                ))
 
 
 def _select_controls(
@@ -326,13 +459,148 @@ def _job_family_prefix(proc_name: str) -> str:
 
 # ── Bundle builder ───────────────────────────────────────────────────────────
 
+def _fetch_parsed_json(
+    conn: sqlite3.Connection,
+    candidates: list[BundleCandidate],
+) -> dict[str, tuple[str, str]]:
+    """Return ``(parsed_json, parsed_json.lower())`` keyed by proc_name.
+
+    The lowercased copy is made once here; scoring only ever needs that form.
+    """
+    names = [c.proc_name for c in candidates]
+    if not names:
+        return {}
+    procs: dict[str, tuple[str, str]] = {}
+    for row in conn.execute(
+        f"SELECT proc_name, parsed_json FROM procs WHERE proc_name IN ({_placeholders(names)})",
+        names,
+    ):
+        parsed_json = row["parsed_json"] or ""
+        procs[row["proc_name"]] = (parsed_json, parsed_json.lower())
+    return procs
+
+
+def _fetch_controls_by_cid(
+    conn: sqlite3.Connection,
+    candidates: list[BundleCandidate],
+    intent: PlanIntent,
+) -> dict[str, list]:
+    """Return control artifact rows (path, text_content) grouped by CID.
+
+    A candidate's CID is the intent CID, or else its proc_name prefix.
+    """
+    cids = list(dict.fromkeys(intent.cid or c.proc_name[:4] for c in candidates))
+    if not cids:
+        return {}
+    like_clause = " OR ".join("a.path LIKE ?" for _ in cids)
+    rows = conn.execute(
+        "SELECT a.path, c.text_content FROM artifacts a "
+        "LEFT JOIN artifact_contents c ON c.artifact_id = a.id "
+        f"WHERE a.kind = 'control' AND ({like_clause}) ORDER BY a.id",
+        [f"%{cid}%" for cid in cids],
+    ).fetchall()
+    # LIKE is ASCII case-insensitive; mirror that when distributing rows
+    return {
+        cid: [r for r in rows if cid.lower() in r["path"].lower()]
+        for cid in cids
+    }
+
+
 def build_bundle(
+    conn: sqlite3.Connection,
+    candidates: list[BundleCandidate],
+    snapshot_path: Path,
+    intent: PlanIntent,
+    parsed_by_name: dict[str, tuple[str, str]] | None = None,
+    controls_by_cid: dict[str, list] | None = None,
+) -> None:
+    """Populate candidate.files with all related files for every candidate.
+
+    Node ids, RUNS edges, procs rows and control artifacts are fetched for
+    all candidates at once instead of once per candidate. Callers that
+    already hold the procs / control rows (see generate_plan) pass them in.
+    """
+    if not candidates:
+        return
+
+    # Node ids for all candidates
+    keys = [c.proc_key for c in candidates]
+    node_ids: dict[str, int] = {
+        row["key"]: row["id"]
+        for row in conn.execute(
+            f"SELECT id, key FROM nodes WHERE key IN ({_placeholders(keys)})",
+            keys,
+        )
+    }
+
+    # RUNS edges → script paths, grouped by source node
+    runs_by_src: dict[int, list[str]] = {}
+    if node_ids:
+        src_ids = list(node_ids.values())
+        for row in conn.execute(
+            "SELECT e.src, n.canonical_path FROM edges e JOIN nodes n ON e.dst = n.id "
+            f"WHERE e.src IN ({_placeholders(src_ids)}) AND e.rel_type = 'RUNS' "
+            "ORDER BY e.id",
+            src_ids,
+        ):
+            runs_by_src.setdefault(row["src"], []).append(row["canonical_path"])
+
+    if parsed_by_name is None:
+        parsed_by_name = _fetch_parsed_json(conn, candidates)
+    if controls_by_cid is None:
+        controls_by_cid = _fetch_controls_by_cid(conn, candidates, intent)
+
+    # DFA code → docdef paths, filled on demand and shared across candidates
+    docdef_cache: dict[str, list[str]] = {}
+
+    # Secondary scripts — CID+JobID wildcard match (same for every candidate)
+    cidjob_rows: list = []
+    if intent.cid and intent.job_id:
+        cidjob = f"{intent.cid}{intent.job_id}"
+        cidjob_rows = conn.execute(
+            _SQL_SCRIPT_LIKE,
+            (f"%{cidjob}%",),
+        ).fetchall()
+
+    # Callee pool for call graph discovery
+    known_basenames = {
+        Path(row["path"]).name
+        for row in conn.execute(_SQL_ALL_SCRIPTS)
+    }
+
+    for candidate in candidates:
+        proc = parsed_by_name.get(candidate.proc_name)
+        _build_candidate_bundle(
+            conn,
+            candidate,
+            snapshot_path,
+            intent,
+            node_id=node_ids.get(candidate.proc_key),
+            run_paths=runs_by_src.get(node_ids.get(candidate.proc_key), []),
+            parsed_json=proc[0] if proc else None,
+            all_control_rows=controls_by_cid[intent.cid or candidate.proc_name[:4]],
+            docdef_cache=docdef_cache,
+            cidjob_rows=cidjob_rows,
+            known_basenames=known_basenames,
+        )
+        for bf in candidate.files:
+            bf.abs_path = str(snapshot_path / bf.path)
+
+
+def _build_candidate_bundle(
     conn: sqlite3.Connection,
     candidate: BundleCandidate,
     snapshot_path: Path,
     intent: PlanIntent,
+    node_id: int | None,
+    run_paths: list[str],
+    parsed_json: str | None,
+    all_control_rows: list,
+    docdef_cache: dict[str, list[str]],
+    cidjob_rows: list,
+    known_basenames: set[str],
 ) -> None:
-    """Populate candidate.files with all related files."""
+    """Populate one candidate's files from rows prefetched by build_bundle."""
     # 1. Add .procs file
     candidate.files.append(BundleFile(
         path=f"procs/{candidate.proc_name}.procs",
@@ -340,40 +608,26 @@ def build_bundle(
         source="proc_file",
     ))
 
-    # Get node id
-    node = conn.execute(
-        "SELECT id FROM nodes WHERE key = ?", (candidate.proc_key,)
-    ).fetchone()
-    if not node:
+    if node_id is None:
         return
-    node_id = node["id"]
 
     # 2. RUNS edges → scripts
-    runs = conn.execute(
-        "SELECT n.canonical_path, n.key FROM edges e JOIN nodes n ON e.dst = n.id "
-        "WHERE e.src = ? AND e.rel_type = 'RUNS'",
-        (node_id,),
-    ).fetchall()
-    for row in runs:
-        if row["canonical_path"]:
+    for path in run_paths:
+        if path:
             candidate.files.append(BundleFile(
-                path=row["canonical_path"],
+                path=path,
                 kind="script",
                 source="RUNS_edge",
             ))
 
     # 3. Insert file — from procs parsed_json → artifact lookup
-    proc_row = conn.execute(
-        "SELECT parsed_json FROM procs WHERE proc_name = ?",
-        (candidate.proc_name,),
-    ).fetchone()
-    if proc_row:
-        parsed = json.loads(proc_row["parsed_json"])
+    if parsed_json is not None:
+        parsed = json.loads(parsed_json)
         file_setup = parsed.get("file_setup")
         if file_setup:
             insert_name = Path(file_setup).name
             art = conn.execute(
-                "SELECT path FROM artifacts WHERE kind='insert' AND path LIKE ?",
+                _SQL_INSERT_LIKE,
                 (f"%{insert_name}",),
             ).fetchone()
             if art:
@@ -385,11 +639,6 @@ def build_bundle(
 
     # 4. Control files — prefer job-family prefix over bare CID
     cid = intent.cid or candidate.proc_name[:4]
-    all_control_rows = conn.execute(
-        "SELECT path, text_content FROM artifacts WHERE kind = 'control' AND path LIKE ?",
-        (f"%{cid}%",),
-    ).fetchall()
-
     control_rows = _select_controls(all_control_rows, candidate.proc_name, intent)
 
     for row in control_rows:
@@ -399,35 +648,31 @@ def build_bundle(
             source="control_match",
         ))
 
-    # 5. DFA resolution — from control format_dfa fields + procs DFA tokens
-    seen_dfa_paths: set[str] = set()
+    # 5. DFA resolution — from control format_dfa fields + procs DFA tokens.
+    # A code seen in both places keeps its first source.
+    dfa_codes: dict[str, str] = {}
 
     # 5a. From control text_content: all *_format_dfa and format_dfa lines
     for row in control_rows:
-        dfa_codes = _extract_dfa_codes_from_control(row["text_content"] or "")
-        dfa_codes = _filter_dfa_by_letter(dfa_codes, intent.letter_number)
-        for code in dfa_codes:
-            _resolve_dfa(conn, code, "control_format_dfa", candidate, seen_dfa_paths)
+        codes = _extract_dfa_codes_from_control(row["text_content"] or "")
+        for code in _filter_dfa_by_letter(codes, intent.letter_number):
+            dfa_codes.setdefault(code, "control_format_dfa")
 
     # 5b. From .procs parsed_json: DFA tokens (e.g. WCCUDL014)
-    proc_row = conn.execute(
-        "SELECT parsed_json FROM procs WHERE proc_name = ?",
-        (candidate.proc_name,),
-    ).fetchone()
-    if proc_row:
-        procs_dfa_codes = _extract_dfa_tokens_from_procs(
-            proc_row["parsed_json"] or "", cid,
-        )
-        procs_dfa_codes = _filter_dfa_by_letter(procs_dfa_codes, intent.letter_number)
-        for code in procs_dfa_codes:
-            _resolve_dfa(conn, code, "procs_dfa_token", candidate, seen_dfa_paths)
+    if parsed_json is not None:
+        codes = _extract_dfa_tokens_from_procs(parsed_json or "", cid)
+        for code in _filter_dfa_by_letter(codes, intent.letter_number):
+            dfa_codes.setdefault(code, "procs_dfa_token")
+
+    if dfa_codes:
+        _resolve_dfa(conn, dfa_codes, docdef_cache, candidate)
 
     # ── Dedup set for remaining steps
     seen_paths: set[str] = {f.path for f in candidate.files}
 
     # 6. Helper scripts in master/ matching proc_name prefix (e.g. idcumv1_*.pl/py/sh)
     helper_rows = conn.execute(
-        "SELECT path FROM artifacts WHERE kind = 'script' AND path LIKE ?",
+        _SQL_SCRIPT_LIKE,
         (f"master/{candidate.proc_name}_%",),
     ).fetchall()
     for row in helper_rows:
@@ -440,20 +685,14 @@ def build_bundle(
             ))
 
     # 7. Secondary scripts — CID+JobID wildcard match
-    if intent.cid and intent.job_id:
-        cidjob = f"{intent.cid}{intent.job_id}"
-        cidjob_rows = conn.execute(
-            "SELECT path FROM artifacts WHERE kind = 'script' AND path LIKE ?",
-            (f"%{cidjob}%",),
-        ).fetchall()
-        for row in cidjob_rows:
-            if row["path"] not in seen_paths:
-                seen_paths.add(row["path"])
-                candidate.files.append(BundleFile(
-                    path=row["path"],
-                    kind="script",
-                    source="cidjob_wildcard_match",
-                ))
+    for row in cidjob_rows:
+        if row["path"] not in seen_paths:
+            seen_paths.add(row["path"])
+            candidate.files.append(BundleFile(
+                path=row["path"],
+                kind="script",
+                source="cidjob_wildcard_match",
+            ))
 
     # 8. Call graph discovery — scripts called by RUNS scripts
     # Only scan RUNS scripts that share the CID prefix (proc-specific scripts).
@@ -461,11 +700,6 @@ def build_bundle(
     # because they reference hundreds of unrelated scripts via comments/logs.
     # The callee pool (known_basenames) remains unrestricted so cross-family
     # utilities like common_utils.sh can still be discovered.
-    all_scripts = conn.execute(
-        "SELECT path FROM artifacts WHERE kind = 'script'"
-    ).fetchall()
-    known_basenames = {Path(row["path"]).name for row in all_scripts}
-
     cid_prefix = candidate.proc_name[:4].lower()
     runs_scripts = [
         f for f in candidate.files
@@ -483,7 +717,7 @@ def build_bundle(
         called = find_script_calls(content, known_basenames)
         for basename in called:
             art = conn.execute(
-                "SELECT path FROM artifacts WHERE kind = 'script' AND path LIKE ?",
+                _SQL_SCRIPT_LIKE,
                 (f"%/{basename}",),
             ).fetchone()
             if art and art["path"] not in seen_paths:
@@ -497,6 +731,11 @@ def build_bundle(
 
 # ── Title phrase extraction ───────────────────────────────────────────────────
 
+# Leading/trailing separators around the title phrase, stripped in one pass
+_PHRASE_EDGES_RE = re.compile(r"^[\s\-–—:,]+|[\s\-–—:,]+$")
+
+
+@lru_cache(maxsize=64)
 def _extract_title_phrase(raw_title: str) -> str:
     """Extract the most distinctive phrase from a raw title.
 
@@ -504,71 +743,77 @@ def _extract_title_phrase(raw_title: str) -> str:
     E.g. "WCCU Letter 14 - Monthly Update Notice"
          → "Monthly Update Notice"
     """
-    s = raw_title
-    # Remove leading CID (4 uppercase letters)
-    s = _CID_RE.sub("", s, count=1)
-    # Remove "Letter NN" or "DL0NN"
-    s = _LETTER_RE.sub("", s, count=1)
-    # Strip leading/trailing separators
-    s = re.sub(r"^[\s\-–—:,]+", "", s)
-    s = re.sub(r"[\s\-–—:,]+$", "", s)
-    return s.strip()
+    # Remove leading CID (4 uppercase letters), then "Letter NN" or "DL0NN"
+    s = _LETTER_RE.sub("", _CID_RE.sub("", raw_title, count=1), count=1)
+    return _PHRASE_EDGES_RE.sub("", s)
 
 
 # ── Scoring ──────────────────────────────────────────────────────────────────
 
+def _intent_expected_key(intent: PlanIntent) -> str | None:
+    """Return the exact proc key implied by cid+job_id, if both are set."""
+    if intent.cid and intent.job_id:
+        return f"proc:{intent.cid}{intent.job_id}"
+    return None
+
+
+def _intent_phrase_lower(intent: PlanIntent) -> str:
+    """Return the lowercased distinctive title phrase ("" without a title)."""
+    if not intent.raw_title:
+        return ""
+    # Extract the most distinctive phrase: strip CID and leading/trailing noise
+    return _extract_title_phrase(intent.raw_title).lower()
+
+
 def score_candidate(
     candidate: BundleCandidate,
     intent: PlanIntent,
-    conn: sqlite3.Connection,
+    parsed_json_lower: str,
+    expected_key: str | None,
+    phrase_lower: str,
 ) -> None:
-    """Calculate score for a candidate based on intent match quality."""
+    """Calculate score for a candidate based on intent match quality.
+
+    ``expected_key`` and ``phrase_lower`` depend only on the intent; see
+    _intent_expected_key / _intent_phrase_lower, computed once per plan.
+    """
     breakdown: list[tuple[str, float]] = []
+    kinds = {f.kind for f in candidate.files}
 
     # Exact proc key match (cid+jobid)
-    if intent.cid and intent.job_id:
-        expected_key = f"proc:{intent.cid}{intent.job_id}"
-        if candidate.proc_key == expected_key:
-            breakdown.append(("exact_key_match", 50.0))
+    if expected_key and candidate.proc_key == expected_key:
+        breakdown.append(("exact_key_match", 50.0))
 
     # proc_name starts with cid
     if intent.cid and candidate.proc_name.startswith(intent.cid):
         breakdown.append(("cid_prefix", 15.0))
 
     # Has script files
-    if any(f.kind == "script" for f in candidate.files):
+    if "script" in kinds:
         breakdown.append(("has_scripts", 10.0))
 
     # Has insert files
-    if any(f.kind == "insert" for f in candidate.files):
+    if "insert" in kinds:
         breakdown.append(("has_inserts", 10.0))
 
     # Has control file
-    if any(f.kind == "control" for f in candidate.files):
+    if "control" in kinds:
         breakdown.append(("has_control", 10.0))
 
     # Has DFA file
-    if any(f.kind == "docdef" for f in candidate.files):
+    if "docdef" in kinds:
         breakdown.append(("has_dfa", 5.0))
 
     # Title phrase match in parsed_json (high value — exact phrase from title)
-    row = conn.execute(
-        "SELECT parsed_json FROM procs WHERE proc_name = ?",
-        (candidate.proc_name,),
-    ).fetchone()
-    pj = (row["parsed_json"] or "").lower() if row else ""
-
-    if intent.raw_title and pj:
-        # Extract the most distinctive phrase: strip CID and leading/trailing noise
-        phrase = _extract_title_phrase(intent.raw_title)
-        if phrase and phrase.lower() in pj:
-            breakdown.append(("title_phrase_match", 30.0))
+    pj = parsed_json_lower
+
+    if phrase_lower and pj and phrase_lower in pj:
+        breakdown.append(("title_phrase_match", 30.0))
 
     # Keyword matches in parsed_json
     if intent.title_keywords and pj:
-        for kw in intent.title_keywords:
-            if kw in pj:
-                breakdown.append((f"keyword:{kw}", 2.0))
+        for kw in _keyword_hits(intent.title_keywords, pj):
+            breakdown.append((f"keyword:{kw}", 2.0))
 
     candidate.score_breakdown = breakdown
     candidate.score = sum(pts for _, pts in breakdown)
@@ -592,14 +837,25 @@ def generate_plan(
     intent = build_intent(cid=cid, job_id=job_id, title=title)
     candidates = find_candidates(conn, intent)
 
+    # Fetch procs and control rows once; both bundling and scoring use them
+    parsed_by_name = _fetch_parsed_json(conn, candidates)
+    controls_by_cid = _fetch_controls_by_cid(conn, candidates, intent)
+
+    build_bundle(
+        conn, candidates, snapshot_path, intent,
+        parsed_by_name=parsed_by_name,
+        controls_by_cid=controls_by_cid,
+    )
+    expected_key = _intent_expected_key(intent)
+    phrase_lower = _intent_phrase_lower(intent)
     for c in candidates:
-        build_bundle(conn, c, snapshot_path, intent)
-        score_candidate(c, intent, conn)
+        _, parsed_json_lower = parsed_by_name.get(c.proc_name, ("", ""))
+        score_candidate(c, intent, parsed_json_lower, expected_key, phrase_lower)
 
-    # Sort descending by score
-    candidates.sort(key=lambda c: c.score, reverse=True)
+    # Top `limit` by score, descending; ties keep discovery order like a stable sort
+    top = heapq.nlargest(limit, candidates, key=lambda c: c.score)
 
-    return intent, candidates[:limit]
+    return intent, top
 
 
 # ── i18n ─────────────────────────────────────────────────────────────────────
@@ -666,15 +922,27 @@ _TRANSLATIONS: dict[str, dict[str, str]] = {
 }
 
 
-def _t(key: str, lang: str) -> str:
-    """Look up a translated string, falling back to English."""
-    return _TRANSLATIONS.get(lang, _TRANSLATIONS["en"]).get(
-        key, _TRANSLATIONS["en"].get(key, key)
-    )
+def _translator(lang: str) -> Callable[[str], str]:
+    """Return a lookup bound to one language table, falling back to English."""
+    english = _TRANSLATIONS["en"]
+    table = _TRANSLATIONS.get(lang, english)
+    if table is english:
+        return lambda key: english.get(key, key)
+
+    def tr(key: str) -> str:
+        value = table.get(key)
+        return value if value is not None else english.get(key, key)
+
+    return tr
 
 
 # ── Output formatting ────────────────────────────────────────────────────────
 
+def _abs_path(bf: BundleFile, snapshot_path: Path) -> str:
+    """Return the file's absolute path, cached by build_bundle when available."""
+    return bf.abs_path or str(snapshot_path / bf.path)
+
+
 def format_plan_output(
     intent: PlanIntent,
     candidates: list[BundleCandidate],
@@ -688,51 +956,53 @@ def format_plan_output(
     Default mode: winner details + compact summary of others.
     show_all mode: full details for all candidates (legacy behavior).
     """
+    tr = _translator(lang)
+    files_label = tr("files")
     lines: list[str] = []
 
     # ── PARSED INTENT ──
-    lines.append(f"═══ {_t('parsed_intent', lang)} ═══")
-    lines.append(f"  {_t('cid', lang) + ':':16s}{intent.cid or '(none)'}")
-    lines.append(f"  {_t('job_id', lang) + ':':16s}{intent.job_id or '(none)'}")
-    lines.append(f"  {_t('letter_number', lang) + ':':16s}{intent.letter_number or '(none)'}")
+    lines.append(f"═══ {tr('parsed_intent')} ═══")
+    lines.append(f"  {tr('cid') + ':':16s}{intent.cid or '(none)'}")
+    lines.append(f"  {tr('job_id') + ':':16s}{intent.job_id or '(none)'}")
+    lines.append(f"  {tr('letter_number') + ':':16s}{intent.letter_number or '(none)'}")
     if intent.title_keywords:
-        lines.append(f"  {_t('keywords', lang) + ':':16s}{', '.join(intent.title_keywords)}")
+        lines.append(f"  {tr('keywords') + ':':16s}{', '.join(intent.title_keywords)}")
     if intent.raw_title:
-        lines.append(f"  {_t('raw_title', lang) + ':':16s}{intent.raw_title}")
+        lines.append(f"  {tr('raw_title') + ':':16s}{intent.raw_title}")
     lines.append("")
 
     if not candidates:
-        lines.append(f"═══ {_t('bundle_candidates', lang)} (0) ═══")
-        lines.append(f"  {_t('no_matching_procs', lang)}")
+        lines.append(f"═══ {tr('bundle_candidates')} (0) ═══")
+        lines.append(f"  {tr('no_matching_procs')}")
         lines.append("")
-        lines.append(f"═══ {_t('files_to_open', lang)} ═══")
-        lines.append(f"  {_t('no_files', lang)}")
+        lines.append(f"═══ {tr('files_to_open')} ═══")
+        lines.append(f"  {tr('no_files')}")
         return "\n".join(lines)
 
     if show_all:
-        lines.append(f"═══ {_t('bundle_candidates', lang)} ({len(candidates)}) ═══")
+        lines.append(f"═══ {tr('bundle_candidates')} ({len(candidates)}) ═══")
         for i, c in enumerate(candidates, 1):
-            _format_candidate_detail(lines, i, c, snapshot_path, debug, lang)
+            _format_candidate_detail(lines, i, c, snapshot_path, debug, files_label)
         lines.append("")
-        lines.append(f"═══ {_t('files_to_open', lang)} ═══")
+        lines.append(f"═══ {tr('files_to_open')} ═══")
         for bf in candidates[0].files:
-            lines.append(f"  {snapshot_path / bf.path}")
+            lines.append(f"  {_abs_path(bf, snapshot_path)}")
     else:
         top = candidates[0]
-        lines.append(f"═══ {_t('selected_bundle', lang)} ═══")
-        _format_candidate_detail(lines, 1, top, snapshot_path, debug, lang)
+        lines.append(f"═══ {tr('selected_bundle')} ═══")
+        _format_candidate_detail(lines, 1, top, snapshot_path, debug, files_label)
 
-        lines.append(f"═══ {_t('files_to_open', lang)} ═══")
+        lines.append(f"═══ {tr('files_to_open')} ═══")
         for bf in top.files:
-            lines.append(f"  {snapshot_path / bf.path}")
+            lines.append(f"  {_abs_path(bf, snapshot_path)}")
 
         if len(candidates) > 1:
             lines.append("")
-            lines.append(f"═══ {_t('other_candidates', lang)} ({len(candidates) - 1}) ═══")
+            lines.append(f"═══ {tr('other_candidates')} ({len(candidates) - 1}) ═══")
             for i, c in enumerate(candidates[1:], 2):
                 lines.append(
                     f"  #{i}  {c.proc_key}  [{c.display_name}]"
-                    f"  score={c.score:.0f}  {_t('files', lang)}={len(c.files)}"
+                    f"  score={c.score:.0f}  {files_label}={len(c.files)}"
                 )
 
     return "\n".join(lines)
@@ -744,14 +1014,14 @@ def _format_candidate_detail(
     candidate: BundleCandidate,
     snapshot_path: Path,
     debug: bool,
-    lang: str = "en",
+    files_label: str = "files",
 ) -> None:
     """Append detailed candidate info to lines buffer."""
     lines.append(f"  #{rank}  {candidate.proc_key}  [{candidate.display_name}]  score={candidate.score:.0f}")
     if debug:
         for rule, pts in candidate.score_breakdown:
             lines.append(f"       +{pts:.0f}  {rule}")
-    lines.append(f"       {_t('files', lang)}: {len(candidate.files)}")
+    lines.append(f"       {files_label}: {len(candidate.files)}")
     for bf in candidate.files:
         lines.append(f"         {bf.kind:8s}  {bf.path}  ({bf.source})")
     lines.append("")
@@ -783,7 +1053,7 @@ def format_plan_json(
                 {
                     "kind": bf.kind,
                     "path": bf.path,
-                    "abs_path": str(snapshot_path / bf.path),
+                    "abs_path": _abs_path(bf, snapshot_path),
                     "reason": bf.source,
                 }
                 for bf in top.files
@@ -809,6 +1079,20 @@ def format_plan_json(
     }
 
 
+def _dumps_indented(data: dict) -> str:
+    """Serialize like ``json.dumps(data, indent=2, ensure_ascii=False)``.
+
+    Uses orjson when installed; its indented UTF-8 output is identical for
+    the str/int/None/list/dict values format_plan_json produces.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode("utf-8")
+        except TypeError:
+            pass  # e.g. lone surrogates in a path; stdlib json copes
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
 def format_cursor_prompt(
     intent: PlanIntent,
     candidates: list[BundleCandidate],
@@ -816,27 +1100,26 @@ def format_cursor_prompt(
     lang: str = "en",
 ) -> str:
     """Build a ready-to-paste Markdown prompt for Cursor IDE."""
-    import json as _json
-
+    tr = _translator(lang)
     data = format_plan_json(intent, candidates, snapshot_path)
-    json_block = _json.dumps(data, indent=2, ensure_ascii=False)
+    json_block = _dumps_indented(data)
 
     sections = [
-        f"# {_t('cursor_title', lang)}",
+        f"# {tr('cursor_title')}",
         "",
-        _t("cursor_intro", lang),
+        tr("cursor_intro"),
         "",
-        f"## {_t('cursor_instructions', lang)}",
+        f"## {tr('cursor_instructions')}",
         "",
-        f"1. {_t('cursor_step_1', lang)}",
-        f"2. {_t('cursor_step_2', lang)}",
-        f"3. {_t('cursor_step_3', lang)}",
-        f"4. {_t('cursor_step_4', lang)}",
-        f"5. {_t('cursor_step_5', lang)}",
-        f"6. {_t('cursor_step_6', lang)}",
-        f"7. {_t('cursor_step_7', lang)}",
+        f"1. {tr('cursor_step_1')}",
+        f"2. {tr('cursor_step_2')}",
+        f"3. {tr('cursor_step_3')}",
+        f"4. {tr('cursor_step_4')}",
+        f"5. {tr('cursor_step_5')}",
+        f"6. {tr('cursor_step_6')}",
+        f"7. {tr('cursor_step_7')}",
         "",
-        f"## {_t('cursor_data', lang)}",
+        f"## {tr('cursor_data')}",
         "",
         "```json",
         json_block,
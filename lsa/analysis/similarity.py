@@ -1,11 +1,24 @@
 """Case similarity scoring for LSA."""
 
+import heapq
 import json
 import sqlite3
 from dataclasses import dataclass
 
 from ..config import SIMILARITY_THRESHOLD
 
+try:  # optional accelerator; its errors subclass json.JSONDecodeError
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+# case_cards columns needed for scoring and building results
+_CASE_COLUMNS = (
+    "id, title, source_path, signals_json, related_files_json, "
+    "verify_commands_json, root_cause, fix_summary"
+)
+
 
 @dataclass
 class SimilarCase:
@@ -44,22 +57,41 @@ def find_similar_cases(
     if not signals:
         return []
 
-    signal_set = set(s.lower() for s in signals)
-    file_set = set(f.lower() for f in (related_files or []))
+    return find_similar_cases_prepared(
+        conn,
+        frozenset(s.lower() for s in signals),
+        frozenset(f.lower() for f in (related_files or [])),
+        limit=limit,
+        threshold=threshold,
+    )
+
 
-    similar = []
+def find_similar_cases_prepared(
+    conn: sqlite3.Connection,
+    signal_set: frozenset[str],
+    file_set: frozenset[str] = frozenset(),
+    limit: int = 3,
+    threshold: float = SIMILARITY_THRESHOLD,
+) -> list[SimilarCase]:
+    """
+    Find similar cases from already-normalized inputs.
 
-    # Query all case_cards
-    rows = conn.execute(
-        "SELECT * FROM case_cards WHERE signals_json IS NOT NULL"
-    ).fetchall()
+    Same as find_similar_cases, but signals and related files are passed as
+    lowercased frozensets, so callers looping over many logs can normalize
+    once.
+    """
+    if not signal_set:
+        return []
 
-    for row in rows:
-        card = dict(row)
+    # Min-heap of the best `limit` matches as (score, -seq, row, overlap);
+    # -seq makes later rows lose ties, like a stable sort on score would.
+    best: list[tuple[float, int, sqlite3.Row, set[str]]] = []
+    bounded = limit > 0
 
+    for seq, row in enumerate(_candidate_case_rows(conn, signal_set)):
         # Parse signals from case_card
         try:
-            card_signals = json.loads(card["signals_json"] or "[]")
+            card_signals = _json_loads(row["signals_json"] or "[]")
         except json.JSONDecodeError:
             continue
 
@@ -70,13 +102,13 @@ def find_similar_cases(
         if not signal_overlap:
             continue
 
-        # Base score from signal overlap
-        score = len(signal_overlap) / max(len(signal_set), len(card_signal_set))
+        # Base score: Jaccard similarity of the two signal sets
+        score = len(signal_overlap) / len(signal_set | card_signal_set)
 
         # Boost for file overlap
         if file_set:
             try:
-                card_files = json.loads(card["related_files_json"] or "[]")
+                card_files = _json_loads(row["related_files_json"] or "[]")
                 card_file_set = set(f.lower() for f in card_files)
                 file_overlap = file_set & card_file_set
                 if file_overlap:
@@ -87,48 +119,101 @@ def find_similar_cases(
         if score < threshold:
             continue
 
-        # Parse verify commands
+        entry = (score, -seq, row, signal_overlap)
+        if not bounded or len(best) < limit:
+            heapq.heappush(best, entry)
+        elif entry[:2] > best[0][:2]:
+            heapq.heapreplace(best, entry)
+
+        # Scores cap at 1.0 and ties favour earlier rows: nothing later can enter
+        if bounded and len(best) == limit and best[0][0] >= 1.0:
+            break
+
+    ranked = sorted(best, key=lambda e: (-e[0], -e[1]))
+    if not bounded:
+        ranked = ranked[:limit]
+
+    # Verify commands and sibling lookups only for the cases returned
+    return [
+        _build_similar_case(conn, row, score, signal_overlap)
+        for score, _, row, signal_overlap in ranked
+    ]
+
+
+def _build_similar_case(
+    conn: sqlite3.Connection,
+    row: sqlite3.Row,
+    score: float,
+    signal_overlap: set[str],
+) -> SimilarCase:
+    """Build a SimilarCase, borrowing content from a sibling chunk if empty."""
+    # Parse verify commands
+    try:
+        verify_commands = _json_loads(row["verify_commands_json"] or "[]")
+    except json.JSONDecodeError:
+        verify_commands = []
+
+    root_cause = row["root_cause"]
+    fix_summary = row["fix_summary"]
+
+    # If this chunk has no content, look for a sibling chunk from the same source file
+    if not root_cause and not fix_summary and row["source_path"]:
+        sibling = conn.execute(
+            """SELECT root_cause, fix_summary, verify_commands_json
+               FROM case_cards
+               WHERE source_path = ?
+                 AND (root_cause IS NOT NULL OR fix_summary IS NOT NULL)
+               LIMIT 1""",
+            (row["source_path"],),
+        ).fetchone()
+        if sibling:
+            sibling = dict(sibling)
+            root_cause = sibling.get("root_cause")
+            fix_summary = sibling.get("fix_summary")
+            try:
+                verify_commands = _json_loads(sibling.get("verify_commands_json") or "[]")
+            except json.JSONDecodeError:
+                pass
+
+    return SimilarCase(
+        case_id=row["id"],
+        title=row["title"],
+        match_score=score,
+        matching_signals=list(signal_overlap),
+        root_cause=root_cause,
+        fix_summary=fix_summary,
+        verify_commands=verify_commands[:3],
+        source_path=row["source_path"],
+    )
+
+
+def _candidate_case_rows(
+    conn: sqlite3.Connection,
+    signal_set: frozenset[str],
+) -> sqlite3.Cursor:
+    """
+    Stream case_cards rows that can share at least one signal, in id order.
+
+    Uses the case_signals index when present. Falls back to every card with
+    signals when the index is missing, or when a signal is non-ASCII (SQLite's
+    lower() only folds ASCII, so the index could miss it).
+    """
+    if all(s.isascii() for s in signal_set):
+        placeholders = ",".join("?" for _ in signal_set)
         try:
-            verify_commands = json.loads(card["verify_commands_json"] or "[]")
-        except json.JSONDecodeError:
-            verify_commands = []
-
-        root_cause = card["root_cause"]
-        fix_summary = card["fix_summary"]
-
-        # If this chunk has no content, look for a sibling chunk from the same source file
-        if not root_cause and not fix_summary and card.get("source_path"):
-            sibling = conn.execute(
-                """SELECT root_cause, fix_summary, verify_commands_json
-                   FROM case_cards
-                   WHERE source_path = ?
-                     AND (root_cause IS NOT NULL OR fix_summary IS NOT NULL)
-                   LIMIT 1""",
-                (card["source_path"],),
-            ).fetchone()
-            if sibling:
-                sibling = dict(sibling)
-                root_cause = sibling.get("root_cause")
-                fix_summary = sibling.get("fix_summary")
-                try:
-                    verify_commands = json.loads(sibling.get("verify_commands_json") or "[]")
-                except json.JSONDecodeError:
-                    pass
-
-        similar.append(SimilarCase(
-            case_id=card["id"],
-            title=card["title"],
-            match_score=score,
-            matching_signals=list(signal_overlap),
-            root_cause=root_cause,
-            fix_summary=fix_summary,
-            verify_commands=verify_commands[:3],
-            source_path=card.get("source_path"),
-        ))
-
-    # Sort by score and return top N
-    similar.sort(key=lambda c: -c.match_score)
-    return similar[:limit]
+            return conn.execute(
+                f"""SELECT {_CASE_COLUMNS} FROM case_cards
+                    WHERE signals_json IS NOT NULL
+                      AND id IN (SELECT case_id FROM case_signals WHERE signal IN ({placeholders}))
+                    ORDER BY id""",
+                list(signal_set),
+            )
+        except sqlite3.OperationalError:
+            pass  # No case_signals table (older database)
+
+    return conn.execute(
+        f"SELECT {_CASE_COLUMNS} FROM case_cards WHERE signals_json IS NOT NULL ORDER BY id"
+    )
 
 
 def compute_signal_similarity(signals1: list[str], signals2: list[str]) -> float:
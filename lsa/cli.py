@@ -1,10 +1,16 @@
 """CLI entry point for LSA."""
 
 import json
+import multiprocessing
+import os
+import re
 import sqlite3
 import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
 import typer
 from rich.console import Console
@@ -15,6 +21,12 @@ from .config import (
     DEFAULT_SCAN_DIRS,
     HISTORIES_DIR,
     MAX_TEXT_SIZE,
+    IMPORT_BATCH_SIZE,
+    SCAN_BATCH_SIZE,
+    SCAN_PROCS_PARALLEL_MIN,
+    SCAN_READ_AHEAD,
+    SCAN_SKIP_DIR_NAMES,
+    SEARCH_CONTENT_MIN_LEN,
     get_db_path,
     load_user_config,
 )
@@ -22,21 +34,24 @@ from .db import (
     init_db,
     get_connection,
     insert_message_code,
+    insert_message_codes,
     count_message_codes,
     get_message_codes_batch,
 )
 from .db.connection import (
-    insert_artifact,
-    insert_proc,
+    deferred_fts,
+    insert_artifacts,
+    insert_procs,
     insert_case_card,
     upsert_case_card,
+    upsert_case_cards,
     upsert_incident,
     get_incidents,
     count_incidents,
     count_case_cards,
 )
-from .utils.hasher import compute_sha256, should_store_content, try_read_text
-from .parsers import parse_procs_file, parse_log_file
+from .utils.hasher import read_text_and_sha256, should_store_content
+from .parsers import ProcsData, parse_procs_file_safe, parse_log_file
 from .parsers.history_parser import parse_history_directory, parse_history_files
 from .graph import build_graph_from_procs, match_log_to_node, get_node_neighbors
 from .graph.matching import get_related_files, format_debug_candidates, MatchCandidate
@@ -46,6 +61,11 @@ from .analysis.hypotheses import get_default_hypotheses
 from .analysis.planner import generate_plan, format_plan_output, format_plan_json, format_cursor_prompt
 from .output import generate_context_pack
 
+try:  # optional accelerator for the incident payloads written by explain
+    import orjson
+except ImportError:
+    orjson = None
+
 app = typer.Typer(
     name="lsa",
     help="Legacy Script Archaeologist - analyze legacy script snapshots",
@@ -53,6 +73,20 @@ app = typer.Typer(
 )
 console = Console()
 
+# Compact UTF-8 JSON for values persisted to the database
+_json_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+# Same compact layout as orjson, so stored incident payloads look alike with
+# or without it (only exponent floats such as 1e-07 are spelled differently)
+_json_encode_tight = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def _incident_json(data: list[dict]) -> str:
+    """Serialize an incident payload (hypotheses, similar cases) for storage."""
+    if orjson is not None:
+        return orjson.dumps(data).decode("utf-8")
+    return _json_encode_tight(data)
+
 
 def version_callback(value: bool):
     if value:
@@ -71,6 +105,124 @@ def main(
     pass
 
 
+# Artifact kind by file suffix; other files take the name of their scan dir
+_SUFFIX_KIND = {
+    ".procs": "procs",
+    ".sh": "script",
+    ".pl": "script",
+    ".py": "script",
+    ".control": "control",
+    ".ins": "insert",
+    ".dfa": "docdef",
+    ".DFA": "docdef",
+}
+
+
+def _name_suffix(name: str) -> str:
+    """Return the suffix of a file name, exactly as ``Path(name).suffix``."""
+    i = name.rfind(".")
+    return name[i:] if 0 < i < len(name) - 1 else ""
+
+
+def _scandir_recursive(
+    root: Path, skip_dirs: frozenset[str] = frozenset(),
+) -> Iterator[os.DirEntry]:
+    """Yield non-directory entries under root, in the same order as rglob("*").
+
+    Each directory's entries come before its subdirectories are walked;
+    symlinked directories are not followed and unreadable ones (or a root
+    that is not a directory) are skipped, as are subdirectories named in
+    skip_dirs. DirEntry caches the type from readdir, so callers avoid
+    extra stat calls.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in skip_dirs:
+                    subdirs.append(entry.path)
+            else:
+                yield entry
+        stack.extend(reversed(subdirs))
+
+
+def _list_scan_files(root: Path) -> list[os.DirEntry]:
+    """List the regular files (or symlinks to them) under root, in rglob order,
+    without descending into SCAN_SKIP_DIR_NAMES directories.
+    """
+    return [
+        entry for entry in _scandir_recursive(root, SCAN_SKIP_DIR_NAMES)
+        if entry.is_file()
+    ]
+
+
+def _read_scan_entry(entry: os.DirEntry) -> tuple[os.stat_result, str | None, str | None]:
+    """Stat a file and, if its content is stored, read and hash it.
+
+    Returns ``(stat, sha256, text_content)``; runs in scan's thread pool.
+    """
+    stat = entry.stat()
+    if stat.st_size > MAX_TEXT_SIZE:
+        return stat, None, None  # never stored, so never read or hashed
+    file_path = Path(entry.path)
+    sha256 = None
+    text_content = None
+    if should_store_content(file_path, stat.st_size):
+        content = read_text_and_sha256(file_path)
+        if content is not None:
+            text_content, sha256 = content
+    return stat, sha256, text_content
+
+
+def _read_ahead(
+    pool: ThreadPoolExecutor,
+    fn: Callable,
+    items: Iterable,
+) -> Iterator[tuple[object, Future]]:
+    """Yield ``(item, future)`` pairs in input order, keeping a bounded
+    number of ``fn(item)`` calls in flight on the pool.
+    """
+    pending: deque[tuple[object, Future]] = deque()
+    for item in items:
+        pending.append((item, pool.submit(fn, item)))
+        if len(pending) >= SCAN_READ_AHEAD:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
+
+
+def _parse_procs_files(paths: list[Path]) -> Iterable[tuple[ProcsData | None, str | None]]:
+    """Parse .procs files in order, fanning out to worker processes when
+    there are enough of them to pay for the start-up.
+    """
+    workers = os.cpu_count() or 1
+    if len(paths) < SCAN_PROCS_PARALLEL_MIN or workers < 2:
+        return map(parse_procs_file_safe, paths)
+    # spawn: scan's own thread pools make forking unsafe
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        chunksize = max(1, len(paths) // (workers * 4))
+        return list(pool.map(parse_procs_file_safe, paths, chunksize=chunksize))
+
+
+def _flush_scan_rows(
+    conn: sqlite3.Connection,
+    artifact_rows: list[tuple],
+    proc_rows: list[tuple],
+) -> None:
+    """Write buffered scan rows with executemany and clear the buffers."""
+    insert_artifacts(conn, artifact_rows, commit=False)
+    insert_procs(conn, proc_rows, commit=False)
+    artifact_rows.clear()
+    proc_rows.clear()
+
+
 @app.command()
 def scan(
     snapshot: Path = typer.Argument(..., help="Path to snapshot directory"),
@@ -110,91 +262,92 @@ def scan(
     }
 
     procs_list = []
+    # .procs files as (file_path, relative_path, sha256), parsed after the walk
+    procs_files: list[tuple[Path, str, str | None]] = []
+    # Rows buffered for batched inserts; all of them land in one transaction
+    artifact_rows: list[tuple] = []
+    proc_rows: list[tuple] = []
+
+    with (
+        get_connection(db_path) as conn,
+        ThreadPoolExecutor() as pool,
+        ThreadPoolExecutor(max_workers=len(scan_dirs)) as walk_pool,
+    ):
+        # Walk all directory trees concurrently; listings are consumed in
+        # scan_dirs order below so artifacts keep a stable insertion order
+        listings = {
+            subdir: walk_pool.submit(_list_scan_files, snapshot / subdir)
+            for subdir in scan_dirs
+            if (snapshot / subdir).exists()
+        }
 
-    with get_connection(db_path) as conn:
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             console=console,
         ) as progress:
-            # Scan each directory
-            for subdir in scan_dirs:
-                dir_path = snapshot / subdir
-                if not dir_path.exists():
-                    if verbose:
-                        console.print(f"[yellow]Skipping (not found):[/yellow] {subdir}/")
-                    continue
-
-                task = progress.add_task(f"Scanning {subdir}/...", total=None)
-
-                for file_path in dir_path.rglob("*"):
-                    if not file_path.is_file():
+            # Index new artifacts and procs for search in one pass after the inserts
+            with deferred_fts(conn):
+                # Scan each directory
+                for subdir in scan_dirs:
+                    listing = listings.get(subdir)
+                    if listing is None:
+                        if verbose:
+                            console.print(f"[yellow]Skipping (not found):[/yellow] {subdir}/")
                         continue
 
-                    stats["files_scanned"] += 1
+                    task = progress.add_task(f"Scanning {subdir}/...", total=None)
 
-                    try:
-                        relative_path = str(file_path.relative_to(snapshot))
-                        stat = file_path.stat()
-
-                        # Determine kind
-                        kind = subdir
-                        if file_path.suffix == ".procs":
-                            kind = "procs"
-                        elif file_path.suffix in (".sh", ".pl", ".py"):
-                            kind = "script"
-                        elif file_path.suffix == ".control":
-                            kind = "control"
-                        elif file_path.suffix == ".ins":
-                            kind = "insert"
-                        elif file_path.suffix in (".dfa", ".DFA"):
-                            kind = "docdef"
-
-                        # Determine if we should store content
-                        sha256 = None
-                        text_content = None
-
-                        if should_store_content(file_path, stat.st_size):
-                            text_content = try_read_text(file_path)
+                    for entry, content in _read_ahead(pool, _read_scan_entry, listing.result()):
+                        stats["files_scanned"] += 1
+                        file_path = Path(entry.path)
+
+                        try:
+                            relative_path = os.path.relpath(entry.path, snapshot)
+                            stat, sha256, text_content = content.result()
                             if text_content is not None:
-                                sha256 = compute_sha256(file_path)
                                 stats["files_with_content"] += 1
 
-                        # Insert artifact
-                        insert_artifact(
-                            conn,
-                            kind=kind,
-                            path=relative_path,
-                            mtime=stat.st_mtime,
-                            size=stat.st_size,
-                            sha256=sha256,
-                            text_content=text_content,
-                            commit=False,
-                        )
-
-                        # Parse .procs files
-                        if file_path.suffix == ".procs":
-                            procs_data = parse_procs_file(file_path)
-                            proc_name = file_path.stem.lower()
-
-                            insert_proc(
-                                conn,
-                                proc_name=proc_name,
-                                path=relative_path,
-                                parsed_json=procs_data.to_json(),
-                                sha256=sha256,
-                                commit=False,
-                            )
-                            procs_list.append((proc_name, procs_data))
-                            stats["procs_parsed"] += 1
-
-                    except Exception as e:
-                        stats["errors"] += 1
-                        if verbose:
-                            console.print(f"[red]Error processing {file_path}:[/red] {e}")
-
-                progress.remove_task(task)
-
+                            # Determine kind
+                            suffix = _name_suffix(entry.name)
+                            kind = _SUFFIX_KIND.get(suffix, subdir)
+
+                            # Queue artifact (columns as in insert_artifact)
+                            artifact_rows.append((
+                                kind, relative_path, None, sha256,
+                                stat.st_mtime, stat.st_size, text_content,
+                            ))
+
+                            if suffix == ".procs":
+                                procs_files.append((file_path, relative_path, sha256))
+
+                        except Exception as e:
+                            stats["errors"] += 1
+                            if verbose:
+                                console.print(f"[red]Error processing {file_path}:[/red] {e}")
+
+                        if len(artifact_rows) >= SCAN_BATCH_SIZE:
+                            _flush_scan_rows(conn, artifact_rows, proc_rows)
+
+                    progress.remove_task(task)
+
+                # Parse .procs files
+                if procs_files:
+                    task = progress.add_task("Parsing procs...", total=None)
+                    parsed = _parse_procs_files([file_path for file_path, _, _ in procs_files])
+                    for (file_path, relative_path, sha256), (procs_data, error) in zip(procs_files, parsed):
+                        if procs_data is None:
+                            stats["errors"] += 1
+                            if verbose:
+                                console.print(f"[red]Error processing {file_path}:[/red] {error}")
+                            continue
+                        proc_name = file_path.stem.lower()
+                        proc_rows.append((proc_name, relative_path, procs_data.to_json(), sha256))
+                        procs_list.append((proc_name, procs_data))
+                        stats["procs_parsed"] += 1
+                    progress.remove_task(task)
+
+                _flush_scan_rows(conn, artifact_rows, proc_rows)
             conn.commit()
 
             # Build graph from parsed procs
@@ -315,15 +468,15 @@ def explain(
         # Persist to incidents table (unless --no-persist)
         if not no_persist:
             # Serialize data for storage
-            hypotheses_json = json.dumps([
+            hypotheses_json = _incident_json([
                 {"hypothesis": h.hypothesis, "confidence": h.confidence, "line_number": h.line_number}
                 for h in hypotheses[:5]
-            ], ensure_ascii=False)
+            ])
 
-            similar_cases_json = json.dumps([
+            similar_cases_json = _incident_json([
                 {"case_id": c.case_id, "title": c.title, "match_score": c.match_score}
                 for c in similar_cases
-            ], ensure_ascii=False) if similar_cases else None
+            ]) if similar_cases else None
 
             upsert_incident(
                 conn,
@@ -364,11 +517,13 @@ def explain(
         print(context_pack)
 
 
+# FTS5 operators: AND, OR, NOT, *, ^, NEAR, "phrase"
+_FTS_OPERATOR_RE = re.compile(r' AND | OR | NOT |\*|\^|NEAR|"')
+
+
 def _has_fts_operators(query: str) -> bool:
     """Check if query contains FTS5 operators."""
-    # FTS5 operators: AND, OR, NOT, *, ^, NEAR, "phrase"
-    fts_patterns = [' AND ', ' OR ', ' NOT ', '*', '^', 'NEAR', '"']
-    return any(op in query for op in fts_patterns)
+    return _FTS_OPERATOR_RE.search(query) is not None
 
 
 def _search_fts(conn, query: str, limit: int) -> list:
@@ -393,30 +548,136 @@ def _search_like(conn, pattern: str, limit: int) -> list:
     """Execute LIKE search on paths and content."""
     return conn.execute(
         """
-        SELECT path, kind, substr(text_content, 1, 100) as snippet
-        FROM artifacts
-        WHERE path LIKE ? OR text_content LIKE ?
+        SELECT a.path, a.kind, substr(c.text_content, 1, 100) as snippet
+        FROM artifacts a
+        LEFT JOIN artifact_contents c ON c.artifact_id = a.id
+        WHERE a.path LIKE ? OR c.text_content LIKE ?
         ORDER BY
-            CASE WHEN path LIKE ? THEN 0 ELSE 1 END,
-            path
+            CASE WHEN a.path LIKE ? THEN 0 ELSE 1 END,
+            a.path
         LIMIT ?
         """,
         (f"%{pattern}%", f"%{pattern}%", f"%{pattern}%", limit),
     ).fetchall()
 
 
+# Path substring filters, bound to :like. The trigram index agrees with
+# LIKE only for ASCII patterns (LIKE folds ASCII case only) and needs three
+# characters to narrow anything down, so other patterns scan the table.
+_PATH_LIKE_SCAN = "path LIKE :like"
+_PATH_LIKE_TRIGRAM = "id IN (SELECT rowid FROM artifacts_path_fts WHERE path LIKE :like)"
+
+
+def _path_like_filter(pattern: str) -> str:
+    """Return the SQL filter for a path substring search on ``pattern``."""
+    if len(pattern) >= 3 and pattern.isascii():
+        return _PATH_LIKE_TRIGRAM
+    return _PATH_LIKE_SCAN
+
+
+_SEARCH_PATH_SQL = """
+SELECT path, kind,
+    substr((SELECT text_content FROM artifact_contents WHERE artifact_id = artifacts.id), 1, 100) as snippet
+FROM artifacts
+WHERE {path_filter}
+ORDER BY path
+LIMIT :limit
+"""
+
+
 def _search_path_only(conn, pattern: str, limit: int) -> list:
     """Search only in file paths (for prefix/substring matching)."""
-    return conn.execute(
-        """
-        SELECT path, kind, substr(text_content, 1, 100) as snippet
-        FROM artifacts
-        WHERE path LIKE ?
-        ORDER BY path
-        LIMIT ?
-        """,
-        (f"%{pattern}%", limit),
-    ).fetchall()
+    params = {"like": f"%{pattern}%", "limit": limit}
+    path_filter = _path_like_filter(pattern)
+    try:
+        return conn.execute(
+            _SEARCH_PATH_SQL.format(path_filter=path_filter), params,
+        ).fetchall()
+    except sqlite3.OperationalError:
+        if path_filter == _PATH_LIKE_SCAN:
+            raise
+        # No artifacts_path_fts table (older database or SQLite)
+        return conn.execute(
+            _SEARCH_PATH_SQL.format(path_filter=_PATH_LIKE_SCAN), params,
+        ).fetchall()
+
+
+# The smart-expansion cascade as one statement. UNION ALL runs its arms in
+# order and only as far as rows are fetched, so the caller stops reading at
+# the first arm that returns rows and later strategies never execute.
+# :scan_content is constant, so SQLite tests it once before the LIKE scan.
+_SEARCH_CASCADE_SQL = """
+SELECT * FROM (
+    SELECT 0 AS prio, path, kind,
+        substr((SELECT text_content FROM artifact_contents WHERE artifact_id = artifacts.id), 1, 100) AS snippet
+    FROM artifacts
+    WHERE {path_filter}
+    ORDER BY path
+    LIMIT :limit
+)
+UNION ALL
+SELECT * FROM (
+    SELECT 1, a.path, a.kind, snippet(artifacts_fts, 1, '>>>', '<<<', '...', 30)
+    FROM artifacts_fts
+    JOIN artifacts a ON artifacts_fts.rowid = a.id
+    WHERE artifacts_fts MATCH :exact
+    LIMIT :limit
+)
+UNION ALL
+SELECT * FROM (
+    SELECT 2, a.path, a.kind, snippet(artifacts_fts, 1, '>>>', '<<<', '...', 30)
+    FROM artifacts_fts
+    JOIN artifacts a ON artifacts_fts.rowid = a.id
+    WHERE artifacts_fts MATCH :prefix
+    LIMIT :limit
+)
+UNION ALL
+SELECT * FROM (
+    SELECT 3, a.path, a.kind, substr(c.text_content, 1, 100)
+    FROM artifacts a
+    LEFT JOIN artifact_contents c ON c.artifact_id = a.id
+    WHERE :scan_content AND (a.path LIKE :like OR c.text_content LIKE :like)
+    ORDER BY
+        CASE WHEN a.path LIKE :like THEN 0 ELSE 1 END,
+        a.path
+    LIMIT :limit
+)
+"""
+
+# search_method reported for each arm of _SEARCH_CASCADE_SQL
+_SEARCH_CASCADE_METHODS = ("path_substring", "fts_exact", "fts_prefix", "like_full")
+
+
+def _scans_content(query: str) -> bool:
+    """Whether search may fall back to a LIKE scan of file contents."""
+    return len(query.strip()) >= SEARCH_CONTENT_MIN_LEN
+
+
+def _search_cascade(conn, query: str, limit: int) -> tuple[list, str] | None:
+    """Run the smart-expansion cascade, returning (rows, search_method).
+
+    Returns None if the statement fails (e.g. the query is not valid FTS
+    syntax), so the caller can run the steps one by one with warnings.
+    """
+    params = {
+        "like": f"%{query}%",
+        "exact": f'"{query}"',
+        "prefix": f"{query}*",
+        "limit": limit,
+        "scan_content": _scans_content(query),
+    }
+    rows = []
+    try:
+        sql = _SEARCH_CASCADE_SQL.format(path_filter=_path_like_filter(query))
+        for row in conn.execute(sql, params):
+            if rows and row["prio"] != rows[0]["prio"]:
+                break
+            rows.append(row)
+    except sqlite3.OperationalError:
+        return None
+    if not rows:
+        return [], _SEARCH_CASCADE_METHODS[-1]
+    return rows, _SEARCH_CASCADE_METHODS[rows[0]["prio"]]
 
 
 @app.command()
@@ -432,7 +693,7 @@ def search(
     By default uses smart expansion:
     1. Try exact FTS match
     2. Try prefix match (append '*')
-    3. Fall back to substring LIKE search
+    3. Fall back to substring LIKE search (queries of 3+ characters)
 
     Use --raw-fts to disable expansion and run query as-is.
 
@@ -456,8 +717,10 @@ def search(
             # Raw FTS mode - use query as-is
             rows = _search_fts(conn, query, limit)
             search_method = "fts_raw"
+        elif (cascade := _search_cascade(conn, query, limit)) is not None:
+            rows, search_method = cascade
         else:
-            # Smart expansion mode - prioritize path matches
+            # Smart expansion mode, step by step - prioritize path matches
             # Step 1: Try path substring match first (most intuitive for users)
             rows = _search_path_only(conn, query, limit)
             search_method = "path_substring"
@@ -473,7 +736,7 @@ def search(
                 search_method = "fts_prefix"
 
             # Step 4: Fall back to full LIKE search (paths + content)
-            if not rows:
+            if not rows and _scans_content(query):
                 rows = _search_like(conn, query, limit)
                 search_method = "like_full"
 
@@ -492,9 +755,9 @@ def search(
         console.print()
 
 
-def _get_histories_search_paths(snapshot: Path) -> list[Path]:
+def _get_histories_search_paths(snapshot: Path) -> Iterator[Path]:
     """
-    Get list of paths to search for histories directory.
+    Yield paths to search for histories directory, in order.
 
     Order:
     1. <snapshot>/histories/
@@ -502,13 +765,11 @@ def _get_histories_search_paths(snapshot: Path) -> list[Path]:
     3. <snapshot_parent>/histories/
     4. <snapshot_parent>/refs/histories/
     """
+    yield snapshot / HISTORIES_DIR
+    yield snapshot / "refs" / HISTORIES_DIR
     snapshot_parent = snapshot.parent
-    return [
-        snapshot / HISTORIES_DIR,
-        snapshot / "refs" / HISTORIES_DIR,
-        snapshot_parent / HISTORIES_DIR,
-        snapshot_parent / "refs" / HISTORIES_DIR,
-    ]
+    yield snapshot_parent / HISTORIES_DIR
+    yield snapshot_parent / "refs" / HISTORIES_DIR
 
 
 def _find_histories_path(snapshot: Path, explicit_path: Path | None) -> Path | None:
@@ -606,33 +867,38 @@ def import_histories(
         skipped = 0
         now = datetime.now().isoformat()
 
+        rows = []
         for card in cards:
+            json_fields = card.to_json_fields()
+            rows.append((
+                card.source_path, card.chunk_id, card.title, json_fields["signals_json"],
+                card.root_cause, card.fix_summary, json_fields["verify_commands_json"],
+                json_fields["related_files_json"], json_fields["tags_json"], now,
+                card.content_hash,
+            ))
+
+        for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+            batch = rows[start:start + IMPORT_BATCH_SIZE]
             try:
-                json_fields = card.to_json_fields()
-                card_id, was_inserted = upsert_case_card(
-                    conn,
-                    source_path=card.source_path,
-                    chunk_id=card.chunk_id,
-                    title=card.title,
-                    signals_json=json_fields["signals_json"],
-                    root_cause=card.root_cause,
-                    fix_summary=card.fix_summary,
-                    verify_commands_json=json_fields["verify_commands_json"],
-                    related_files_json=json_fields["related_files_json"],
-                    tags_json=json_fields["tags_json"],
-                    created_at=now,
-                    content_hash=card.content_hash,
-                )
-                if was_inserted:
-                    inserted += 1
-                elif card_id:
-                    # Check if actually updated (based on upsert_case_card logic)
-                    # If content_hash matched, it would have returned early
-                    updated += 1
-            except Exception as e:
-                skipped += 1
-                if verbose:
-                    console.print(f"[red]Error storing card:[/red] {e}")
+                batch_inserted = upsert_case_cards(conn, batch)
+            except sqlite3.Error:
+                # Drop the partial batch and retry row by row to isolate bad cards
+                conn.rollback()
+                for row in batch:
+                    try:
+                        _, was_inserted = upsert_case_card(conn, *row)
+                        if was_inserted:
+                            inserted += 1
+                        else:
+                            updated += 1
+                    except Exception as e:
+                        skipped += 1
+                        if verbose:
+                            console.print(f"[red]Error storing card:[/red] {e}")
+            else:
+                inserted += batch_inserted
+                # Existing cards count as updated even when their hash matched
+                updated += len(batch) - batch_inserted
 
         total_in_db = count_case_cards(conn)
 
@@ -671,12 +937,10 @@ def _find_pdf_path(snapshot: Path, pdf_option: Path | None) -> Path | None:
     if pdf_option:
         return pdf_option if pdf_option.exists() else None
 
-    # Try snapshot-local refs/papyrus/
-    snapshot_refs = snapshot / "refs" / "papyrus"
-    if snapshot_refs.exists():
-        pdfs = list(snapshot_refs.glob("*.pdf"))
-        if pdfs:
-            return pdfs[0]
+    # Try snapshot-local refs/papyrus/ (glob yields nothing if it is missing)
+    snapshot_pdf = next((snapshot / "refs" / "papyrus").glob("*.pdf"), None)
+    if snapshot_pdf:
+        return snapshot_pdf
 
     # Try user-configured path
     configured = _configured_pdf_path()
@@ -772,22 +1036,24 @@ def import_codes(
         ) as progress:
             task = progress.add_task(f"Storing {len(entries)} codes...", total=None)
 
-            for entry in entries:
+            rows = [
+                (entry.code, entry.severity, entry.title, entry.body, source_path_str, now)
+                for entry in entries
+            ]
+            for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+                batch = rows[start:start + IMPORT_BATCH_SIZE]
                 try:
-                    insert_message_code(
-                        conn,
-                        code=entry.code,
-                        severity=entry.severity,
-                        title=entry.title,
-                        body=entry.body,
-                        source_path=source_path_str,
-                        created_at=now,
-                        commit=False,
-                    )
-                    stored += 1
-                except Exception as e:
-                    if verbose:
-                        console.print(f"[red]Error storing {entry.code}:[/red] {e}")
+                    insert_message_codes(conn, batch, commit=False)
+                    stored += len(batch)
+                except sqlite3.Error:
+                    # Retry row by row so one bad entry keeps the rest of its batch
+                    for row in batch:
+                        try:
+                            insert_message_code(conn, *row, commit=False)
+                            stored += 1
+                        except Exception as e:
+                            if verbose:
+                                console.print(f"[red]Error storing {row[0]}:[/red] {e}")
 
             progress.remove_task(task)
 
@@ -840,25 +1106,28 @@ def stats(
         # Incidents count
         incidents_count = count_incidents(conn)
 
-    console.print(f"[bold]Snapshot Statistics: {snapshot}[/bold]")
-    console.print()
-    console.print("[cyan]Artifacts:[/cyan]")
-    for kind, count in sorted(artifact_counts.items()):
-        console.print(f"  {kind}: {count}")
-    console.print()
-    console.print("[cyan]Graph:[/cyan]")
-    console.print(f"  Nodes: {graph['total_nodes']}")
-    for node_type, count in sorted(graph["nodes_by_type"].items()):
-        console.print(f"    {node_type}: {count}")
-    console.print(f"  Edges: {graph['total_edges']}")
-    for edge_type, count in sorted(graph["edges_by_type"].items()):
-        console.print(f"    {edge_type}: {count}")
-    console.print()
-    console.print("[cyan]Other:[/cyan]")
-    console.print(f"  Procs parsed: {procs_count}")
-    console.print(f"  Case cards: {case_cards_count}")
-    console.print(f"  Incidents: {incidents_count}")
-    console.print(f"  Message codes (KB): {message_codes_count}")
+    # Render in one print call; per-call Rich overhead adds up on big snapshots
+    lines = [
+        f"[bold]Snapshot Statistics: {snapshot}[/bold]",
+        "",
+        "[cyan]Artifacts:[/cyan]",
+    ]
+    lines.extend(f"  {kind}: {count}" for kind, count in sorted(artifact_counts.items()))
+    lines.append("")
+    lines.append("[cyan]Graph:[/cyan]")
+    lines.append(f"  Nodes: {graph['total_nodes']}")
+    lines.extend(f"    {node_type}: {count}" for node_type, count in sorted(graph["nodes_by_type"].items()))
+    lines.append(f"  Edges: {graph['total_edges']}")
+    lines.extend(f"    {edge_type}: {count}" for edge_type, count in sorted(graph["edges_by_type"].items()))
+    lines.extend([
+        "",
+        "[cyan]Other:[/cyan]",
+        f"  Procs parsed: {procs_count}",
+        f"  Case cards: {case_cards_count}",
+        f"  Incidents: {incidents_count}",
+        f"  Message codes (KB): {message_codes_count}",
+    ])
+    console.print("\n".join(lines))
 
 
 @app.command()
@@ -887,8 +1156,7 @@ def incidents(
         console.print("Run 'lsa explain --log <logfile>' to analyze logs and create incidents.")
         return
 
-    console.print(f"[bold]Recent Incidents ({len(incident_list)} of {total}):[/bold]")
-    console.print()
+    lines = [f"[bold]Recent Incidents ({len(incident_list)} of {total}):[/bold]", ""]
 
     for inc in incident_list:
         log_name = Path(inc["log_path"]).name
@@ -901,10 +1169,12 @@ def incidents(
         if len(log_name) > 40:
             log_name = "..." + log_name[-37:]
 
-        console.print(f"[cyan]{log_name}[/cyan]")
-        console.print(f"  Node: {node_key} ({conf_str} confidence)")
-        console.print(f"  Analyzed: {timestamp}")
-        console.print()
+        lines.append(f"[cyan]{log_name}[/cyan]")
+        lines.append(f"  Node: {node_key} ({conf_str} confidence)")
+        lines.append(f"  Analyzed: {timestamp}")
+        lines.append("")
+
+    console.print("\n".join(lines))
 
 
 @app.command()
@@ -1,13 +1,35 @@
 """Configuration constants for LSA."""
 
+from functools import lru_cache
 from pathlib import Path
 
 # Maximum file size for storing text_content (1MB)
 MAX_TEXT_SIZE = 1024 * 1024
 
+# Rows buffered per executemany batch while scanning a snapshot
+SCAN_BATCH_SIZE = 5000
+
+# Procs buffered per node/edge executemany batch while building the graph
+GRAPH_BATCH_SIZE = 1000
+
+# Rows per executemany batch on imports; a failing batch is retried row by row
+IMPORT_BATCH_SIZE = 256
+
+# Files read and hashed ahead of the scan loop by its I/O thread pool
+SCAN_READ_AHEAD = 64
+
+# Minimum .procs count before scan parses them in a process pool; below it
+# worker start-up costs more than the parsing itself
+SCAN_PROCS_PARALLEL_MIN = 1000
+
 # Default directories to scan (excluding logs)
 DEFAULT_SCAN_DIRS = ["procs", "master", "control", "insert", "docdef"]
 
+# Directory names never descended into by scan (VCS metadata, tool caches)
+SCAN_SKIP_DIR_NAMES = frozenset({
+    ".git", ".svn", ".hg", "__pycache__", "node_modules", ".venv", "venv", ".tox",
+})
+
 # Directories for histories
 HISTORIES_DIR = "histories"
 
@@ -25,6 +47,10 @@ TEXT_EXTENSIONS = {
 # Extensions that are metadata-only (no text_content)
 METADATA_ONLY_EXTENSIONS = {".afp", ".pdf", ".zip", ".pgp", ".log"}
 
+# Shortest query (after stripping) for which search falls back to a LIKE
+# scan over text_content; shorter ones match too much to be worth the scan
+SEARCH_CONTENT_MIN_LEN = 3
+
 # Similarity threshold for case_cards matching
 SIMILARITY_THRESHOLD = 0.3
 
@@ -35,8 +61,9 @@ MAX_CONTEXT_PACK_LINES = 200
 MAX_EVIDENCE_SNIPPET = 120
 
 
+@lru_cache(maxsize=16)
 def get_db_path(snapshot_path: Path) -> Path:
-    """Get path to SQLite database for a snapshot."""
+    """Get path to SQLite database for a snapshot (memoized per snapshot)."""
     return snapshot_path / DB_DIR / DB_NAME
 
 
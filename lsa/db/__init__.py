@@ -3,30 +3,38 @@
 from .connection import (
     get_connection,
     init_db,
+    tune_connection,
     insert_message_code,
+    insert_message_codes,
     get_message_code,
     get_message_codes_batch,
     count_message_codes,
     insert_case_card,
     upsert_case_card,
+    upsert_case_cards,
     upsert_incident,
     get_incidents,
     get_incident_by_log_path,
     count_incidents,
     count_case_cards,
 )
+from .pool import ConnectionPool
 from .schema import SCHEMA
 
 __all__ = [
     "get_connection",
     "init_db",
+    "tune_connection",
+    "ConnectionPool",
     "SCHEMA",
     "insert_message_code",
+    "insert_message_codes",
     "get_message_code",
     "get_message_codes_batch",
     "count_message_codes",
     "insert_case_card",
     "upsert_case_card",
+    "upsert_case_cards",
     "upsert_incident",
     "get_incidents",
     "get_incident_by_log_path",
@@ -1,29 +1,234 @@
 """Database connection management for LSA."""
 
+import json
+import re
 import sqlite3
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Generator
+from typing import Generator, Iterator
+
+from .schema import (
+    ARTIFACTS_PATH_FTS_SCHEMA,
+    CASE_SIGNALS_BACKFILL,
+    CASE_SIGNALS_SCHEMA,
+    PROCS_FTS_SCHEMA,
+    SCHEMA,
+    SCHEMA_VERSION,
+)
+
+try:  # optional accelerator for evidence_json without JSON1
+    import orjson
+except ImportError:
+    orjson = None
+
+# Prepared statements kept per connection; callers pass constant SQL strings
+# so repeated queries skip re-parsing.
+STATEMENT_CACHE_SIZE = 512
+
+# Read-heavy tuning applied once per connection (see tune_connection)
+TUNING_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",  # 64 MiB
+    "PRAGMA mmap_size = 268435456",  # 256 MiB
+    "PRAGMA busy_timeout = 5000",  # ms; same as sqlite3.connect's default timeout
+)
+
+# Largest IN-list chunk bound by _in_chunks: a power of two under the 999
+# host parameters per statement that SQLite builds before 3.32 allow
+IN_CHUNK_SIZE = 512
+
+# Shortest DFA code indexed in docdef_codes (CID prefix + two characters)
+DOCDEF_CODE_MIN_LEN = 6
+
+# Alphanumeric runs of an uppercased path; a DFA code never spans other characters
+_PATH_RUN_RE = re.compile(r"[A-Z0-9]+")
+
+
+def _in_chunks(values: list) -> Iterator[tuple[str, list]]:
+    """Split values for ``IN (...)`` queries into ``(placeholders, params)``.
+
+    Each chunk is padded to a power-of-two length by repeating its last
+    value, so at most a dozen distinct statements are ever compiled and
+    repeat calls are served from the connection's statement cache.
+    """
+    for start in range(0, len(values), IN_CHUNK_SIZE):
+        chunk = values[start:start + IN_CHUNK_SIZE]
+        size = 1 << (len(chunk) - 1).bit_length()
+        chunk += chunk[-1:] * (size - len(chunk))
+        yield ",".join("?" * size), chunk
+
 
-from .schema import SCHEMA
+def _scalar(conn: sqlite3.Connection, sql: str, params: tuple = ()):
+    """Return the first column of the first row (None if there is none).
+
+    Reads through a cursor without the connection's row factory, so scalar
+    lookups don't build a sqlite3.Row just to index it.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    row = cursor.execute(sql, params).fetchone()
+    return row[0] if row else None
 
 
 def init_db(db_path: Path) -> None:
     """Initialize database with schema."""
     db_path.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(db_path)
+    # Create the file in WAL mode and run the backfills with the tuned cache
+    for pragma in TUNING_PRAGMAS:
+        conn.execute(pragma)
+    had_docdef_codes = _has_table(conn, "docdef_codes")
+    # Recreated from SCHEMA so databases built with an older definition
+    # pick up the current one
+    conn.execute("DROP TRIGGER IF EXISTS artifacts_au")
+    # Duplicates of UNIQUE constraints' own indexes, created by older schemas
+    for index in ("idx_artifacts_path", "idx_nodes_key", "idx_incidents_log_path"):
+        conn.execute(f"DROP INDEX IF EXISTS {index}")
+    # Superseded by idx_nodes_type_key
+    conn.execute("DROP INDEX IF EXISTS idx_nodes_type")
+    rowid_message_codes = _set_aside_rowid_message_codes(conn)
+    inline_artifact_text = _set_aside_inline_artifact_text(conn)
     conn.executescript(SCHEMA)
+    if inline_artifact_text:
+        _move_inline_artifact_text(conn)
+    if rowid_message_codes:
+        conn.execute(
+            "INSERT INTO message_codes SELECT code, severity, title, body, source_path, created_at "
+            "FROM message_codes_rowid"
+        )
+        conn.execute("DROP TABLE message_codes_rowid")
+    if not had_docdef_codes:
+        for artifact_id, path in conn.execute(
+            "SELECT id, path FROM artifacts WHERE kind = 'docdef'"
+        ).fetchall():
+            _insert_docdef_codes(conn, artifact_id, path)
+    _init_optional_schema(
+        conn, "procs_fts", PROCS_FTS_SCHEMA,
+        "INSERT INTO procs_fts(procs_fts) VALUES ('rebuild')",
+    )
+    _init_optional_schema(
+        conn, "artifacts_path_fts", ARTIFACTS_PATH_FTS_SCHEMA,
+        "INSERT INTO artifacts_path_fts(artifacts_path_fts) VALUES ('rebuild')",
+    )
+    _init_optional_schema(
+        conn, "case_signals", CASE_SIGNALS_SCHEMA, CASE_SIGNALS_BACKFILL,
+    )
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     conn.commit()
     conn.close()
 
 
+def ensure_current_schema(conn: sqlite3.Connection, db_path: Path) -> None:
+    """Upgrade an LSA database built by an older version before it is read.
+
+    Only ``scan`` and the import commands run init_db, so without this a
+    database from an older release would fail in ``search`` or ``plan`` on
+    tables it does not have yet. The check is a header read; init_db runs
+    on its own connection, at most once per stale database. ``conn`` may
+    be read-only and must not have a transaction open.
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+    if _has_table(conn, "artifacts"):  # not an empty or foreign database
+        init_db(Path(db_path))
+
+
+def _init_optional_schema(
+    conn: sqlite3.Connection,
+    table: str,
+    ddl: str,
+    backfill_sql: str,
+) -> None:
+    """Create a derived index table, backfilling it for existing databases.
+
+    Silently skipped when the SQLite library lacks a required feature
+    (FTS5 trigram tokenizer, JSON1); readers then fall back to scanning.
+    """
+    existed = _has_table(conn, table)
+    try:
+        conn.executescript(ddl)
+    except sqlite3.OperationalError:
+        return
+    if not existed:
+        conn.execute(backfill_sql)
+
+
+def _set_aside_rowid_message_codes(conn: sqlite3.Connection) -> bool:
+    """Rename a message_codes table predating WITHOUT ROWID out of the way.
+
+    init_db then creates the current table and copies the rows across.
+    Returns True if there was such a table.
+    """
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'message_codes'"
+    ).fetchone()
+    if row is None or "WITHOUT ROWID" in row[0].upper():
+        return False
+    # Index names stay taken after a rename, so free them for the new table
+    conn.execute("DROP INDEX IF EXISTS idx_message_codes_code")
+    conn.execute("DROP INDEX IF EXISTS idx_message_codes_severity")
+    conn.execute("ALTER TABLE message_codes RENAME TO message_codes_rowid")
+    return True
+
+
+def _set_aside_inline_artifact_text(conn: sqlite3.Connection) -> bool:
+    """Drop the text index of a database that keeps text in artifacts rows.
+
+    Such databases predate artifact_contents; init_db recreates
+    artifacts_fts over the new table and then moves the text across (see
+    _move_inline_artifact_text). Returns True if there was inline text.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(artifacts)")]
+    if "text_content" not in columns or _has_table(conn, "artifact_contents"):
+        return False
+    for trigger in ("artifacts_ai", "artifacts_ad", "artifacts_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DROP TABLE IF EXISTS artifacts_fts")
+    return True
+
+
+def _move_inline_artifact_text(conn: sqlite3.Connection) -> None:
+    """Copy artifacts.text_content into artifact_contents and drop the column."""
+    # The artifact_contents_ai trigger indexes each row as it is copied
+    conn.execute(
+        "INSERT INTO artifact_contents (artifact_id, text_content) "
+        "SELECT id, text_content FROM artifacts WHERE text_content IS NOT NULL ORDER BY id"
+    )
+    try:
+        conn.execute("ALTER TABLE artifacts DROP COLUMN text_content")
+    except sqlite3.OperationalError:
+        # No DROP COLUMN before SQLite 3.35; at least free the copied text
+        conn.execute("UPDATE artifacts SET text_content = NULL")
+
+
+def _has_table(conn: sqlite3.Connection, table: str) -> bool:
+    """Return True if ``table`` exists in the database."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table,),
+    ).fetchone() is not None
+
+
+def tune_connection(conn: sqlite3.Connection) -> None:
+    """Apply WAL, page cache and mmap PRAGMAs to a newly opened connection.
+
+    The connection must be writable: switching to WAL writes the database
+    header. Read-only pool readers use the pool's own pragma list instead.
+    """
+    for pragma in TUNING_PRAGMAS:
+        conn.execute(pragma)
+
+
 @contextmanager
 def get_connection(db_path: Path) -> Generator[sqlite3.Connection, None, None]:
     """Get a database connection with row factory."""
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
+    ensure_current_schema(conn, db_path)
     conn.execute("PRAGMA foreign_keys = ON")
-    conn.execute("PRAGMA journal_mode = WAL")
+    tune_connection(conn)
     try:
         yield conn
         conn.commit()
@@ -31,9 +236,60 @@ def get_connection(db_path: Path) -> Generator[sqlite3.Connection, None, None]:
         conn.rollback()
         raise
     finally:
+        # Re-analyzes tables whose statistics this connection's queries found
+        # missing or stale; usually a no-op (see SQLite's PRAGMA optimize)
+        try:
+            conn.execute("PRAGMA optimize")
+        except sqlite3.OperationalError:
+            pass  # e.g. locked by another writer; statistics can wait
         conn.close()
 
 
+# Upserts keep the row (and its id) in place: a rescan of an unchanged file
+# writes nothing, and a changed one is updated, so the FTS update triggers
+# run instead of leaving the replaced row's index entries behind
+_INSERT_ARTIFACT_SQL = """
+INSERT INTO artifacts (kind, path, original_path, sha256, mtime, size)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (path) DO UPDATE SET
+    kind = excluded.kind,
+    original_path = excluded.original_path,
+    sha256 = excluded.sha256,
+    mtime = excluded.mtime,
+    size = excluded.size
+WHERE artifacts.kind IS NOT excluded.kind
+    OR artifacts.original_path IS NOT excluded.original_path
+    OR artifacts.sha256 IS NOT excluded.sha256
+    OR artifacts.mtime IS NOT excluded.mtime
+    OR artifacts.size IS NOT excluded.size
+"""
+
+# Text lives in artifact_contents, addressed by the artifact's path:
+# (text_content, path) to store it, (path,) to clear it
+_UPSERT_ARTIFACT_CONTENT_SQL = """
+INSERT INTO artifact_contents (artifact_id, text_content)
+SELECT id, ? FROM artifacts WHERE path = ?
+ON CONFLICT (artifact_id) DO UPDATE SET text_content = excluded.text_content
+WHERE artifact_contents.text_content IS NOT excluded.text_content
+"""
+
+_DELETE_ARTIFACT_CONTENT_SQL = """
+DELETE FROM artifact_contents WHERE artifact_id = (SELECT id FROM artifacts WHERE path = ?)
+"""
+
+_INSERT_PROC_SQL = """
+INSERT INTO procs (proc_name, path, parsed_json, sha256)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (proc_name) DO UPDATE SET
+    path = excluded.path,
+    parsed_json = excluded.parsed_json,
+    sha256 = excluded.sha256
+WHERE procs.path IS NOT excluded.path
+    OR procs.parsed_json IS NOT excluded.parsed_json
+    OR procs.sha256 IS NOT excluded.sha256
+"""
+
+
 def insert_artifact(
     conn: sqlite3.Connection,
     kind: str,
@@ -45,17 +301,135 @@ def insert_artifact(
     original_path: str | None = None,
     commit: bool = True,
 ) -> int:
-    """Insert an artifact and return its ID."""
-    cursor = conn.execute(
-        """
-        INSERT OR REPLACE INTO artifacts (kind, path, original_path, sha256, mtime, size, text_content)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        (kind, path, original_path, sha256, mtime, size, text_content),
+    """Insert or update an artifact and return its ID."""
+    conn.execute(
+        _INSERT_ARTIFACT_SQL,
+        (kind, path, original_path, sha256, mtime, size),
     )
+    _write_artifact_contents(conn, [(path, text_content)])
+    # lastrowid is not set when the upsert updates (or keeps) an existing row
+    artifact_id = _scalar(conn, "SELECT id FROM artifacts WHERE path = ?", (path,))
+    if kind == "docdef":
+        _insert_docdef_codes(conn, artifact_id, path)
     if commit:
         conn.commit()
-    return cursor.lastrowid
+    return artifact_id
+
+
+def insert_artifacts(
+    conn: sqlite3.Connection,
+    rows: list[tuple],
+    commit: bool = True,
+) -> None:
+    """Insert many artifacts with one executemany call.
+
+    Each row is ``(kind, path, original_path, sha256, mtime, size, text_content)``.
+    """
+    conn.executemany(_INSERT_ARTIFACT_SQL, [row[:6] for row in rows])
+    _write_artifact_contents(conn, [(row[1], row[6]) for row in rows])
+    for row in rows:
+        if row[0] == "docdef":
+            artifact_id = _scalar(conn, "SELECT id FROM artifacts WHERE path = ?", (row[1],))
+            _insert_docdef_codes(conn, artifact_id, row[1])
+    if commit:
+        conn.commit()
+
+
+def _write_artifact_contents(
+    conn: sqlite3.Connection,
+    rows: list[tuple[str, str | None]],
+) -> None:
+    """Store the text of artifacts given as ``(path, text_content)``.
+
+    A None text removes any text stored for the path before, e.g. when a
+    file grew past MAX_TEXT_SIZE or is no longer valid UTF-8.
+    """
+    conn.executemany(
+        _UPSERT_ARTIFACT_CONTENT_SQL,
+        [(text, path) for path, text in rows if text is not None],
+    )
+    conn.executemany(
+        _DELETE_ARTIFACT_CONTENT_SQL,
+        [(path,) for path, text in rows if text is None],
+    )
+
+
+# AFTER INSERT triggers that index new rows for full-text search, and the
+# bulk statements deferred_fts runs in their place: name -> (table, SQL)
+_DEFERRED_FTS_INSERT_SQL = {
+    "artifact_contents_ai": ("artifact_contents", """
+        INSERT INTO artifacts_fts(rowid, path, text_content)
+        SELECT c.artifact_id, a.path, c.text_content
+        FROM artifact_contents c JOIN artifacts a ON a.id = c.artifact_id
+        WHERE c.id > ? ORDER BY c.id
+    """),
+    "artifacts_path_ai": ("artifacts", """
+        INSERT INTO artifacts_path_fts(rowid, path)
+        SELECT id, path FROM artifacts WHERE id > ? ORDER BY id
+    """),
+    "procs_ai": ("procs", """
+        INSERT INTO procs_fts(rowid, parsed_json)
+        SELECT id, parsed_json FROM procs WHERE id > ? ORDER BY id
+    """),
+}
+
+
+@contextmanager
+def deferred_fts(conn: sqlite3.Connection) -> Generator[None, None, None]:
+    """Index artifacts and procs inserted inside the block in one pass on exit.
+
+    The FTS insert triggers are dropped for the duration and recreated
+    afterwards, within the caller's transaction, so a rollback restores
+    them. New rows are those above each table's starting max id; rows the
+    upserts update in place are reindexed by the update triggers, which
+    stay active. A row inserted inside the block must therefore not be
+    updated inside it too: its update trigger would remove index entries
+    that were never written.
+    """
+    triggers = [
+        (name, sql) for name, sql in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"
+        )
+        if name in _DEFERRED_FTS_INSERT_SQL
+    ]
+    max_ids = {
+        table: _scalar(conn, f"SELECT coalesce(max(id), 0) FROM {table}")
+        for table in {_DEFERRED_FTS_INSERT_SQL[name][0] for name, _ in triggers}
+    }
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    for name, _ in triggers:
+        conn.execute(f"DROP TRIGGER {name}")
+    try:
+        yield
+        for name, _ in triggers:
+            table, sql = _DEFERRED_FTS_INSERT_SQL[name]
+            conn.execute(sql, (max_ids[table],))
+    finally:
+        for _, sql in triggers:
+            conn.execute(sql)
+
+
+def docdef_code_keys(path: str) -> set[str]:
+    """Return the docdef_codes keys for a docdef artifact path.
+
+    Keys are every suffix (of at least DOCDEF_CODE_MIN_LEN characters) of each
+    alphanumeric run in the uppercased path, so a prefix range seek on a code
+    finds the same artifacts as ``UPPER(path) LIKE '%CODE%'``.
+    """
+    return {
+        run[i:]
+        for run in _PATH_RUN_RE.findall(path.upper())
+        for i in range(len(run) - DOCDEF_CODE_MIN_LEN + 1)
+    }
+
+
+def _insert_docdef_codes(conn: sqlite3.Connection, artifact_id: int, path: str) -> None:
+    """Index a docdef artifact's path keys (stale rows go by ON DELETE CASCADE)."""
+    conn.executemany(
+        "INSERT OR IGNORE INTO docdef_codes (code, artifact_id) VALUES (?, ?)",
+        [(code, artifact_id) for code in docdef_code_keys(path)],
+    )
 
 
 def insert_proc(
@@ -66,17 +440,47 @@ def insert_proc(
     sha256: str | None = None,
     commit: bool = True,
 ) -> int:
-    """Insert a parsed proc and return its ID."""
-    cursor = conn.execute(
-        """
-        INSERT OR REPLACE INTO procs (proc_name, path, parsed_json, sha256)
-        VALUES (?, ?, ?, ?)
-        """,
+    """Insert or update a parsed proc and return its ID."""
+    conn.execute(
+        _INSERT_PROC_SQL,
         (proc_name, path, parsed_json, sha256),
     )
+    proc_id = _scalar(conn, "SELECT id FROM procs WHERE proc_name = ?", (proc_name,))
     if commit:
         conn.commit()
-    return cursor.lastrowid
+    return proc_id
+
+
+def insert_procs(
+    conn: sqlite3.Connection,
+    rows: list[tuple],
+    commit: bool = True,
+) -> None:
+    """Insert many parsed procs; each row is ``(proc_name, path, parsed_json, sha256)``.
+
+    When several rows share a proc_name the last one wins, and is written
+    once, so no row inserted by this call is updated by it as well (see
+    deferred_fts).
+    """
+    conn.executemany(_INSERT_PROC_SQL, {row[0]: row for row in rows}.values())
+    if commit:
+        conn.commit()
+
+
+# The no-op DO UPDATE makes RETURNING yield the existing row's id
+_UPSERT_NODE_SQL = """
+INSERT INTO nodes (type, key, display_name, canonical_path, original_path, confidence)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET key = excluded.key
+RETURNING id
+"""
+
+_UPSERT_EDGE_SQL = """
+INSERT INTO edges (src, dst, rel_type, confidence, evidence_json)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (src, dst, rel_type) DO UPDATE SET rel_type = excluded.rel_type
+RETURNING id
+"""
 
 
 def insert_node(
@@ -90,23 +494,13 @@ def insert_node(
     commit: bool = True,
 ) -> int:
     """Insert or get existing node, return its ID."""
-    # Try to get existing
     row = conn.execute(
-        "SELECT id FROM nodes WHERE key = ?", (key,)
-    ).fetchone()
-    if row:
-        return row[0]
-
-    cursor = conn.execute(
-        """
-        INSERT INTO nodes (type, key, display_name, canonical_path, original_path, confidence)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """,
+        _UPSERT_NODE_SQL,
         (node_type, key, display_name, canonical_path, original_path, confidence),
-    )
+    ).fetchone()
     if commit:
         conn.commit()
-    return cursor.lastrowid
+    return row[0]
 
 
 def insert_edge(
@@ -118,25 +512,112 @@ def insert_edge(
     evidence_json: str | None = None,
     commit: bool = True,
 ) -> int:
-    """Insert an edge and return its ID."""
-    # Check if edge already exists
+    """Insert an edge (or get the existing one) and return its ID."""
     row = conn.execute(
-        "SELECT id FROM edges WHERE src = ? AND dst = ? AND rel_type = ?",
-        (src, dst, rel_type),
+        _UPSERT_EDGE_SQL,
+        (src, dst, rel_type, confidence, evidence_json),
     ).fetchone()
-    if row:
-        return row[0]
+    if commit:
+        conn.commit()
+    return row[0]
 
-    cursor = conn.execute(
-        """
-        INSERT INTO edges (src, dst, rel_type, confidence, evidence_json)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (src, dst, rel_type, confidence, evidence_json),
-    )
+
+_INSERT_NODE_SQL = """
+INSERT INTO nodes (type, key, display_name, canonical_path, original_path, confidence)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (key) DO NOTHING
+"""
+
+_INSERT_EDGE_SQL = """
+INSERT INTO edges (src, dst, rel_type, confidence, evidence_json)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (src, dst, rel_type) DO NOTHING
+"""
+
+# Same, with evidence_json assembled by JSON1 from the evidence fields
+_INSERT_EDGE_EVIDENCE_SQL = """
+INSERT INTO edges (src, dst, rel_type, confidence, evidence_json)
+VALUES (?, ?, ?, ?, json_object('file', ?, 'line_no', ?, 'line_text', ?))
+ON CONFLICT (src, dst, rel_type) DO NOTHING
+"""
+
+
+# Compact UTF-8 JSON, the layout of json_object() and orjson alike
+_json_encode_tight = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def _evidence_json(file: str, line_no: int | None, line_text: str) -> str:
+    """Encode an edge's evidence the way _INSERT_EDGE_EVIDENCE_SQL does."""
+    evidence = {"file": file, "line_no": line_no, "line_text": line_text}
+    if orjson is not None:
+        return orjson.dumps(evidence).decode("utf-8")
+    return _json_encode_tight(evidence)
+
+
+def insert_nodes(
+    conn: sqlite3.Connection,
+    rows: list[tuple],
+    commit: bool = True,
+) -> dict[str, int]:
+    """Insert many nodes, keeping existing ones, and return ``{key: id}``.
+
+    Each row is ``(type, key, display_name, canonical_path, original_path,
+    confidence)``; like insert_node, the first row for a key wins.
+    """
+    conn.executemany(_INSERT_NODE_SQL, rows)
+    keys = list(dict.fromkeys(row[1] for row in rows))
+    ids: dict[str, int] = {}
+    for placeholders, chunk in _in_chunks(keys):
+        ids.update(conn.execute(
+            f"SELECT key, id FROM nodes WHERE key IN ({placeholders})", chunk,
+        ).fetchall())
     if commit:
         conn.commit()
-    return cursor.lastrowid
+    return ids
+
+
+def insert_edges(
+    conn: sqlite3.Connection,
+    rows: list[tuple],
+    commit: bool = True,
+) -> None:
+    """Insert many edges, skipping any already present (as insert_edge does).
+
+    Each row is ``(src, dst, rel_type, confidence, file, line_no, line_text)``;
+    the last three become the edge's evidence_json object.
+    """
+    try:
+        conn.executemany(_INSERT_EDGE_EVIDENCE_SQL, rows)
+    except sqlite3.OperationalError:
+        # No JSON1: the statement fails to prepare, before any row is written
+        conn.executemany(_INSERT_EDGE_SQL, [
+            (*row[:4], _evidence_json(*row[4:])) for row in rows
+        ])
+    if commit:
+        conn.commit()
+
+
+_INSERT_CASE_CARD_SQL = """
+INSERT INTO case_cards (
+    source_path, chunk_id, content_hash, title, signals_json, root_cause,
+    fix_summary, verify_commands_json, related_files_json, tags_json, created_at
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_UPDATE_CASE_CARD_SQL = """
+UPDATE case_cards SET
+    content_hash = ?,
+    title = ?,
+    signals_json = ?,
+    root_cause = ?,
+    fix_summary = ?,
+    verify_commands_json = ?,
+    related_files_json = ?,
+    tags_json = ?,
+    updated_at = ?
+WHERE id = ?
+"""
 
 
 def insert_case_card(
@@ -152,22 +633,18 @@ def insert_case_card(
     tags_json: str | None,
     created_at: str,
     content_hash: str | None = None,
+    commit: bool = True,
 ) -> int:
     """Insert a case card and return its ID."""
     cursor = conn.execute(
-        """
-        INSERT INTO case_cards (
-            source_path, chunk_id, content_hash, title, signals_json, root_cause,
-            fix_summary, verify_commands_json, related_files_json, tags_json, created_at
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
+        _INSERT_CASE_CARD_SQL,
         (
             source_path, chunk_id, content_hash, title, signals_json, root_cause,
             fix_summary, verify_commands_json, related_files_json, tags_json, created_at,
         ),
     )
-    conn.commit()
+    if commit:
+        conn.commit()
     return cursor.lastrowid
 
 
@@ -184,6 +661,7 @@ def upsert_case_card(
     tags_json: str | None,
     created_at: str,
     content_hash: str | None = None,
+    commit: bool = True,
 ) -> tuple[int, bool]:
     """
     Insert or update a case card.
@@ -203,46 +681,98 @@ def upsert_case_card(
 
         # Update existing record
         conn.execute(
-            """
-            UPDATE case_cards SET
-                content_hash = ?,
-                title = ?,
-                signals_json = ?,
-                root_cause = ?,
-                fix_summary = ?,
-                verify_commands_json = ?,
-                related_files_json = ?,
-                tags_json = ?,
-                updated_at = ?
-            WHERE id = ?
-            """,
+            _UPDATE_CASE_CARD_SQL,
             (
                 content_hash, title, signals_json, root_cause, fix_summary,
                 verify_commands_json, related_files_json, tags_json, created_at,
                 existing["id"],
             ),
         )
-        conn.commit()
+        if commit:
+            conn.commit()
         return existing["id"], False
 
     # Insert new record
     cursor = conn.execute(
-        """
-        INSERT INTO case_cards (
-            source_path, chunk_id, content_hash, title, signals_json, root_cause,
-            fix_summary, verify_commands_json, related_files_json, tags_json, created_at
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
+        _INSERT_CASE_CARD_SQL,
         (
             source_path, chunk_id, content_hash, title, signals_json, root_cause,
             fix_summary, verify_commands_json, related_files_json, tags_json, created_at,
         ),
     )
-    conn.commit()
+    if commit:
+        conn.commit()
     return cursor.lastrowid, True
 
 
+_UPSERT_CASE_CARD_SQL = """
+INSERT INTO case_cards (
+    source_path, chunk_id, title, signals_json, root_cause, fix_summary,
+    verify_commands_json, related_files_json, tags_json, created_at, content_hash
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (source_path, chunk_id) DO UPDATE SET
+    content_hash = excluded.content_hash,
+    title = excluded.title,
+    signals_json = excluded.signals_json,
+    root_cause = excluded.root_cause,
+    fix_summary = excluded.fix_summary,
+    verify_commands_json = excluded.verify_commands_json,
+    related_files_json = excluded.related_files_json,
+    tags_json = excluded.tags_json,
+    updated_at = excluded.created_at
+WHERE coalesce(excluded.content_hash, '') = ''
+    OR case_cards.content_hash IS NOT excluded.content_hash
+RETURNING updated_at IS NULL
+"""
+
+
+def upsert_case_cards(
+    conn: sqlite3.Connection,
+    rows: list[tuple],
+    commit: bool = True,
+) -> int:
+    """
+    Insert or update many case cards with one cached upsert statement.
+
+    Rows follow upsert_case_card's argument order, from source_path to
+    content_hash. Existing cards with a matching content hash are left
+    untouched. Returns the number of newly inserted cards.
+    """
+    # The statement returns no row for untouched cards, and updated_at IS NULL
+    # only for a fresh insert (an update sets it from the NOT NULL created_at).
+    # executemany() would discard RETURNING rows, hence one execute per row.
+    inserted = 0
+    for row in rows:
+        returned = conn.execute(_UPSERT_CASE_CARD_SQL, row).fetchone()
+        if returned is not None and returned[0]:
+            inserted += 1
+    if commit:
+        conn.commit()
+    return inserted
+
+
+_INSERT_INCIDENT_SQL = """
+INSERT INTO incidents (
+    log_path, parsed_json, top_node_id, top_node_key, confidence,
+    hypotheses_json, similar_cases_json, created_at
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_UPDATE_INCIDENT_SQL = """
+UPDATE incidents SET
+    parsed_json = ?,
+    top_node_id = ?,
+    top_node_key = ?,
+    confidence = ?,
+    hypotheses_json = ?,
+    similar_cases_json = ?,
+    updated_at = ?
+WHERE id = ?
+"""
+
+
 def upsert_incident(
     conn: sqlite3.Connection,
     log_path: str,
@@ -253,6 +783,7 @@ def upsert_incident(
     hypotheses_json: str | None,
     similar_cases_json: str | None,
     created_at: str,
+    commit: bool = True,
 ) -> tuple[int, bool]:
     """
     Insert or update an incident by log_path.
@@ -266,40 +797,26 @@ def upsert_incident(
 
     if existing:
         conn.execute(
-            """
-            UPDATE incidents SET
-                parsed_json = ?,
-                top_node_id = ?,
-                top_node_key = ?,
-                confidence = ?,
-                hypotheses_json = ?,
-                similar_cases_json = ?,
-                updated_at = ?
-            WHERE id = ?
-            """,
+            _UPDATE_INCIDENT_SQL,
             (
                 parsed_json, top_node_id, top_node_key, confidence,
                 hypotheses_json, similar_cases_json, created_at,
                 existing["id"],
             ),
         )
-        conn.commit()
+        if commit:
+            conn.commit()
         return existing["id"], False
 
     cursor = conn.execute(
-        """
-        INSERT INTO incidents (
-            log_path, parsed_json, top_node_id, top_node_key, confidence,
-            hypotheses_json, similar_cases_json, created_at
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """,
+        _INSERT_INCIDENT_SQL,
         (
             log_path, parsed_json, top_node_id, top_node_key, confidence,
             hypotheses_json, similar_cases_json, created_at,
         ),
     )
-    conn.commit()
+    if commit:
+        conn.commit()
     return cursor.lastrowid, True
 
 
@@ -334,14 +851,23 @@ def get_incident_by_log_path(
 
 def count_incidents(conn: sqlite3.Connection) -> int:
     """Count total incidents in database."""
-    row = conn.execute("SELECT COUNT(*) FROM incidents").fetchone()
-    return row[0] if row else 0
+    return _scalar(conn, "SELECT COUNT(*) FROM incidents")
 
 
 def count_case_cards(conn: sqlite3.Connection) -> int:
     """Count total case cards in database."""
-    row = conn.execute("SELECT COUNT(*) FROM case_cards").fetchone()
-    return row[0] if row else 0
+    return _scalar(conn, "SELECT COUNT(*) FROM case_cards")
+
+
+_INSERT_MESSAGE_CODE_SQL = """
+INSERT INTO message_codes (code, severity, title, body, source_path, created_at)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (code, source_path) DO UPDATE SET
+    severity = excluded.severity,
+    title = excluded.title,
+    body = excluded.body,
+    created_at = excluded.created_at
+"""
 
 
 def insert_message_code(
@@ -354,18 +880,29 @@ def insert_message_code(
     created_at: str,
     commit: bool = True,
 ) -> None:
-    """Insert or replace a message code entry."""
+    """Insert or update a message code entry."""
     conn.execute(
-        """
-        INSERT OR REPLACE INTO message_codes (code, severity, title, body, source_path, created_at)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """,
+        _INSERT_MESSAGE_CODE_SQL,
         (code, severity, title, body, source_path, created_at),
     )
     if commit:
         conn.commit()
 
 
+def insert_message_codes(
+    conn: sqlite3.Connection,
+    rows: list[tuple],
+    commit: bool = True,
+) -> None:
+    """Insert or update many message codes with one executemany call.
+
+    Each row is ``(code, severity, title, body, source_path, created_at)``.
+    """
+    conn.executemany(_INSERT_MESSAGE_CODE_SQL, rows)
+    if commit:
+        conn.commit()
+
+
 def get_message_code(conn: sqlite3.Connection, code: str) -> dict | None:
     """Get message code entry by code (returns first match across all sources)."""
     row = conn.execute(
@@ -385,14 +922,18 @@ def get_message_code(conn: sqlite3.Connection, code: str) -> dict | None:
 
 
 def get_message_codes_batch(conn: sqlite3.Connection, codes: list[str]) -> dict[str, dict]:
-    """Get multiple message codes at once, returns dict keyed by code."""
-    if not codes:
-        return {}
-    placeholders = ",".join("?" for _ in codes)
-    rows = conn.execute(
-        f"SELECT code, severity, title, body, source_path, created_at FROM message_codes WHERE code IN ({placeholders})",
-        codes,
-    ).fetchall()
+    """Get multiple message codes at once, returns dict keyed by code.
+
+    Duplicate codes are bound once; long lists are queried in chunks that
+    stay under SQLite's host parameter limit (see _in_chunks).
+    """
+    unique_codes = list(dict.fromkeys(codes))
+    rows = []
+    for placeholders, chunk in _in_chunks(unique_codes):
+        rows.extend(conn.execute(
+            f"SELECT code, severity, title, body, source_path, created_at FROM message_codes WHERE code IN ({placeholders})",
+            chunk,
+        ).fetchall())
     result = {}
     for row in rows:
         result[row[0]] = {
@@ -408,5 +949,4 @@ def get_message_codes_batch(conn: sqlite3.Connection, codes: list[str]) -> dict[
 
 def count_message_codes(conn: sqlite3.Connection) -> int:
     """Count total message codes in database."""
-    row = conn.execute("SELECT COUNT(*) FROM message_codes").fetchone()
-    return row[0] if row else 0
+    return _scalar(conn, "SELECT COUNT(*) FROM message_codes")
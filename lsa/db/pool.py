@@ -0,0 +1,96 @@
+"""Pooled SQLite connections for long-running processes (the web UI)."""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Generator
+
+from .connection import STATEMENT_CACHE_SIZE, TUNING_PRAGMAS, ensure_current_schema
+
+# journal_mode is persistent and set by the writer; a read-only connection
+# cannot switch a database into WAL
+_READER_PRAGMAS = tuple(p for p in TUNING_PRAGMAS if "journal_mode" not in p)
+
+
+class ConnectionPool:
+    """One writer connection and up to ``readers`` reused read-only connections.
+
+    Readers open the database with ``mode=ro`` so a stray write fails loudly;
+    in WAL mode they never block the writer. Writes are serialized behind a
+    lock and run in ``BEGIN IMMEDIATE`` transactions so lock contention
+    surfaces at the start of the transaction rather than mid-way.
+    """
+
+    def __init__(self, db_path: Path, readers: int = 4):
+        self.db_path = Path(db_path)
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(readers)
+        self._write_lock = threading.Lock()
+        self._writer: sqlite3.Connection | None = None
+        # Older databases are upgraded once, before the first connection is used
+        self._schema_lock = threading.Lock()
+        self._schema_checked = False
+
+    def _connect(self, readonly: bool) -> sqlite3.Connection:
+        target = self.db_path.resolve().as_uri()
+        if readonly:
+            target += "?mode=ro"
+        conn = sqlite3.connect(
+            target,
+            uri=True,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        with self._schema_lock:
+            if not self._schema_checked:
+                ensure_current_schema(conn, self.db_path)
+                self._schema_checked = True
+        conn.execute("PRAGMA foreign_keys = ON")
+        for pragma in _READER_PRAGMAS if readonly else TUNING_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def reader(self) -> Generator[sqlite3.Connection, None, None]:
+        """Borrow a read-only connection; it returns to the pool on exit."""
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect(readonly=True)
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.put(conn)
+
+    @contextmanager
+    def writer(self) -> Generator[sqlite3.Connection, None, None]:
+        """Run a write transaction on the single writer connection."""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect(readonly=False)
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def close(self) -> None:
+        """Close idle readers and the writer (e.g. before deleting the database)."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
@@ -1,5 +1,10 @@
 """SQLite schema definitions for LSA."""
 
+# Stored in PRAGMA user_version by init_db. Bump it whenever init_db gains a
+# migration that readers depend on, so databases built by an older version
+# are upgraded when they are next opened (see ensure_current_schema).
+SCHEMA_VERSION = 1
+
 SCHEMA = """
 -- Artifacts: files from snapshot
 CREATE TABLE IF NOT EXISTS artifacts (
@@ -9,8 +14,28 @@ CREATE TABLE IF NOT EXISTS artifacts (
     original_path TEXT,  -- original unix path if different
     sha256 TEXT,  -- nullable, computed only for text files
     mtime REAL NOT NULL,
-    size INTEGER NOT NULL,
-    text_content TEXT  -- nullable, only for small UTF-8 files
+    size INTEGER NOT NULL
+);
+
+-- Text of small UTF-8 artifacts, kept out of the artifacts rows so that
+-- reads of artifact metadata don't page through file contents
+CREATE TABLE IF NOT EXISTS artifact_contents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,  -- never reused: deferred_fts indexes ids above its start
+    artifact_id INTEGER NOT NULL UNIQUE REFERENCES artifacts(id) ON DELETE CASCADE,
+    text_content TEXT NOT NULL
+);
+
+-- Artifacts that have text, keyed by artifact id; content table of artifacts_fts
+CREATE VIEW IF NOT EXISTS artifact_texts AS
+SELECT c.artifact_id AS id, a.path, c.text_content
+FROM artifact_contents c
+JOIN artifacts a ON a.id = c.artifact_id;
+
+-- Code keys of docdef artifact paths, filled at ingest for indexed DFA lookups
+CREATE TABLE IF NOT EXISTS docdef_codes (
+    code TEXT NOT NULL,  -- suffix of an alphanumeric run in UPPER(path)
+    artifact_id INTEGER NOT NULL REFERENCES artifacts(id) ON DELETE CASCADE,
+    PRIMARY KEY (code, artifact_id)
 );
 
 -- Parsed .procs files
@@ -75,45 +100,63 @@ CREATE TABLE IF NOT EXISTS case_cards (
     UNIQUE(source_path, chunk_id)
 );
 
--- Indexes for performance
+-- Indexes for performance. GROUP BY kind/type/rel_type counts are answered
+-- from these indexes alone. Columns declared UNIQUE (artifacts.path,
+-- nodes.key, incidents.log_path) already have an index and get no second one.
 CREATE INDEX IF NOT EXISTS idx_artifacts_kind ON artifacts(kind);
-CREATE INDEX IF NOT EXISTS idx_artifacts_path ON artifacts(path);
-CREATE INDEX IF NOT EXISTS idx_nodes_type ON nodes(type);
-CREATE INDEX IF NOT EXISTS idx_nodes_key ON nodes(key);
+CREATE INDEX IF NOT EXISTS idx_docdef_codes_artifact ON docdef_codes(artifact_id);
+-- Proc lookups by key prefix seek a (type, key) range
+CREATE INDEX IF NOT EXISTS idx_nodes_type_key ON nodes(type, key);
 CREATE INDEX IF NOT EXISTS idx_edges_src ON edges(src);
 CREATE INDEX IF NOT EXISTS idx_edges_dst ON edges(dst);
 CREATE INDEX IF NOT EXISTS idx_edges_rel ON edges(rel_type);
+-- One edge per (src, dst, rel_type); conflict target for the edge upserts
+CREATE UNIQUE INDEX IF NOT EXISTS idx_edges_unique ON edges(src, dst, rel_type);
 
--- FTS virtual table for text search
+-- FTS virtual table for text search; rowid is the artifact id
 CREATE VIRTUAL TABLE IF NOT EXISTS artifacts_fts USING fts5(
     path,
     text_content,
-    content=artifacts,
+    content=artifact_texts,
     content_rowid=id
 );
 
--- Triggers to keep FTS in sync
-CREATE TRIGGER IF NOT EXISTS artifacts_ai AFTER INSERT ON artifacts
-WHEN NEW.text_content IS NOT NULL
+-- Triggers to keep FTS in sync. Only artifacts with a contents row are
+-- indexed; the path comes from the artifacts row, which exists for as long
+-- as its contents do (artifacts_bd removes them first)
+CREATE TRIGGER IF NOT EXISTS artifact_contents_ai AFTER INSERT ON artifact_contents
 BEGIN
     INSERT INTO artifacts_fts(rowid, path, text_content)
-    VALUES (NEW.id, NEW.path, NEW.text_content);
+    SELECT NEW.artifact_id, path, NEW.text_content FROM artifacts WHERE id = NEW.artifact_id;
 END;
 
-CREATE TRIGGER IF NOT EXISTS artifacts_ad AFTER DELETE ON artifacts
-WHEN OLD.text_content IS NOT NULL
+CREATE TRIGGER IF NOT EXISTS artifact_contents_ad AFTER DELETE ON artifact_contents
 BEGIN
     INSERT INTO artifacts_fts(artifacts_fts, rowid, path, text_content)
-    VALUES ('delete', OLD.id, OLD.path, OLD.text_content);
+    SELECT 'delete', OLD.artifact_id, path, OLD.text_content FROM artifacts WHERE id = OLD.artifact_id;
+END;
+
+-- A rescan that rewrites an unchanged file leaves the index alone
+CREATE TRIGGER IF NOT EXISTS artifact_contents_au AFTER UPDATE ON artifact_contents
+WHEN OLD.text_content IS NOT NEW.text_content
+BEGIN
+    INSERT INTO artifacts_fts(artifacts_fts, rowid, path, text_content)
+    SELECT 'delete', OLD.artifact_id, path, OLD.text_content FROM artifacts WHERE id = OLD.artifact_id;
+    INSERT INTO artifacts_fts(rowid, path, text_content)
+    SELECT NEW.artifact_id, path, NEW.text_content FROM artifacts WHERE id = NEW.artifact_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS artifacts_bd BEFORE DELETE ON artifacts
+BEGIN
+    DELETE FROM artifact_contents WHERE artifact_id = OLD.id;
 END;
 
-CREATE TRIGGER IF NOT EXISTS artifacts_au AFTER UPDATE ON artifacts
-WHEN OLD.text_content IS NOT NULL OR NEW.text_content IS NOT NULL
+CREATE TRIGGER IF NOT EXISTS artifacts_au AFTER UPDATE OF path ON artifacts
 BEGIN
     INSERT INTO artifacts_fts(artifacts_fts, rowid, path, text_content)
-    VALUES ('delete', OLD.id, OLD.path, COALESCE(OLD.text_content, ''));
+    SELECT 'delete', OLD.id, OLD.path, text_content FROM artifact_contents WHERE artifact_id = OLD.id;
     INSERT INTO artifacts_fts(rowid, path, text_content)
-    VALUES (NEW.id, NEW.path, COALESCE(NEW.text_content, ''));
+    SELECT NEW.id, NEW.path, text_content FROM artifact_contents WHERE artifact_id = NEW.id;
 END;
 
 -- Message codes from Papyrus/DocExec knowledge base
@@ -125,13 +168,118 @@ CREATE TABLE IF NOT EXISTS message_codes (
     source_path TEXT NOT NULL,  -- path to source PDF
     created_at TEXT NOT NULL,
     PRIMARY KEY (code, source_path)
-);
+) WITHOUT ROWID;  -- rows live in the primary key b-tree, which serves code lookups
 
-CREATE INDEX IF NOT EXISTS idx_message_codes_code ON message_codes(code);
 CREATE INDEX IF NOT EXISTS idx_message_codes_severity ON message_codes(severity);
 
 -- Additional indexes for case_cards and incidents
 CREATE INDEX IF NOT EXISTS idx_case_cards_source ON case_cards(source_path);
 CREATE INDEX IF NOT EXISTS idx_case_cards_hash ON case_cards(content_hash);
-CREATE INDEX IF NOT EXISTS idx_incidents_log_path ON incidents(log_path);
+-- "Most recent first" listings walk these instead of sorting the table;
+-- DESC keeps ties in rowid order, as the sort did
+CREATE INDEX IF NOT EXISTS idx_incidents_recent ON incidents(COALESCE(updated_at, created_at) DESC);
+CREATE INDEX IF NOT EXISTS idx_case_cards_recent ON case_cards(COALESCE(updated_at, created_at) DESC);
+"""
+
+# Trigram FTS over procs parsed_json, used for title keyword lookups in the
+# planner. Kept separate from SCHEMA because the trigram tokenizer needs
+# SQLite >= 3.34; init_db skips it on older libraries.
+PROCS_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS procs_fts USING fts5(
+    parsed_json,
+    content=procs,
+    content_rowid=id,
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS procs_ai AFTER INSERT ON procs
+BEGIN
+    INSERT INTO procs_fts(rowid, parsed_json) VALUES (NEW.id, NEW.parsed_json);
+END;
+
+CREATE TRIGGER IF NOT EXISTS procs_ad AFTER DELETE ON procs
+BEGIN
+    INSERT INTO procs_fts(procs_fts, rowid, parsed_json)
+    VALUES ('delete', OLD.id, OLD.parsed_json);
+END;
+
+CREATE TRIGGER IF NOT EXISTS procs_au AFTER UPDATE ON procs
+BEGIN
+    INSERT INTO procs_fts(procs_fts, rowid, parsed_json)
+    VALUES ('delete', OLD.id, OLD.parsed_json);
+    INSERT INTO procs_fts(rowid, parsed_json) VALUES (NEW.id, NEW.parsed_json);
+END;
+"""
+
+# Trigram FTS over artifact paths, so substring path search (LIKE '%q%') is an
+# index lookup instead of a table scan. Needs the trigram tokenizer, like
+# PROCS_FTS_SCHEMA.
+ARTIFACTS_PATH_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS artifacts_path_fts USING fts5(
+    path,
+    content=artifacts,
+    content_rowid=id,
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS artifacts_path_ai AFTER INSERT ON artifacts
+BEGIN
+    INSERT INTO artifacts_path_fts(rowid, path) VALUES (NEW.id, NEW.path);
+END;
+
+CREATE TRIGGER IF NOT EXISTS artifacts_path_ad AFTER DELETE ON artifacts
+BEGIN
+    INSERT INTO artifacts_path_fts(artifacts_path_fts, rowid, path)
+    VALUES ('delete', OLD.id, OLD.path);
+END;
+
+CREATE TRIGGER IF NOT EXISTS artifacts_path_au AFTER UPDATE OF path ON artifacts
+BEGIN
+    INSERT INTO artifacts_path_fts(artifacts_path_fts, rowid, path)
+    VALUES ('delete', OLD.id, OLD.path);
+    INSERT INTO artifacts_path_fts(rowid, path) VALUES (NEW.id, NEW.path);
+END;
+"""
+
+# Inverted index of lowercased case_card signals, maintained by triggers so
+# that every write path keeps it in sync. Used to prefilter similarity
+# lookups. Needs the JSON1 functions; init_db skips it when they are missing.
+CASE_SIGNALS_SCHEMA = """
+-- Fails up front (creating nothing) if JSON1 is unavailable
+SELECT json_valid('[]');
+
+CREATE TABLE IF NOT EXISTS case_signals (
+    case_id INTEGER NOT NULL,
+    signal TEXT NOT NULL,
+    PRIMARY KEY (case_id, signal)
+);
+
+CREATE INDEX IF NOT EXISTS idx_case_signals_signal ON case_signals(signal);
+
+CREATE TRIGGER IF NOT EXISTS case_cards_signals_ai AFTER INSERT ON case_cards
+WHEN json_valid(NEW.signals_json)
+BEGIN
+    INSERT OR IGNORE INTO case_signals(case_id, signal)
+    SELECT NEW.id, lower(value) FROM json_each(NEW.signals_json) WHERE type = 'text';
+END;
+
+CREATE TRIGGER IF NOT EXISTS case_cards_signals_au AFTER UPDATE OF signals_json ON case_cards
+BEGIN
+    DELETE FROM case_signals WHERE case_id = OLD.id;
+    INSERT OR IGNORE INTO case_signals(case_id, signal)
+    SELECT NEW.id, lower(value) FROM json_each(NEW.signals_json)
+    WHERE json_valid(NEW.signals_json) AND type = 'text';
+END;
+
+CREATE TRIGGER IF NOT EXISTS case_cards_signals_ad AFTER DELETE ON case_cards
+BEGIN
+    DELETE FROM case_signals WHERE case_id = OLD.id;
+END;
+"""
+
+CASE_SIGNALS_BACKFILL = """
+INSERT OR IGNORE INTO case_signals(case_id, signal)
+SELECT c.id, lower(j.value)
+FROM case_cards c, json_each(c.signals_json) j
+WHERE json_valid(c.signals_json) AND j.type = 'text'
 """
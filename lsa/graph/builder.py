@@ -1,17 +1,18 @@
 """Graph builder - constructs nodes and edges from parsed .procs files."""
 
-import json
 import sqlite3
 from pathlib import Path
+from typing import Iterable
 
-from ..db.connection import insert_node, insert_edge
+from ..config import GRAPH_BATCH_SIZE
+from ..db.connection import insert_edges, insert_nodes
 from ..parsers.procs_parser import ProcsData
 from ..utils.paths import map_unix_to_snapshot
 
 
 def build_graph_from_procs(
     conn: sqlite3.Connection,
-    procs_list: list[tuple[str, ProcsData]],
+    procs_list: Iterable[tuple[str, ProcsData]],
     snapshot_path: Path,
 ) -> dict:
     """
@@ -19,7 +20,8 @@ def build_graph_from_procs(
 
     Args:
         conn: Database connection
-        procs_list: List of (proc_name, ProcsData) tuples
+        procs_list: (proc_name, ProcsData) tuples; consumed once, so a
+            generator works and is never held in memory as a whole
         snapshot_path: Path to snapshot root for path resolution
 
     Returns:
@@ -31,70 +33,99 @@ def build_graph_from_procs(
         "procs_processed": 0,
     }
 
+    # Rows are collected per GRAPH_BATCH_SIZE procs and written with one
+    # executemany per table. Nodes are unique on key and an existing row is
+    # never changed, so keys already in the database (or seen earlier in this
+    # run) are resolved from a dict; this also skips re-mapping a script path
+    # onto the snapshot. Edges are likewise deduplicated on (src, dst,
+    # rel_type) within a batch, first one wins, as ON CONFLICT does across them.
+    node_ids: dict[str, int] = dict(conn.execute("SELECT key, id FROM nodes"))
+    new_nodes: dict[str, tuple] = {}
+    edge_keys: dict[tuple[str, str, str], tuple] = {}
+    batched = 0
     for proc_name, procs_data in procs_list:
         stats["procs_processed"] += 1
 
         # Create proc node
-        proc_node_id = insert_node(
-            conn,
-            node_type="proc",
-            key=f"proc:{proc_name}",
-            display_name=f"{procs_data.cid.upper()} - {procs_data.app_type}",
-            canonical_path=f"procs/{proc_name}.procs",
-            original_path=None,
-            confidence=1.0,
-            commit=False,
-        )
+        proc_key = f"proc:{proc_name}"
+        if proc_key not in node_ids and proc_key not in new_nodes:
+            new_nodes[proc_key] = (
+                "proc",
+                proc_key,
+                f"{procs_data.cid.upper()} - {procs_data.app_type}",
+                f"procs/{proc_name}.procs",
+                None,
+                1.0,
+            )
         stats["nodes_created"] += 1
 
         # Process shell script reference
         if procs_data.shell_script:
-            script_node_id = _create_script_node(
-                conn, procs_data.shell_script, snapshot_path
-            )
-            if script_node_id:
-                stats["nodes_created"] += 1
-
-                # Create RUNS edge
-                evidence = {
-                    "file": f"procs/{proc_name}.procs",
-                    "line_no": procs_data.shell_script_line,
-                    "line_text": f"__Shell Script: {procs_data.shell_script}",
-                }
-                insert_edge(
-                    conn,
-                    src=proc_node_id,
-                    dst=script_node_id,
-                    rel_type="RUNS",
-                    confidence=1.0,
-                    evidence_json=json.dumps(evidence),
-                    commit=False,
-                )
-                stats["edges_created"] += 1
-
+            script_key = f"script:{Path(procs_data.shell_script).name}"
+            if script_key not in node_ids and script_key not in new_nodes:
+                new_nodes[script_key] = _script_node_row(procs_data.shell_script, snapshot_path)
+            stats["nodes_created"] += 1
+
+            # Create RUNS edge (evidence: file, line_no, line_text)
+            edge_keys.setdefault((proc_key, script_key, "RUNS"), (
+                1.0,
+                f"procs/{proc_name}.procs",
+                procs_data.shell_script_line,
+                f"__Shell Script: {procs_data.shell_script}",
+            ))
+            stats["edges_created"] += 1
+
+        batched += 1
+        if batched >= GRAPH_BATCH_SIZE:
+            _flush_graph_rows(conn, node_ids, new_nodes, edge_keys)
+            batched = 0
+
+    _flush_graph_rows(conn, node_ids, new_nodes, edge_keys)
     conn.commit()
+    # Refresh planner statistics for the graph tables, so neighbour lookups
+    # keep using the edge indexes as the tables grow; analysis_limit bounds
+    # the work to a sample of each index
+    conn.execute("PRAGMA analysis_limit = 1000")
+    conn.execute("ANALYZE nodes")
+    conn.execute("ANALYZE edges")
     return stats
 
 
-def _create_script_node(
+def _flush_graph_rows(
     conn: sqlite3.Connection,
-    script_path: str,
-    snapshot_path: Path,
-) -> int | None:
-    """Create a script node from a unix path."""
+    node_ids: dict[str, int],
+    new_nodes: dict[str, tuple],
+    edge_keys: dict[tuple[str, str, str], tuple],
+) -> None:
+    """Write and clear buffered node and edge rows, recording new node ids."""
+    if new_nodes:
+        node_ids.update(insert_nodes(conn, list(new_nodes.values()), commit=False))
+        new_nodes.clear()
+    if edge_keys:
+        insert_edges(
+            conn,
+            [
+                (node_ids[src], node_ids[dst], rel_type, *evidence)
+                for (src, dst, rel_type), evidence in edge_keys.items()
+            ],
+            commit=False,
+        )
+        edge_keys.clear()
+
+
+def _script_node_row(script_path: str, snapshot_path: Path) -> tuple:
+    """Build the nodes row for a script referenced by a unix path."""
     canonical, confidence = map_unix_to_snapshot(script_path, snapshot_path)
 
     canonical_str = str(canonical.relative_to(snapshot_path)) if canonical else None
 
-    return insert_node(
-        conn,
-        node_type="script",
-        key=f"script:{Path(script_path).name}",
-        display_name=Path(script_path).name,
-        canonical_path=canonical_str,
-        original_path=script_path,
-        confidence=confidence,
-        commit=False,
+    return (
+        "script",
+        f"script:{Path(script_path).name}",
+        Path(script_path).name,
+        canonical_str,
+        script_path,
+        confidence,
     )
 
 
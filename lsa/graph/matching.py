@@ -1,8 +1,10 @@
 """Log-to-node matching for LSA."""
 
+import heapq
 import re
 import sqlite3
 from dataclasses import dataclass, field
+from operator import attrgetter
 from pathlib import Path
 
 from ..parsers.log_parser import LogAnalysis, extract_cid_from_log_path, extract_proc_name_from_log_path, extract_base_proc_name
@@ -10,8 +12,12 @@ from ..parsers.log_parser import LogAnalysis, extract_cid_from_log_path, extract
 
 @dataclass
 class MatchCandidate:
-    """A candidate node with scoring breakdown."""
-    node: dict
+    """A candidate node with scoring breakdown.
+
+    ``node`` holds the matched ``sqlite3.Row`` while candidates are ranked;
+    match_log_to_node turns it into a dict only for the candidates it returns.
+    """
+    node: dict | sqlite3.Row
     total_score: float = 0.0
     strategies: list[tuple[str, float]] = field(default_factory=list)
 
@@ -21,6 +27,126 @@ class MatchCandidate:
         self.total_score += score
 
 
+# ── SQL ──────────────────────────────────────────────────────────────────────
+# Statements are kept as constants so every call passes the identical string
+# and the connection's statement cache (STATEMENT_CACHE_SIZE) reuses the
+# prepared form. Key prefixes are matched as a [lo, hi) range (_key_range) so
+# idx_nodes_type_key can seek to them; LIKE on the BINARY-collated key cannot
+# use an index.
+
+_SQL_PROC_BY_KEY = "SELECT * FROM nodes WHERE type = 'proc' AND key = ?"
+_SQL_PROCS_BY_KEY_RANGE = (
+    "SELECT * FROM nodes WHERE type = 'proc' AND key >= ? AND key < ? ORDER BY id"
+)
+_SQL_PROC_BY_KEY_INFIX = "SELECT * FROM nodes WHERE type = 'proc' AND key LIKE ?"
+_SQL_NODE_BY_ID = "SELECT * FROM nodes WHERE id = ?"
+_SQL_NODE_BY_KEY = "SELECT * FROM nodes WHERE key = ?"
+# Both directions in one statement: direction 0 walks upstream (nodes that
+# point TO the node), 1 walks downstream (nodes it points TO). walk holds the
+# nodes whose edges are followed, up to :hops - 1 steps out; each followed
+# edge is reported at the depth of the node it reaches.
+_SQL_NEIGHBORS = """
+WITH RECURSIVE walk(id, direction, depth) AS (
+    VALUES (:node_id, 0, 0), (:node_id, 1, 0)
+    UNION
+    SELECT e.src, 0, w.depth + 1 FROM walk w JOIN edges e ON e.dst = w.id
+    WHERE w.direction = 0 AND w.depth + 1 < :hops
+    UNION
+    SELECT e.dst, 1, w.depth + 1 FROM walk w JOIN edges e ON e.src = w.id
+    WHERE w.direction = 1 AND w.depth + 1 < :hops
+)
+SELECT n.*, e.rel_type, e.confidence, e.evidence_json,
+       w.direction, w.depth + 1 AS depth, e.id AS edge_id
+FROM walk w
+JOIN edges e ON e.dst = w.id
+JOIN nodes n ON n.id = e.src
+WHERE w.direction = 0
+UNION ALL
+SELECT n.*, e.rel_type, e.confidence, e.evidence_json,
+       w.direction, w.depth + 1 AS depth, e.id AS edge_id
+FROM walk w
+JOIN edges e ON e.src = w.id
+JOIN nodes n ON n.id = e.dst
+WHERE w.direction = 1
+ORDER BY direction, depth, edge_id
+"""
+# Only canonical paths are needed: the node's own and its downstream
+# neighbours', without materializing full rows for both directions
+_SQL_RELATED_PATHS = """
+SELECT canonical_path FROM nodes WHERE id = ?
+UNION ALL
+SELECT n.canonical_path
+FROM edges e
+JOIN nodes n ON n.id = e.dst
+WHERE e.src = ?
+"""
+
+# Per-token lookups for match_log_to_node, run once for all of a log's
+# tokens: {tokens} becomes a VALUES list of one row per token, and rows come
+# back grouped by token in node (or edge) order. These are cached once per
+# distinct token count.
+_SQL_PREFIX_EXACT = """
+WITH tokens(token_i, token) AS (VALUES {tokens})
+SELECT tokens.token_i, n.* FROM tokens
+JOIN nodes n ON n.type = 'proc' AND n.key = 'proc:' || tokens.token
+ORDER BY tokens.token_i, n.id
+"""
+_SQL_PREFIX_PARTIAL = """
+WITH tokens(token_i, lo, hi) AS (VALUES {tokens})
+SELECT tokens.token_i, n.* FROM tokens
+JOIN nodes n ON n.type = 'proc' AND n.key >= tokens.lo AND n.key < tokens.hi
+ORDER BY tokens.token_i, n.id
+"""
+_SQL_SCRIPT_RUNNERS = """
+WITH tokens(token_i, token) AS (VALUES {tokens})
+SELECT tokens.token_i, p.* FROM tokens
+JOIN nodes s ON s.type = 'script'
+    AND (s.display_name = tokens.token OR s.original_path LIKE '%' || tokens.token)
+JOIN edges e ON e.dst = s.id AND e.rel_type = 'RUNS'
+JOIN nodes p ON p.id = e.src AND p.type = 'proc'
+ORDER BY tokens.token_i, s.id, e.id
+"""
+_SQL_JIDS = """
+WITH tokens(token_i, token) AS (VALUES {tokens})
+SELECT tokens.token_i, n.* FROM tokens
+JOIN nodes n ON n.type = 'proc' AND n.key LIKE '%' || tokens.token || '%'
+ORDER BY tokens.token_i, n.id
+"""
+
+
+def _key_range(prefix: str) -> tuple[str, str]:
+    """Bounds ``(lo, hi)`` such that ``lo <= key < hi`` iff key starts with ``prefix``."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _nodes_by_token(
+    conn: sqlite3.Connection,
+    sql: str,
+    tokens: list[tuple],
+) -> dict[int, list[sqlite3.Row]]:
+    """Run a per-token lookup for all ``tokens`` in one statement.
+
+    Each token is a tuple of the values following ``token_i`` in the
+    statement's VALUES list. Returns ``{token index: [node row, ...]}`` for
+    tokens with matches; rows keep their leading ``token_i`` column.
+    """
+    if not tokens:
+        return {}
+    params = [value for i, token in enumerate(tokens) for value in (i, *token)]
+    row_sql = "(" + ", ".join(["?"] * (len(tokens[0]) + 1)) + ")"
+    found: dict[int, list[sqlite3.Row]] = {}
+    for row in conn.execute(sql.format(tokens=", ".join([row_sql] * len(tokens))), params):
+        found.setdefault(row[0], []).append(row)
+    return found
+
+
+def _node_dict(row: sqlite3.Row) -> dict:
+    """Materialize a candidate's node row, minus any batched lookup's ``token_i``."""
+    node = dict(row)
+    node.pop("token_i", None)
+    return node
+
+
 def match_log_to_node(
     conn: sqlite3.Connection,
     log_analysis: LogAnalysis,
@@ -52,130 +178,101 @@ def match_log_to_node(
     if forced_proc:
         forced_proc = forced_proc.lower()
         row = conn.execute(
-            "SELECT * FROM nodes WHERE type = 'proc' AND (key = ? OR key LIKE ?)",
-            (f"proc:{forced_proc}", f"proc:{forced_proc}%")
+            _SQL_PROCS_BY_KEY_RANGE, _key_range(f"proc:{forced_proc}")
         ).fetchone()
         if row:
             return dict(row), 1.0, None
         # Try partial match
-        row = conn.execute(
-            "SELECT * FROM nodes WHERE type = 'proc' AND key LIKE ?",
-            (f"%{forced_proc}%",)
-        ).fetchone()
+        row = conn.execute(_SQL_PROC_BY_KEY_INFIX, (f"%{forced_proc}%",)).fetchone()
         if row:
             return dict(row), 0.9, None
         return None, 0.0, None
 
     candidates: dict[int, MatchCandidate] = {}
 
-    def add_candidate(node: dict, strategy: str, score: float):
+    def add_candidate(node: sqlite3.Row, strategy: str, score: float):
         node_id = node["id"]
         if node_id not in candidates:
             candidates[node_id] = MatchCandidate(node=node)
         candidates[node_id].add_score(strategy, score)
 
-    # Strategy 1: PREFIX= token match (strongest signal)
-    for prefix in log_analysis.prefix_tokens:
-        rows = conn.execute(
-            "SELECT * FROM nodes WHERE type = 'proc' AND key = ?",
-            (f"proc:{prefix}",)
-        ).fetchall()
-        for row in rows:
-            add_candidate(dict(row), f"prefix_exact:{prefix}", 2.0)
-
-        # Also try partial match for PREFIX
-        if not rows:
-            rows = conn.execute(
-                "SELECT * FROM nodes WHERE type = 'proc' AND key LIKE ?",
-                (f"proc:{prefix}%",)
-            ).fetchall()
-            for row in rows:
-                add_candidate(dict(row), f"prefix_partial:{prefix}", 1.5)
-
-    # Strategy 2: Script path match
-    for script_path in log_analysis.script_paths:
-        script_name = Path(script_path).name
-        # Find procs that RUNS this script
-        rows = conn.execute(
-            """
-            SELECT p.* FROM nodes p
-            JOIN edges e ON p.id = e.src
-            JOIN nodes s ON e.dst = s.id
-            WHERE p.type = 'proc'
-            AND s.type = 'script'
-            AND e.rel_type = 'RUNS'
-            AND (s.display_name = ? OR s.original_path LIKE ?)
-            """,
-            (script_name, f"%{script_name}")
-        ).fetchall()
-        for row in rows:
-            add_candidate(dict(row), f"script:{script_name}", 1.2)
+    # Strategy 1: PREFIX= token match (strongest signal); prefixes without
+    # an exact match fall back to a partial one
+    prefixes = log_analysis.prefix_tokens
+    exact = _nodes_by_token(conn, _SQL_PREFIX_EXACT, [(prefix,) for prefix in prefixes])
+    unmatched = [i for i in range(len(prefixes)) if i not in exact]
+    partial = _nodes_by_token(
+        conn, _SQL_PREFIX_PARTIAL, [_key_range(f"proc:{prefixes[i]}") for i in unmatched]
+    )
+    partial = {unmatched[j]: nodes for j, nodes in partial.items()}
+    for i, prefix in enumerate(prefixes):
+        for node in exact.get(i, []):
+            add_candidate(node, f"prefix_exact:{prefix}", 2.0)
+        for node in partial.get(i, []):
+            add_candidate(node, f"prefix_partial:{prefix}", 1.5)
+
+    # Strategy 2: Script path match (procs that RUNS the script)
+    script_names = [Path(script_path).name for script_path in log_analysis.script_paths]
+    by_script = _nodes_by_token(conn, _SQL_SCRIPT_RUNNERS, [(name,) for name in script_names])
+    for i, script_name in enumerate(script_names):
+        for node in by_script.get(i, []):
+            add_candidate(node, f"script:{script_name}", 1.2)
 
     # Strategy 3: Extract proc name from log path
     proc_name = extract_proc_name_from_log_path(log_path)
     if proc_name:
         # Exact match first
-        rows = conn.execute(
-            "SELECT * FROM nodes WHERE type = 'proc' AND key = ?",
-            (f"proc:{proc_name}",)
-        ).fetchall()
+        rows = conn.execute(_SQL_PROC_BY_KEY, (f"proc:{proc_name}",)).fetchall()
         for row in rows:
-            add_candidate(dict(row), f"path_exact:{proc_name}", 1.0)
+            add_candidate(row, f"path_exact:{proc_name}", 1.0)
 
         # Try base proc name (strip cycle digits): bkfnds1122 -> bkfnds1
         if not rows:
             base_name = extract_base_proc_name(proc_name)
             if base_name and base_name != proc_name:
-                rows = conn.execute(
-                    "SELECT * FROM nodes WHERE type = 'proc' AND key = ?",
-                    (f"proc:{base_name}",)
-                ).fetchall()
+                rows = conn.execute(_SQL_PROC_BY_KEY, (f"proc:{base_name}",)).fetchall()
                 for row in rows:
-                    add_candidate(dict(row), f"path_base:{base_name}", 0.9)
+                    add_candidate(row, f"path_base:{base_name}", 0.9)
 
         # Partial match as fallback
         if not rows:
             rows = conn.execute(
-                "SELECT * FROM nodes WHERE type = 'proc' AND key LIKE ?",
-                (f"proc:{proc_name}%",)
+                _SQL_PROCS_BY_KEY_RANGE, _key_range(f"proc:{proc_name}")
             ).fetchall()
             for row in rows:
-                add_candidate(dict(row), f"path_partial:{proc_name}", 0.7)
+                add_candidate(row, f"path_partial:{proc_name}", 0.7)
 
     # Strategy 4: JID token match
-    for jid in log_analysis.jid_tokens:
-        rows = conn.execute(
-            "SELECT * FROM nodes WHERE type = 'proc' AND key LIKE ?",
-            (f"%{jid}%",)
-        ).fetchall()
-        for row in rows:
-            add_candidate(dict(row), f"jid:{jid}", 0.5)
+    by_jid = _nodes_by_token(conn, _SQL_JIDS, [(jid,) for jid in log_analysis.jid_tokens])
+    for i, jid in enumerate(log_analysis.jid_tokens):
+        for node in by_jid.get(i, []):
+            add_candidate(node, f"jid:{jid}", 0.5)
 
     # Strategy 5: CID match (lowest weight - too general)
     cid = extract_cid_from_log_path(log_path)
     if cid:
-        rows = conn.execute(
-            "SELECT * FROM nodes WHERE type = 'proc' AND key LIKE ?",
-            (f"proc:{cid}%",)
-        ).fetchall()
+        rows = conn.execute(_SQL_PROCS_BY_KEY_RANGE, _key_range(f"proc:{cid}")).fetchall()
         for row in rows:
-            add_candidate(dict(row), f"cid:{cid}", 0.3)
+            add_candidate(row, f"cid:{cid}", 0.3)
 
     if not candidates:
         return None, 0.0, [] if debug else None
 
-    # Sort candidates by total score
-    sorted_candidates = sorted(
-        candidates.values(),
-        key=lambda c: -c.total_score
-    )
+    # Rank by total score; ties keep the order candidates were found in
+    by_score = attrgetter("total_score")
+    if debug:
+        debug_result = heapq.nlargest(10, candidates.values(), key=by_score)
+        best = debug_result[0]
+    else:
+        debug_result = None
+        best = max(candidates.values(), key=by_score)
 
     # Normalize confidence to 0-1 range
-    best = sorted_candidates[0]
     max_possible = 2.0 + 1.2 + 1.0  # If all strategies match
     confidence = min(1.0, best.total_score / max_possible)
 
-    debug_result = sorted_candidates[:10] if debug else None
+    for candidate in debug_result or [best]:
+        candidate.node = _node_dict(candidate.node)
     return best.node, confidence, debug_result
 
 
@@ -193,46 +290,22 @@ def get_node_neighbors(
         hops: Number of hops to traverse (default 1)
 
     Returns:
-        Dict with 'upstream' and 'downstream' lists
+        Dict with 'upstream' and 'downstream' lists, nearest first. Each
+        entry carries the edge's 'depth' (1 for direct neighbours); a node
+        reachable along several paths is listed once per edge reaching it.
     """
-    upstream = []
-    downstream = []
-
-    # Get upstream (nodes that point TO this node)
-    rows = conn.execute(
-        """
-        SELECT n.*, e.rel_type, e.confidence, e.evidence_json
-        FROM nodes n
-        JOIN edges e ON n.id = e.src
-        WHERE e.dst = ?
-        """,
-        (node_id,)
-    ).fetchall()
-    for row in rows:
-        upstream.append({
-            "node": dict(row),
-            "rel_type": row["rel_type"],
-            "confidence": row["confidence"],
-            "evidence": row["evidence_json"],
-        })
-
-    # Get downstream (nodes that this node points TO)
-    rows = conn.execute(
-        """
-        SELECT n.*, e.rel_type, e.confidence, e.evidence_json
-        FROM nodes n
-        JOIN edges e ON n.id = e.dst
-        WHERE e.src = ?
-        """,
-        (node_id,)
-    ).fetchall()
-    for row in rows:
-        downstream.append({
-            "node": dict(row),
+    neighbors: tuple[list, list] = ([], [])
+    for row in conn.execute(_SQL_NEIGHBORS, {"node_id": node_id, "hops": hops}):
+        node = dict(row)
+        del node["edge_id"]
+        neighbors[node.pop("direction")].append({
+            "node": node,
             "rel_type": row["rel_type"],
             "confidence": row["confidence"],
             "evidence": row["evidence_json"],
+            "depth": node.pop("depth"),
         })
+    upstream, downstream = neighbors
 
     return {
         "upstream": upstream,
@@ -242,19 +315,13 @@ def get_node_neighbors(
 
 def get_node_by_id(conn: sqlite3.Connection, node_id: int) -> dict | None:
     """Get a node by its ID."""
-    row = conn.execute(
-        "SELECT * FROM nodes WHERE id = ?",
-        (node_id,)
-    ).fetchone()
+    row = conn.execute(_SQL_NODE_BY_ID, (node_id,)).fetchone()
     return dict(row) if row else None
 
 
 def get_node_by_key(conn: sqlite3.Connection, key: str) -> dict | None:
     """Get a node by its key."""
-    row = conn.execute(
-        "SELECT * FROM nodes WHERE key = ?",
-        (key,)
-    ).fetchone()
+    row = conn.execute(_SQL_NODE_BY_KEY, (key,)).fetchone()
     return dict(row) if row else None
 
 
@@ -268,21 +335,12 @@ def get_related_files(
 
     Returns actual file paths in the snapshot.
     """
-    files = []
+    rows = conn.execute(_SQL_RELATED_PATHS, (node_id, node_id)).fetchall()
 
-    # Get the node itself
-    node = get_node_by_id(conn, node_id)
-    if node and node["canonical_path"]:
-        file_path = snapshot_path / node["canonical_path"]
-        if file_path.exists():
-            files.append(str(file_path))
-
-    # Get downstream resources
-    neighbors = get_node_neighbors(conn, node_id)
-    for neighbor in neighbors["downstream"]:
-        n = neighbor["node"]
-        if n["canonical_path"]:
-            file_path = snapshot_path / n["canonical_path"]
+    files = []
+    for (canonical_path,) in rows:
+        if canonical_path:
+            file_path = snapshot_path / canonical_path
             if file_path.exists():
                 files.append(str(file_path))
 
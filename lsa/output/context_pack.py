@@ -1,7 +1,10 @@
 """Context pack generator for LSA."""
 
+import heapq
 import re
 from datetime import datetime
+from itertools import chain, islice
+from operator import attrgetter
 from pathlib import Path
 
 from ..config import MAX_CONTEXT_PACK_LINES, MAX_EVIDENCE_SNIPPET
@@ -12,6 +15,16 @@ from ..analysis.similarity import SimilarCase
 # Only formal Papyrus/AFP codes belong in the decoded section
 _FORMAL_CODE_RE = re.compile(r"^(?:PP[A-Z]{2}\d{4}[A-Z]|AFPR\d{4}[A-Z])$", re.IGNORECASE)
 
+# Decoded codes are listed fatal first, then errors, then everything else
+_CODE_SEVERITY_ORDER = {"F": 0, "E": 1}
+_CODE_SEVERITY_NAMES = {"I": "Info", "W": "Warning", "E": "Error", "F": "Fatal"}
+_SIGNAL_SEVERITY_NAMES = {"F": "FATAL", "E": "ERROR", "W": "WARNING", "I": "INFO"}
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Cut ``text`` to ``limit`` characters, marking the cut with "..."."""
+    return text[:limit] + "..." if len(text) > limit else text
+
 
 def generate_context_pack(
     log_path: Path,
@@ -96,10 +109,7 @@ def generate_context_pack(
     error_signals = log_analysis.error_signals[:8]
     if error_signals:
         for signal in error_signals:
-            msg = signal.message
-            if len(msg) > MAX_EVIDENCE_SNIPPET:
-                msg = msg[:MAX_EVIDENCE_SNIPPET] + "..."
-            lines.append(f"L{signal.line_number}: {msg}")
+            lines.append(f"L{signal.line_number}: {_truncate(signal.message, MAX_EVIDENCE_SNIPPET)}")
     else:
         lines.append("No error signals found in log")
 
@@ -109,11 +119,11 @@ def generate_context_pack(
 
     # 2b. PAPYRUS/DOCEXEC CODES (decoded) — only shown when formal codes are present
     # Only show formal Papyrus/AFP codes — custom text signals belong in section 2, not here
-    formal_codes = [c for c in log_analysis.error_codes if _FORMAL_CODE_RE.match(c)]
-    fatal_codes = [c for c in formal_codes if c.upper().endswith('F')]
-    error_codes = [c for c in formal_codes if c.upper().endswith('E')]
-    other_formal = [c for c in formal_codes if not c.upper().endswith('F') and not c.upper().endswith('E')]
-    codes_to_show = (fatal_codes + error_codes + other_formal)[:10]
+    buckets: tuple[list[str], list[str], list[str]] = ([], [], [])
+    for c in log_analysis.error_codes:
+        if _FORMAL_CODE_RE.match(c):
+            buckets[_CODE_SEVERITY_ORDER.get(c[-1].upper(), 2)].append(c)
+    codes_to_show = (buckets[0] + buckets[1] + buckets[2])[:10]
 
     if codes_to_show:
         lines.append("-" * 40)
@@ -122,13 +132,9 @@ def generate_context_pack(
         for code in codes_to_show:
             if decoded_codes and code in decoded_codes:
                 entry = decoded_codes[code]
-                severity_name = {"I": "Info", "W": "Warning", "E": "Error", "F": "Fatal"}.get(
-                    entry.get("severity", "I"), "Unknown"
-                )
+                severity_name = _CODE_SEVERITY_NAMES.get(entry.get("severity", "I"), "Unknown")
                 title = entry.get("title") or ""
-                body = entry.get("body", "")[:150]
-                if len(entry.get("body", "")) > 150:
-                    body += "..."
+                body = _truncate(entry.get("body", ""), 150)
                 lines.append(f"{code} [{severity_name}]")
                 if title:
                     lines.append(f"  Title: {title}")
@@ -186,19 +192,13 @@ def generate_context_pack(
         lines.append("2d. EXTERNAL CONFIG SIGNALS")
         lines.append("-" * 40)
 
-        # Sort by severity (F > E > W > I) and show top 5
-        sorted_signals = sorted(
-            log_analysis.external_signals,
-            key=lambda s: -s.severity_rank
-        )[:5]
+        # Top 5 by severity (F > E > W > I), ties in log order
+        top_signals = heapq.nlargest(
+            5, log_analysis.external_signals, key=attrgetter("severity_rank")
+        )
 
-        for ext_signal in sorted_signals:
-            severity_name = {
-                "F": "FATAL",
-                "E": "ERROR",
-                "W": "WARNING",
-                "I": "INFO",
-            }.get(ext_signal.severity, "UNKNOWN")
+        for ext_signal in top_signals:
+            severity_name = _SIGNAL_SEVERITY_NAMES.get(ext_signal.severity, "UNKNOWN")
 
             lines.append(f"[{severity_name}] {ext_signal.id} ({ext_signal.category})")
 
@@ -211,10 +211,7 @@ def generate_context_pack(
 
             # Show evidence lines (max 3)
             for ev in ext_signal.evidence[:3]:
-                line_text = ev.line_text
-                if len(line_text) > 100:
-                    line_text = line_text[:100] + "..."
-                lines.append(f"  L{ev.line_no}: {line_text}")
+                lines.append(f"  L{ev.line_no}: {_truncate(ev.line_text, 100)}")
 
         # Show services detected
         if log_analysis.services_seen:
@@ -293,14 +290,18 @@ def generate_context_pack(
     lines.append("END OF CONTEXT PACK")
     lines.append("=" * 60)
 
-    # Truncate if too long
-    result = "\n".join(lines)
-    result_lines = result.split("\n")
-    if len(result_lines) > MAX_CONTEXT_PACK_LINES:
-        result_lines = result_lines[:MAX_CONTEXT_PACK_LINES - 3]
-        result_lines.append("...")
-        result_lines.append(f"[Truncated - {len(lines)} total lines]")
-        result_lines.append("=" * 60)
-        result = "\n".join(result_lines)
-
-    return result
+    # Truncate if too long. Entries may span several output lines (log text,
+    # case card fields), so count newlines rather than entries, and only
+    # split entries apart when the pack actually has to be cut.
+    output_lines = len(lines) + sum(line.count("\n") for line in lines)
+    if output_lines <= MAX_CONTEXT_PACK_LINES:
+        return "\n".join(lines)
+
+    result_lines = list(islice(
+        chain.from_iterable(line.split("\n") for line in lines),
+        MAX_CONTEXT_PACK_LINES - 3,
+    ))
+    result_lines.append("...")
+    result_lines.append(f"[Truncated - {len(lines)} total lines]")
+    result_lines.append("=" * 60)
+    return "\n".join(result_lines)
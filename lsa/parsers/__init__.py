@@ -1,6 +1,6 @@
 """Parsers module for LSA."""
 
-from .procs_parser import parse_procs_file, ProcsData
+from .procs_parser import parse_procs_file, parse_procs_file_safe, ProcsData
 from .log_parser import parse_log_file, LogSignal
 from .history_parser import parse_history_file, CaseCard
 from .pdf_parser import (
@@ -11,7 +11,7 @@ from .pdf_parser import (
 )
 
 __all__ = [
-    "parse_procs_file", "ProcsData",
+    "parse_procs_file", "parse_procs_file_safe", "ProcsData",
     "parse_log_file", "LogSignal",
     "parse_history_file", "CaseCard",
     "parse_pdf_file", "parse_pdf_file_safe",
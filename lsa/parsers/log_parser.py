@@ -6,6 +6,9 @@ from pathlib import Path
 
 from . import patterns
 
+# Shared encoder for to_json()
+_json_encode = json.JSONEncoder(ensure_ascii=False).encode
+
 
 @dataclass
 class LogSignal:
@@ -57,7 +60,7 @@ class LogAnalysis:
 
     def to_json(self) -> str:
         """Serialize to JSON."""
-        return json.dumps(
+        return _json_encode(
             {
                 "path": self.path,
                 "total_lines": self.total_lines,
@@ -68,7 +71,6 @@ class LogAnalysis:
                 "script_refs": self.script_refs,
                 "top_errors": [s.to_dict() for s in self.error_signals[:10]],
             },
-            ensure_ascii=False,
         )
 
 
@@ -1,11 +1,14 @@
 """Parser for .procs files."""
 
 import json
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from pathlib import Path
 
 from . import patterns
 
+# Reused encoder: json.dumps builds a new one per call for non-default options
+_json_encode = json.JSONEncoder(ensure_ascii=False).encode
+
 
 @dataclass
 class ProcsData:
@@ -38,7 +41,8 @@ class ProcsData:
 
     def to_json(self) -> str:
         """Serialize to JSON."""
-        return json.dumps(asdict(self), ensure_ascii=False)
+        # Fields are flat (str/int/list[str]), so skip asdict's deep copy
+        return _json_encode({f.name: getattr(self, f.name) for f in fields(self)})
 
     @classmethod
     def from_json(cls, json_str: str) -> "ProcsData":
@@ -52,6 +56,21 @@ def _find_line_number(text: str, match_start: int) -> int:
     return text[:match_start].count("\n") + 1
 
 
+def parse_procs_file_safe(file_path: Path) -> tuple[ProcsData | None, str | None]:
+    """
+    Parse a .procs file, returning the error instead of raising.
+
+    Used as scan's process-pool worker, so the result must pickle.
+
+    Returns:
+        Tuple of (data, error) where data is None if parsing failed
+    """
+    try:
+        return parse_procs_file(file_path), None
+    except Exception as e:
+        return None, str(e)
+
+
 def parse_procs_file(file_path: Path) -> ProcsData:
     """
     Parse a .procs file and extract structured data.
@@ -107,9 +126,11 @@ def parse_procs_file(file_path: Path) -> ProcsData:
         data.file_setup_line = _find_line_number(text, match.start())
 
     # Extract print files (can be multiple)
+    seen_print_files = set()
     for match in patterns.PROCS_PRINT_FILES.finditer(text):
         path = match.group(1).strip()
-        if path not in data.print_files:
+        if path not in seen_print_files:
+            seen_print_files.add(path)
             data.print_files.append(path)
 
     # Extract input location
@@ -118,9 +139,11 @@ def parse_procs_file(file_path: Path) -> ProcsData:
         data.input_location = match.group(1).strip()
 
     # Extract cross-references to other .procs files
+    seen_refs = set()
     for match in patterns.PROCS_CROSSREF.finditer(text):
         ref = match.group(1).strip()
-        if ref not in data.cross_refs:
+        if ref not in seen_refs:
+            seen_refs.add(ref)
             data.cross_refs.append(ref)
 
     # Extract all absolute paths
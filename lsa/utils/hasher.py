@@ -8,11 +8,8 @@ from ..config import MAX_TEXT_SIZE, TEXT_EXTENSIONS, METADATA_ONLY_EXTENSIONS
 
 def compute_sha256(file_path: Path) -> str:
     """Compute SHA256 hash of a file."""
-    sha256 = hashlib.sha256()
     with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            sha256.update(chunk)
-    return sha256.hexdigest()
+        return hashlib.file_digest(f, "sha256").hexdigest()
 
 
 def is_text_file(file_path: Path) -> bool:
@@ -54,3 +51,25 @@ def try_read_text(file_path: Path, max_size: int = MAX_TEXT_SIZE) -> str | None:
         return content
     except (UnicodeDecodeError, OSError):
         return None
+
+
+def read_text_and_sha256(
+    file_path: Path, max_size: int = MAX_TEXT_SIZE,
+) -> tuple[str, str] | None:
+    """Read a file once, returning ``(text, sha256)`` if it is UTF-8 text.
+
+    Same result as try_read_text + compute_sha256 without reading the file
+    twice: the hash covers the raw bytes, and newlines are translated as in
+    text mode. Returns None if the file is too large or not valid text.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read(max_size + 1)
+        if len(data) > max_size:
+            return None
+        text = data.decode("utf-8")
+    except (UnicodeDecodeError, OSError):
+        return None
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text, hashlib.sha256(data).hexdigest()
@@ -11,13 +11,16 @@ import subprocess
 import tempfile
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
+if TYPE_CHECKING:
+    from lsa.db import ConnectionPool
+
 app = FastAPI(title="LSA Web UI")
 
 _LOCAL_ORIGIN_HOSTS = {"localhost", "127.0.0.1", "::1"}
@@ -82,17 +85,28 @@ def _sanitize_component(value: str) -> str:
     return cleaned
 
 
-def _open_connection(snapshot: Path) -> sqlite3.Connection:
-    """Open a connection to snapshot DB."""
+# Read-only connection pools keyed by database path, reused across requests
+_pools: dict[Path, ConnectionPool] = {}
+
+
+def _open_connection(snapshot: Path):
+    """Borrow a pooled read-only connection to the snapshot DB (use with ``with``)."""
     from lsa.config import get_db_path
+    from lsa.db import ConnectionPool
     db_path = get_db_path(snapshot)
     if not db_path.exists():
         raise HTTPException(404, f"No database at {db_path}")
-    conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA foreign_keys=ON")
-    return conn
+    db_path = db_path.resolve()
+    pool = _pools.get(db_path)
+    if pool is None:
+        pool = _pools[db_path] = ConnectionPool(db_path)
+    return pool.reader()
+
+
+def _close_pools_under(directory: Path) -> None:
+    """Close pooled connections to databases inside ``directory``."""
+    for db_path in [p for p in _pools if p.is_relative_to(directory)]:
+        _pools.pop(db_path).close()
 
 
 # --- Static files ---
@@ -256,8 +270,7 @@ def _normalized_contents(artifacts: dict[str, int]) -> dict[str, int]:
 
 def _get_snapshot_stats(snap_dir: Path) -> dict:
     """Get stats for a snapshot."""
-    conn = _open_connection(snap_dir)
-    try:
+    with _open_connection(snap_dir) as conn:
         rows = conn.execute(
             "SELECT kind, COUNT(*) as cnt FROM artifacts GROUP BY kind"
         ).fetchall()
@@ -299,8 +312,6 @@ def _get_snapshot_stats(snap_dir: Path) -> dict:
             "recent_case_cards": [dict(row) for row in recent_case_cards],
             "message_codes": message_codes,
         }
-    finally:
-        conn.close()
 
 
 @app.delete("/api/snapshot")
@@ -323,6 +334,7 @@ async def delete_snapshot(path: str = Query(...)):
     if _snapshot_path and snap == _snapshot_path.resolve():
         _snapshot_path = None
 
+    _close_pools_under(snap)
     shutil.rmtree(snap)
 
     return {"status": "deleted", "path": str(snap)}
@@ -571,8 +583,7 @@ _last_candidates: list = []
 async def plan(req: PlanRequest):
     global _last_intent, _last_candidates
     snapshot = _get_snapshot()
-    conn = _open_connection(snapshot)
-    try:
+    with _open_connection(snapshot) as conn:
         from lsa.analysis.planner import generate_plan, format_plan_json
         intent, candidates = generate_plan(
             conn, snapshot,
@@ -591,15 +602,13 @@ async def plan(req: PlanRequest):
                 "score": c.score,
                 "score_breakdown": c.score_breakdown,
                 "files": [
-                    {"kind": f.kind, "path": f.path, "abs_path": str(snapshot / f.path)}
+                    {"kind": f.kind, "path": f.path, "abs_path": f.abs_path or str(snapshot / f.path)}
                     for f in c.files
                 ],
             }
             for c in candidates
         ]
         return result
-    finally:
-        conn.close()
 
 
 @app.post("/api/plan/mermaid")
@@ -623,9 +632,9 @@ async def plan_mermaid(req: MermaidRequest):
 @app.get("/api/file")
 async def read_file(path: str = Query(...)):
     """Read a file from the snapshot."""
-    snapshot = _get_snapshot()
+    snapshot = _get_snapshot().resolve()
     file_path = (snapshot / path).resolve()
-    if not file_path.is_relative_to(snapshot.resolve()):
+    if not file_path.is_relative_to(snapshot):
         raise HTTPException(403, "Path traversal not allowed")
     if not file_path.exists():
         raise HTTPException(404, f"File not found: {path}")
@@ -637,7 +646,7 @@ async def read_file(path: str = Query(...)):
     except Exception as e:
         raise HTTPException(500, f"Cannot read file: {e}")
 
-    rel = file_path.relative_to(snapshot.resolve())
+    rel = file_path.relative_to(snapshot)
     kind = rel.parts[0] if rel.parts else "unknown"
 
     return {
@@ -881,12 +890,9 @@ async def generate_prompt(req: PromptRequest):
     elif req.mode == "explain":
         if not req.error_text:
             raise HTTPException(400, "error_text is required for explain mode")
-        conn = _open_connection(snapshot)
-        try:
+        with _open_connection(snapshot) as conn:
             text = _run_explain_pipeline(conn, snapshot, req.error_text, req.lang)
             return {"prompt_text": text, "saved_path": None}
-        finally:
-            conn.close()
 
     else:
         raise HTTPException(400, f"Unknown mode: {req.mode}")
@@ -1182,7 +1188,8 @@ def _current_scope_paths(snapshot: Path, candidate_index: int) -> set[str]:
         return set()
     if candidate_index < 0 or candidate_index >= len(candidates):
         return set()
-    return {str((snapshot / f.path).resolve().relative_to(snapshot.resolve())) for f in candidates[candidate_index].files}
+    root = snapshot.resolve()
+    return {str((root / f.path).resolve().relative_to(root)) for f in candidates[candidate_index].files}
 
 
 def _search_message_codes(conn: sqlite3.Connection, query: str, limit: int) -> list[dict]:
@@ -1267,8 +1274,7 @@ async def search(
 ):
     """Search artifacts by path and content."""
     snapshot = _get_snapshot()
-    conn = _open_connection(snapshot)
-    try:
+    with _open_connection(snapshot) as conn:
         scope_paths = _current_scope_paths(snapshot, candidate_index) if scope == "current" else set()
         file_results: list[dict[str, Any]] = []
         knowledge_results: list[dict[str, Any]] = []
@@ -1293,8 +1299,6 @@ async def search(
             file_limit = max(5, limit - knowledge_limit)
             results = [*knowledge_results[:knowledge_limit], *file_results[:file_limit]][:limit]
         return results
-    finally:
-        conn.close()
 
 
 def _search_fts(
@@ -1349,20 +1353,21 @@ def _search_like(
     scope_clause = ""
     if scope_paths:
         placeholders = ", ".join("?" for _ in scope_paths)
-        scope_clause = f" AND path IN ({placeholders})"
+        scope_clause = f" AND a.path IN ({placeholders})"
         params.extend(sorted(scope_paths))
     params.extend(kind_params)
     params.extend([pattern, limit])
     rows = conn.execute(
         f"""
-        SELECT path, kind, substr(text_content, 1, 100) as snippet
-        FROM artifacts
-        WHERE (path LIKE ? OR text_content LIKE ?)
+        SELECT a.path, a.kind, substr(c.text_content, 1, 100) as snippet
+        FROM artifacts a
+        LEFT JOIN artifact_contents c ON c.artifact_id = a.id
+        WHERE (a.path LIKE ? OR c.text_content LIKE ?)
         {scope_clause}
-        {kind_clause.replace('a.kind', 'kind')}
+        {kind_clause}
         ORDER BY
-            CASE WHEN path LIKE ? THEN 0 ELSE 1 END,
-            path
+            CASE WHEN a.path LIKE ? THEN 0 ELSE 1 END,
+            a.path
         LIMIT ?
         """,
         tuple(params),
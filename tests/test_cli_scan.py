@@ -0,0 +1,70 @@
+"""Tests for the CLI snapshot scan."""
+
+import os
+
+import lsa.cli
+from lsa.cli import _list_scan_files, _parse_procs_files, _scandir_recursive
+from lsa.utils.hasher import compute_sha256, read_text_and_sha256, try_read_text
+
+
+def test_scandir_recursive_matches_rglob_order(tmp_path):
+    for rel in ("b/x.sh", "a/deep/y.procs", "a/z.ins", "top.control", "c/w.dfa"):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x\n")
+    (tmp_path / "b" / "loop").symlink_to(tmp_path / "a")
+
+    walked = [entry.path for entry in _scandir_recursive(tmp_path)]
+    expected = [str(p) for p in tmp_path.rglob("*") if not p.is_dir() or p.is_symlink()]
+    assert walked == expected
+    assert len(walked) == 6  # symlinked directory is yielded, not followed
+
+
+def test_read_text_and_sha256_matches_separate_reads(tmp_path):
+    text_file = tmp_path / "crlf.sh"
+    text_file.write_bytes(b"echo a\r\necho b\rlast \xc3\xa9\n")
+    binary_file = tmp_path / "blob"
+    binary_file.write_bytes(b"\xff\xfe\x00")
+
+    assert read_text_and_sha256(text_file) == (
+        try_read_text(text_file), compute_sha256(text_file),
+    )
+    assert read_text_and_sha256(binary_file) is None
+    assert read_text_and_sha256(text_file, max_size=4) is None
+
+
+def test_scandir_recursive_skips_non_directory_root(tmp_path):
+    not_a_dir = tmp_path / "logs"
+    not_a_dir.write_text("x\n")
+
+    assert list(_scandir_recursive(not_a_dir)) == []
+    assert list(_scandir_recursive(tmp_path / "missing")) == []
+
+
+def test_parse_procs_files_pool_matches_serial(tmp_path, monkeypatch):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"wccuds{i}.procs"
+        path.write_text(f"CID : WCCU\nProcessing Shell Script: /home/master/wccuds{i}.sh\n")
+        paths.append(path)
+    paths.append(tmp_path / "missing.procs")
+
+    serial = list(_parse_procs_files(paths))
+    monkeypatch.setattr(lsa.cli, "SCAN_PROCS_PARALLEL_MIN", 1)
+    monkeypatch.setattr(lsa.cli.os, "cpu_count", lambda: 2)
+    pooled = list(_parse_procs_files(paths))
+
+    assert pooled == serial
+    assert [data.shell_script for data, _ in serial[:4]] == [
+        f"/home/master/wccuds{i}.sh" for i in range(4)
+    ]
+
+
+def test_list_scan_files_prunes_skipped_directories(tmp_path):
+    for rel in ("run.sh", ".git/objects/ab", "sub/__pycache__/m.pyc", "sub/node_modules/x.sh", "sub/keep.sh"):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x\n")
+
+    listed = [os.path.relpath(e.path, tmp_path) for e in _list_scan_files(tmp_path)]
+    assert listed == ["run.sh", os.path.join("sub", "keep.sh")]
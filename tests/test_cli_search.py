@@ -1,8 +1,10 @@
-"""Tests for CLI FTS search error reporting."""
+"""Tests for CLI search."""
 
 import sqlite3
 
-from lsa.cli import _search_fts
+from lsa.cli import _search_cascade, _search_fts, _search_path_only
+from lsa.db import get_connection, init_db
+from lsa.db.connection import insert_artifact
 
 
 def test_search_fts_warns_and_returns_empty_on_operational_error(capsys):
@@ -12,3 +14,55 @@ def test_search_fts_warns_and_returns_empty_on_operational_error(capsys):
     out = capsys.readouterr().out
     assert "FTS query" in out
     assert "Warning" in out
+
+
+def test_search_cascade_returns_first_strategy_with_rows(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    with get_connection(db) as conn:
+        insert_artifact(conn, kind="script", path="master/loan_run.sh", mtime=0.0, size=1,
+                        text_content="echo start")
+        insert_artifact(conn, kind="script", path="master/other.sh", mtime=0.0, size=1,
+                        text_content="call loan_run now")
+
+        rows, method = _search_cascade(conn, "loan_run", 10)
+        assert method == "path_substring"
+        assert [r["path"] for r in rows] == ["master/loan_run.sh"]
+
+        rows, method = _search_cascade(conn, "start", 10)
+        assert method == "fts_exact"
+        assert [r["path"] for r in rows] == ["master/loan_run.sh"]
+
+        assert _search_cascade(conn, "nothing-here", 10) is None  # invalid FTS syntax
+
+
+def test_search_path_only_uses_trigram_index_and_falls_back(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    with get_connection(db) as conn:
+        for path in ("master/WABC_Loan.sh", "master/wabcxloan.sh", "procs/other.procs"):
+            insert_artifact(conn, kind="script", path=path, mtime=0.0, size=1)
+
+        # LIKE semantics: ASCII case-insensitive, "_" matches any character
+        expected = ["master/WABC_Loan.sh", "master/wabcxloan.sh"]
+        assert [r["path"] for r in _search_path_only(conn, "wabc_loan", 10)] == expected
+
+        conn.executescript(
+            "DROP TRIGGER artifacts_path_ai; DROP TRIGGER artifacts_path_ad;"
+            "DROP TRIGGER artifacts_path_au; DROP TABLE artifacts_path_fts;"
+        )
+        assert [r["path"] for r in _search_path_only(conn, "wabc_loan", 10)] == expected
+
+
+def test_search_cascade_skips_content_scan_for_short_queries(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    with get_connection(db) as conn:
+        insert_artifact(conn, kind="script", path="master/run.sh", mtime=0.0, size=1,
+                        text_content="abcdqz")
+
+        assert _search_cascade(conn, "dq", 10) == ([], "like_full")
+
+        rows, method = _search_cascade(conn, "dqz", 10)
+        assert method == "like_full"
+        assert [r["path"] for r in rows] == ["master/run.sh"]
@@ -155,6 +155,29 @@ class TestDecodedCodesSection:
         assert f_pos < e_pos, f"Fatal ({f_pos}) should be before Error ({e_pos})"
         assert e_pos < i_pos, f"Error ({e_pos}) should be before Info ({i_pos})"
 
+    def test_lowercase_severity_suffix_prioritized(self, tmp_path):
+        """Severity suffixes are compared case-insensitively; ties keep log order."""
+        log_analysis = make_log_analysis(
+            error_codes=["PPCS1001I", "ppde2001e", "PPCS1002E", "afpr9999f", "XYZ1"]
+        )
+
+        context_pack = generate_context_pack(
+            log_path=Path("/test/sample.log"),
+            log_analysis=log_analysis,
+            top_node=None,
+            confidence=0.0,
+            neighbors=None,
+            hypotheses=[],
+            similar_cases=[],
+            related_files=[],
+            snapshot_path=tmp_path,
+            decoded_codes={},
+        )
+
+        section = context_pack[context_pack.find("2b. PAPYRUS"):context_pack.find("3. SIMILAR")]
+        shown = [line.split(" - ")[0] for line in section.splitlines() if "UNKNOWN CODE" in line]
+        assert shown == ["afpr9999f", "ppde2001e", "PPCS1002E", "PPCS1001I"]
+
     def test_no_codes_section_absent_when_empty(self, tmp_path):
         """Section 3b should be absent entirely when no formal codes are found."""
         log_analysis = make_log_analysis(error_codes=[])
@@ -365,3 +388,32 @@ class TestContextPackStructure:
         assert positions["EVIDENCE"] < positions["CODES"]
         assert positions["CODES"] < positions["FILES_LOG"]
         assert positions["FILES_LOG"] < positions["HYPOTHESES"]
+
+    def test_truncation_counts_embedded_newlines(self, tmp_path, monkeypatch):
+        """The line limit applies to output lines, not to entries."""
+        import lsa.output.context_pack as context_pack_module
+
+        def pack(message: str) -> str:
+            log_analysis = make_log_analysis()
+            log_analysis.error_signals = [LogSignal(line_number=1, message=message)]
+            return generate_context_pack(
+                log_path=Path("/test/sample.log"),
+                log_analysis=log_analysis,
+                top_node=None,
+                confidence=0.0,
+                neighbors=None,
+                hypotheses=[],
+                similar_cases=[],
+                related_files=[],
+                snapshot_path=tmp_path,
+            )
+
+        full = pack("one\ntwo").split("\n")
+        monkeypatch.setattr(context_pack_module, "MAX_CONTEXT_PACK_LINES", len(full))
+        assert pack("one\ntwo").split("\n") == full
+
+        truncated = pack("one\ntwo\nthree").split("\n")
+        assert len(truncated) == len(full)
+        assert truncated[:3] == full[:3]
+        # The message is one entry, so the pack has one entry fewer than lines
+        assert truncated[-3:-1] == ["...", f"[Truncated - {len(full) - 1} total lines]"]
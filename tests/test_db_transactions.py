@@ -1,9 +1,25 @@
 """Tests for connection-level commit/rollback and batched inserts."""
 
+import json
+import sqlite3
+
 import pytest
 
 from lsa.db import init_db
-from lsa.db.connection import get_connection, insert_artifact
+from lsa.db.connection import (
+    deferred_fts,
+    get_connection,
+    insert_artifact,
+    insert_artifacts,
+    insert_case_card,
+    insert_edge,
+    insert_edges,
+    insert_node,
+    insert_nodes,
+    insert_procs,
+    upsert_case_card,
+    upsert_incident,
+)
 
 
 def _count(db_path):
@@ -36,3 +52,326 @@ def test_insert_with_default_commit_persists(tmp_path):
     with get_connection(db) as conn:
         insert_artifact(conn, kind="script", path="a.sh", mtime=0.0, size=1)
     assert _count(db) == 1
+
+
+def test_insert_artifacts_batch_matches_single_inserts(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    with get_connection(db) as conn:
+        insert_artifact(conn, kind="docdef", path="docdef/WCCUDL014.dfa", mtime=0.0, size=1)
+        insert_artifacts(conn, [
+            ("script", "a.sh", None, None, 0.0, 1, "echo"),
+            ("docdef", "docdef/WCCUDL014.dfa", None, None, 1.0, 2, None),
+        ])
+        rows = conn.execute("SELECT id, kind, path, size FROM artifacts ORDER BY id").fetchall()
+        codes = conn.execute(
+            "SELECT artifact_id FROM docdef_codes WHERE code = 'WCCUDL014'"
+        ).fetchall()
+    # The re-inserted docdef is updated in place and keeps its id
+    assert [tuple(r)[1:] for r in rows] == [("docdef", "docdef/WCCUDL014.dfa", 2), ("script", "a.sh", 1)]
+    assert [r[0] for r in codes] == [rows[0]["id"]]
+
+
+def test_case_card_and_incident_writers_defer_commit(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    card = dict(source_path="h.md", title="t", signals_json=None, root_cause=None,
+                fix_summary=None, verify_commands_json=None, related_files_json=None,
+                tags_json=None, created_at="2026-01-01T00:00:00")
+    with get_connection(db) as conn:
+        insert_case_card(conn, chunk_id=0, **card, commit=False)
+        upsert_case_card(conn, chunk_id=1, **card, commit=False)
+        upsert_incident(conn, log_path="a.log", parsed_json="{}", top_node_id=None,
+                        top_node_key=None, confidence=None, hypotheses_json=None,
+                        similar_cases_json=None, created_at="2026-01-01T00:00:00",
+                        commit=False)
+        conn.rollback()
+        assert conn.execute("SELECT COUNT(*) FROM case_cards").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM incidents").fetchone()[0] == 0
+
+
+def _fts_triggers(conn):
+    return {r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'artifact%ai'"
+    )}
+
+
+def test_deferred_fts_indexes_new_rows_on_exit(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    with get_connection(db) as conn:
+        insert_artifact(conn, kind="script", path="old.sh", mtime=0.0, size=1,
+                        text_content="echo alpha", commit=False)
+        triggers = _fts_triggers(conn)
+        with deferred_fts(conn):
+            assert _fts_triggers(conn) == set()
+            insert_artifacts(conn, [
+                ("script", "old.sh", None, None, 0.0, 1, "echo beta"),
+                ("script", "new.sh", None, None, 0.0, 1, "echo beta"),
+                ("script", "bin", None, None, 0.0, 1, None),
+            ], commit=False)
+            insert_procs(conn, [("wccuds1", "procs/wccuds1.procs", '{"cid": "WCCU"}', None)], commit=False)
+        assert _fts_triggers(conn) == triggers
+        assert conn.execute("SELECT rowid FROM procs_fts WHERE procs_fts MATCH 'WCCU'").fetchall()
+
+        hits = conn.execute(
+            "SELECT a.path FROM artifacts_fts JOIN artifacts a ON a.id = artifacts_fts.rowid "
+            "WHERE artifacts_fts MATCH 'beta' ORDER BY a.path"
+        ).fetchall()
+        assert [r[0] for r in hits] == ["new.sh", "old.sh"]
+        paths = conn.execute(
+            "SELECT rowid FROM artifacts_path_fts WHERE path LIKE '%bin%'"
+        ).fetchall()
+        assert len(paths) == 1
+
+
+def test_deferred_fts_rolls_back_with_triggers(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    with pytest.raises(RuntimeError, match="boom"):
+        with get_connection(db) as conn:
+            with deferred_fts(conn):
+                insert_artifact(conn, kind="script", path="a.sh", mtime=0.0, size=1, commit=False)
+                raise RuntimeError("boom")
+    with get_connection(db) as conn:
+        assert _fts_triggers(conn) == {"artifact_contents_ai", "artifacts_path_ai"}
+    assert _count(db) == 0
+
+
+def test_get_connection_applies_tuning_pragmas(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    with get_connection(db) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_init_db_creates_database_in_wal_mode(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    conn = sqlite3.connect(db)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        conn.close()
+
+
+def test_connection_pool_reuses_read_only_readers(tmp_path):
+    from lsa.db import ConnectionPool
+
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    pool = ConnectionPool(db, readers=2)
+    try:
+        with pool.writer() as conn:
+            insert_artifact(conn, kind="script", path="a.sh", mtime=0.0, size=1, commit=False)
+        with pool.reader() as first:
+            assert first.execute("SELECT path FROM artifacts").fetchone()["path"] == "a.sh"
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                first.execute("DELETE FROM artifacts")
+        with pool.reader() as second:
+            assert second is first
+        with pytest.raises(RuntimeError):
+            with pool.writer() as conn:
+                insert_artifact(conn, kind="script", path="b.sh", mtime=0.0, size=1, commit=False)
+                raise RuntimeError("boom")
+    finally:
+        pool.close()
+    assert _count(db) == 1
+
+
+def test_insert_nodes_and_edges_keep_existing_rows(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    with get_connection(db) as conn:
+        old_id = insert_node(conn, "script", "script:a.sh", "a.sh", commit=False)
+        ids = insert_nodes(conn, [
+            ("proc", "proc:x", "X", "procs/x.procs", None, 1.0),
+            ("script", "script:a.sh", "renamed", None, None, 0.5),
+            ("proc", "proc:x", "dup", None, None, 1.0),
+        ], commit=False)
+        edge = (ids["proc:x"], ids["script:a.sh"], "RUNS", 1.0, "procs/x.procs", 3, "__Shell Script: é")
+        insert_edges(conn, [edge, edge], commit=False)
+        insert_edges(conn, [edge[:4] + ("other", 4, None)], commit=False)
+
+        assert ids["script:a.sh"] == old_id
+        names = dict(conn.execute("SELECT key, display_name FROM nodes").fetchall())
+        assert names == {"script:a.sh": "a.sh", "proc:x": "X"}
+        evidence = conn.execute("SELECT evidence_json FROM edges").fetchall()
+        assert [json.loads(r[0]) for r in evidence] == [
+            {"file": "procs/x.procs", "line_no": 3, "line_text": "__Shell Script: é"},
+        ]
+
+
+def test_insert_node_and_edge_return_existing_ids(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    with get_connection(db) as conn:
+        proc = insert_node(conn, "proc", "proc:x", "X")
+        script = insert_node(conn, "script", "script:a.sh", "a.sh")
+        assert insert_node(conn, "proc", "proc:x", "other") == proc
+        edge = insert_edge(conn, proc, script, "RUNS")
+        assert insert_edge(conn, proc, script, "RUNS", confidence=0.1) == edge
+        assert insert_edge(conn, script, proc, "RUNS") != edge
+        assert conn.execute("SELECT display_name FROM nodes WHERE id = ?", (proc,)).fetchone()[0] == "X"
+
+
+def test_reinserted_artifact_keeps_id_and_reindexes_changed_text(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    with get_connection(db) as conn:
+        first = insert_artifact(conn, kind="script", path="a.sh", mtime=0.0, size=1,
+                                text_content="echo alpha", commit=False)
+        with deferred_fts(conn):
+            insert_artifacts(conn, [("script", "a.sh", None, None, 1.0, 1, "echo beta")], commit=False)
+            insert_procs(conn, [
+                ("wccuds1", "procs/a/wccuds1.procs", '{"v": "one"}', None),
+                ("wccuds1", "procs/b/wccuds1.procs", '{"v": "two"}', None),
+            ], commit=False)
+
+        assert conn.execute("SELECT id FROM artifacts WHERE path = 'a.sh'").fetchone()[0] == first
+        assert conn.execute("SELECT COUNT(*) FROM artifacts_fts WHERE artifacts_fts MATCH 'alpha'").fetchone()[0] == 0
+        assert conn.execute("SELECT rowid FROM artifacts_fts WHERE artifacts_fts MATCH 'beta'").fetchone()[0] == first
+        assert [r[0] for r in conn.execute("SELECT path FROM procs")] == ["procs/b/wccuds1.procs"]
+        conn.execute("INSERT INTO artifacts_fts(artifacts_fts) VALUES ('integrity-check')")
+        conn.execute("INSERT INTO procs_fts(procs_fts, rank) VALUES ('integrity-check', 1)")
+
+
+def test_init_db_moves_rowid_message_codes_to_without_rowid(tmp_path):
+    db = tmp_path / "t.sqlite"
+    conn = sqlite3.connect(db)
+    conn.executescript("""
+        CREATE TABLE message_codes (
+            code TEXT NOT NULL, severity TEXT NOT NULL, title TEXT, body TEXT NOT NULL,
+            source_path TEXT NOT NULL, created_at TEXT NOT NULL,
+            PRIMARY KEY (code, source_path)
+        );
+        CREATE INDEX idx_message_codes_code ON message_codes(code);
+        CREATE INDEX idx_message_codes_severity ON message_codes(severity);
+        INSERT INTO message_codes VALUES ('PPCS1001I', 'I', 't', 'b', 'a.pdf', '2026-01-01');
+    """)
+    conn.close()
+
+    init_db(db)
+    init_db(db)
+    with get_connection(db) as conn:
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'message_codes'").fetchone()[0]
+        assert "WITHOUT ROWID" in sql
+        assert [tuple(r) for r in conn.execute("SELECT code, source_path FROM message_codes")] == [
+            ("PPCS1001I", "a.pdf"),
+        ]
+        indexes = {r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'message_codes'"
+        )}
+        assert "idx_message_codes_severity" in indexes
+        assert "idx_message_codes_code" not in indexes
+
+
+def test_build_graph_from_procs_analyzes_graph_tables(tmp_path):
+    from lsa.graph import build_graph_from_procs
+    from lsa.parsers.procs_parser import ProcsData
+
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    procs = [
+        (f"wccuds{i}", ProcsData(cid="wccu", shell_script=f"/home/master/wccuds{i}.sh"))
+        for i in range(3)
+    ]
+    with get_connection(db) as conn:
+        build_graph_from_procs(conn, procs, tmp_path)
+        analyzed = {r[0] for r in conn.execute("SELECT tbl FROM sqlite_stat1")}
+        assert {"nodes", "edges"} <= analyzed
+
+
+def test_build_graph_from_procs_streams_in_batches(tmp_path, monkeypatch):
+    import lsa.graph.builder
+    from lsa.graph import build_graph_from_procs
+    from lsa.parsers.procs_parser import ProcsData
+
+    def procs():
+        for name, script in [("wccuds1", "a.sh"), ("wccuds2", "a.sh"), ("wccuds1", "b.sh")]:
+            yield name, ProcsData(cid="wccu", shell_script=f"/home/master/{script}")
+
+    graphs = []
+    for batch_size in (1000, 1):
+        monkeypatch.setattr(lsa.graph.builder, "GRAPH_BATCH_SIZE", batch_size)
+        db = tmp_path / f"t{batch_size}.sqlite"
+        init_db(db)
+        with get_connection(db) as conn:
+            build_graph_from_procs(conn, procs(), tmp_path)
+            graphs.append((
+                conn.execute("SELECT id, key FROM nodes ORDER BY id").fetchall(),
+                conn.execute("SELECT src, dst, evidence_json FROM edges ORDER BY id").fetchall(),
+            ))
+
+    assert [[tuple(r) for r in rows] for rows in graphs[0]] == [[tuple(r) for r in rows] for rows in graphs[1]]
+    assert len(graphs[0][1]) == 3
+
+
+def test_init_db_moves_inline_artifact_text_to_artifact_contents(tmp_path):
+    db = tmp_path / "t.sqlite"
+    conn = sqlite3.connect(db)
+    conn.executescript("""
+        CREATE TABLE artifacts (
+            id INTEGER PRIMARY KEY, kind TEXT NOT NULL, path TEXT NOT NULL UNIQUE,
+            original_path TEXT, sha256 TEXT, mtime REAL NOT NULL, size INTEGER NOT NULL,
+            text_content TEXT
+        );
+        CREATE VIRTUAL TABLE artifacts_fts USING fts5(
+            path, text_content, content=artifacts, content_rowid=id
+        );
+        CREATE TRIGGER artifacts_ai AFTER INSERT ON artifacts
+        WHEN NEW.text_content IS NOT NULL
+        BEGIN
+            INSERT INTO artifacts_fts(rowid, path, text_content)
+            VALUES (NEW.id, NEW.path, NEW.text_content);
+        END;
+        INSERT INTO artifacts (kind, path, mtime, size, text_content)
+        VALUES ('script', 'a.sh', 0, 1, 'echo alpha'), ('script', 'bin', 0, 1, NULL);
+    """)
+    conn.close()
+
+    init_db(db)
+    init_db(db)
+    with get_connection(db) as conn:
+        columns = [r[1] for r in conn.execute("PRAGMA table_info(artifacts)")]
+        assert "text_content" not in columns
+        assert [tuple(r) for r in conn.execute("SELECT artifact_id, text_content FROM artifact_contents")] == [
+            (1, "echo alpha"),
+        ]
+        assert conn.execute("SELECT rowid FROM artifacts_fts WHERE artifacts_fts MATCH 'alpha'").fetchall()[0][0] == 1
+        conn.execute("INSERT INTO artifacts_fts(artifacts_fts, rank) VALUES ('integrity-check', 1)")
+
+        insert_artifact(conn, kind="script", path="a.sh", mtime=1.0, size=1, text_content=None)
+        assert conn.execute("SELECT COUNT(*) FROM artifact_contents").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM artifacts_fts WHERE artifacts_fts MATCH 'alpha'").fetchone()[0] == 0
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_evidence_json_fallback_matches_json_object(monkeypatch, use_orjson):
+    import lsa.db.connection
+
+    if not use_orjson:
+        monkeypatch.setattr(lsa.db.connection, "orjson", None)
+    elif lsa.db.connection.orjson is None:
+        pytest.skip("orjson not installed")
+    conn = sqlite3.connect(":memory:")
+    for evidence in [("procs/a.procs", 3, 'sh "Привет" \\ x'), ("procs/b.procs", None, "")]:
+        expected = conn.execute("SELECT json_object('file', ?, 'line_no', ?, 'line_text', ?)", evidence).fetchone()[0]
+        assert lsa.db.connection._evidence_json(*evidence) == expected
+
+
+def test_graph_stats_counts_come_from_covering_indexes(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    with get_connection(db) as conn:
+        for sql, index in [
+            ("SELECT rel_type, COUNT(*) FROM edges GROUP BY rel_type", "idx_edges_rel"),
+            ("SELECT type, COUNT(*) FROM nodes GROUP BY type", "idx_nodes_type_key"),
+        ]:
+            plan = " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+            assert f"COVERING INDEX {index}" in plan
+        names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert not names & {"idx_artifacts_path", "idx_nodes_key", "idx_incidents_log_path", "idx_nodes_type"}
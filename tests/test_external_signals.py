@@ -4,6 +4,7 @@ import pytest
 
 from lsa.analysis.external_signals import (
     extract_external_signals,
+    extract_external_signals_stream,
     extract_services_from_text,
     get_infotrac_missing_ids,
     ExternalSignal,
@@ -130,6 +131,169 @@ No data found from message_id: 123 in infotrac db
         assert severities[0] == "F"
 
 
+class TestExternalSignalsStream:
+    """Test block-wise extraction from a text stream."""
+
+    LOG = (
+        "INFO start\n"
+        "ERROR No data found from message_id: 197131 in infotrac db\n"
+        "DEBUG {\"success\": false, \"message\": \"Resource not available\"}\n"
+        "\n"
+        "ERROR No data found from message_id: 197131 in infotrac db\n"
+        "WARN Connection refused"
+    )
+
+    @staticmethod
+    def _summary(signals):
+        return [
+            (s.id, s.captures, [(e.line_no, e.line_text) for e in s.evidence])
+            for s in signals
+        ]
+
+    @pytest.mark.parametrize("block_size", [1, 7, 64, 1 << 20])
+    def test_stream_matches_string_api(self, block_size):
+        """Block boundaries must not change signals or line numbers."""
+        import io
+
+        expected = self._summary(extract_external_signals(self.LOG))
+        streamed = self._summary(extract_external_signals_stream(
+            io.StringIO(self.LOG), block_size=block_size,
+        ))
+        assert streamed == expected
+
+    def test_stream_line_numbers(self):
+        """Evidence line numbers count from the start of the stream."""
+        import io
+
+        signals = extract_external_signals_stream(io.StringIO(self.LOG), block_size=16)
+        infotrac = [s for s in signals if s.id == "INFOTRAC_MISSING_MESSAGE_ID"]
+        assert [e.line_no for e in infotrac[0].evidence] == [2, 5]
+
+
+class TestExternalSignalsBytes:
+    """Test scanning raw UTF-8 bytes without decoding the whole log."""
+
+    LOG = (
+        "INFO d\u00e9marrage\n"
+        "ERROR No data found from message_id: 197131 in infotrac db\n"
+        "DEBUG {\"success\": false, \"message\": \"Ressource indisponible \u00e9t\u00e9\"}\n"
+        "GET /services/estmt/ failed: Connection refused\n"
+    )
+
+    def test_bytes_match_str(self):
+        """Bytes input yields the same signals as the decoded text."""
+        def summary(signals):
+            return [
+                (s.id, s.captures, [(e.line_no, e.line_text) for e in s.evidence])
+                for s in signals
+            ]
+
+        expected = summary(extract_external_signals(self.LOG))
+        assert summary(extract_external_signals(self.LOG.encode("utf-8"))) == expected
+
+    def test_bytes_captures_are_decoded(self):
+        """Captures and evidence come back as str."""
+        signals = extract_external_signals(self.LOG.encode("utf-8"))
+        msg = [s for s in signals if s.id == "API_ERROR_MESSAGE_JSON"][0]
+        assert msg.captures["api_message"] == "Ressource indisponible \u00e9t\u00e9"
+        assert isinstance(msg.evidence[0].line_text, str)
+
+    def test_bytes_services(self):
+        """Service extraction accepts bytes."""
+        assert extract_services_from_text(self.LOG.encode("utf-8")) == ["estmt"]
+
+
+class TestExternalSignalsParallel:
+    """Test process-parallel scanning of large texts."""
+
+    @pytest.fixture(autouse=True)
+    def small_parallel_threshold(self, monkeypatch):
+        """Let test-sized texts take the parallel path; stop the pool after."""
+        from lsa.analysis import external_signals
+
+        monkeypatch.setattr(external_signals, "PARALLEL_MIN_SIZE", 1024)
+        yield
+        external_signals._discard_scan_pool()
+
+    def test_parallel_matches_serial(self):
+        """Chunked worker scan must produce the same signals as a serial scan."""
+        lines = []
+        for i in range(20000):
+            if i % 997 == 0:
+                lines.append(f"ERROR No data found from message_id: {i % 3} in infotrac db")
+            elif i % 1499 == 0:
+                lines.append("WARN Connection refused")
+            else:
+                lines.append(f"INFO processing record {i} ok")
+        text = "\n".join(lines)
+
+        def summary(signals):
+            return [
+                (s.id, s.captures, [(e.line_no, e.line_text) for e in s.evidence])
+                for s in signals
+            ]
+
+        serial = extract_external_signals(text)
+        parallel = extract_external_signals(text, max_workers=3)
+        assert summary(parallel) == summary(serial)
+
+    def test_pool_reused_and_workers_use_parent_rules(self, tmp_path, monkeypatch):
+        """One pool serves repeated scans; workers scan with the caller's rules."""
+        from lsa.analysis import external_signals
+
+        rules_path = tmp_path / "rules.yaml"
+        rules_path.write_text(
+            "rules:\n  - id: CUSTOM_ONLY\n    patterns: ['custom failure']\n",
+            encoding="utf-8",
+        )
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        monkeypatch.setattr(external_signals, "_get_rules_path", lambda: rules_path)
+        reload_rules()
+        try:
+            text = "INFO fine\n" * 500 + "ERROR custom failure\n" + "INFO fine\n" * 500
+            first = extract_external_signals(text, max_workers=2)
+            pool = external_signals._scan_pool
+            second = extract_external_signals(text, max_workers=2)
+
+            assert pool is not None and external_signals._scan_pool is pool
+            assert [s.id for s in first] == [s.id for s in second] == ["CUSTOM_ONLY"]
+            assert first[0].evidence[0].line_no == 501
+        finally:
+            monkeypatch.undo()
+            reload_rules()
+
+    def test_serial_by_default(self):
+        """Without max_workers no worker pool is started."""
+        from lsa.analysis import external_signals
+
+        extract_external_signals("ERROR Connection refused\n" * 1000)
+        assert external_signals._scan_pool is None
+
+    def test_broken_pool_falls_back_to_serial(self, monkeypatch):
+        """A pool that cannot start leaves the scan to run in-process."""
+        from concurrent.futures.process import BrokenProcessPool
+        from lsa.analysis import external_signals
+
+        def broken(*args, **kwargs):
+            raise BrokenProcessPool("no workers")
+
+        monkeypatch.setattr(external_signals, "_scan_parallel", broken)
+        text = "ERROR Connection refused\n" + "x" * 2048
+        signals = extract_external_signals(text, max_workers=2)
+        assert signals == extract_external_signals(text)
+
+    def test_scan_errors_are_not_swallowed(self, monkeypatch):
+        """Errors other than pool failures propagate to the caller."""
+        from lsa.analysis import external_signals
+
+        def failing(*args, **kwargs):
+            raise ValueError("bad chunk")
+
+        monkeypatch.setattr(external_signals, "_scan_parallel", failing)
+        with pytest.raises(ValueError):
+            extract_external_signals("x" * 2048, max_workers=2)
+
+
 class TestServiceExtraction:
     """Test service extraction from log text."""
 
@@ -167,6 +331,13 @@ GET /service/estmt/status HTTP/1.1
         assert "estmt" in services
         assert "paper" in services
 
+    def test_patterns_scan_independently(self):
+        """A span matched by one pattern is still seen by the others."""
+        log_text = "url?services=estmt|service=paper"
+
+        assert extract_services_from_text(log_text) == ["estmt", "paper", "service"]
+        assert extract_services_from_text(log_text.encode("utf-8")) == ["estmt", "paper", "service"]
+
     def test_returns_empty_for_no_services(self):
         """Should return empty list when no services found."""
         log_text = "Just some random log text without service mentions"
@@ -315,6 +486,27 @@ class TestHypothesesRankingWithExternalSignals:
         assert "197131" in first_hyp.hypothesis
         assert first_hyp.is_external_signal
 
+    def test_external_signal_template_keeps_missing_fields(self):
+        """Missing captures stay as {name} placeholders; present ones are filled."""
+        infotrac_signal = ExternalSignal(
+            id="INFOTRAC_MISSING_MESSAGE_ID",
+            severity="F",
+            category="CONFIG",
+            captures={},
+            evidence=[],
+        )
+
+        log_analysis = self.make_log_analysis(
+            external_signals=[infotrac_signal],
+            services_seen=["paper"],
+        )
+
+        hypotheses = generate_hypotheses([], max_hypotheses=5, log_analysis=log_analysis)
+
+        first_hyp = hypotheses[0]
+        assert "{message_id}" in first_hyp.hypothesis
+        assert "service=paper" in first_hyp.hypothesis
+
 
 class TestContextPackExternalSignals:
     """Test that context pack includes external signals section."""
@@ -424,3 +616,90 @@ class TestRulesLoading:
             # Each pattern should be a compiled regex
             for pattern in rule.patterns:
                 assert hasattr(pattern, 'search')
+
+    def test_rules_cache_reused_and_invalidated(self, tmp_path, monkeypatch):
+        """Parsed rules are cached on disk and refreshed when the YAML changes."""
+        from lsa.analysis import external_signals
+
+        rules_path = tmp_path / "rules.yaml"
+        rules_path.write_text(
+            "rules:\n  - id: FIRST\n    patterns: ['first']\n", encoding="utf-8"
+        )
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+        data = external_signals._read_rules_data(rules_path)
+        assert data["rules"][0]["id"] == "FIRST"
+        assert (tmp_path / "cache" / "lsa" / "rules.pkl").exists()
+
+        # Cache hit does not need to re-parse
+        assert external_signals._read_rules_data(rules_path) == data
+
+        rules_path.write_text(
+            "rules:\n  - id: SECOND_RULE\n    patterns: ['second']\n", encoding="utf-8"
+        )
+        data = external_signals._read_rules_data(rules_path)
+        assert data["rules"][0]["id"] == "SECOND_RULE"
+
+    def test_line_anchored_rules_match_stripped_lines(self, tmp_path, monkeypatch):
+        """Anchors and lookarounds apply to each stripped line, as before."""
+        from lsa.analysis import external_signals
+
+        rules_path = tmp_path / "rules.yaml"
+        rules_path.write_text(
+            "rules:\n"
+            "  - id: ANCHORED\n"
+            "    patterns: ['^ERROR (?P<code>\\d+)']\n"
+            "  - id: TRAILING\n"
+            "    patterns: ['failed$']\n"
+            "  - id: LOOKBEHIND\n"
+            "    patterns: ['(?<![\\w ])boom']\n",
+            encoding="utf-8",
+        )
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        monkeypatch.setattr(external_signals, "_get_rules_path", lambda: rules_path)
+        reload_rules()
+        try:
+            log = "  ERROR 42 at start\nsync failed  \nok\n   boom\nERROR 7\n"
+            for text in (log, log.encode("utf-8")):
+                found = {
+                    (s.id, tuple(sorted(s.captures.items())))
+                    for s in extract_external_signals(text, max_workers=1)
+                }
+                assert found == {
+                    ("ANCHORED", (("code", "42"),)),
+                    ("ANCHORED", (("code", "7"),)),
+                    ("TRAILING", ()),
+                    ("LOOKBEHIND", ()),
+                }
+        finally:
+            monkeypatch.undo()
+            reload_rules()
+
+    def test_line_edge_detection(self):
+        """Only anchors and lookarounds outside character classes count."""
+        from lsa.analysis.external_signals import _depends_on_line_edges
+
+        assert _depends_on_line_edges(r"^ERROR")
+        assert _depends_on_line_edges(r"failed$")
+        assert _depends_on_line_edges(r"(?<!x)boom")
+        assert _depends_on_line_edges(r"foo(?=bar)")
+        assert _depends_on_line_edges(r"\Aabc")
+        assert not _depends_on_line_edges(r'"error"\s*:\s*"(?P<m>[^"]{5,300})"')
+        assert not _depends_on_line_edges(r"cost \$5")
+        assert not _depends_on_line_edges(r"[]$^]x")
+
+    def test_required_literal_heuristic(self):
+        """Literal anchors must be contained in every possible match."""
+        from lsa.analysis.external_signals import _required_literal
+
+        assert _required_literal(r"Connection refused") == "connection refused"
+        assert _required_literal(r"connection timed? ?out") == "connection time"
+        assert _required_literal(r"SQLSTATE\[(?P<s>[A-Z0-9]+)\]") == "sqlstate["
+        assert _required_literal(r"x{0,3}yz") == "yz"
+        assert _required_literal(r"foo|bar") is None
+        assert _required_literal(r"\d+") is None
+
+    def test_rule_anchors_align_with_patterns(self):
+        """Each compiled pattern has a matching anchor slot."""
+        for rule in get_rules():
+            assert len(rule.anchors) == len(rule.patterns)
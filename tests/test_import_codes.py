@@ -166,6 +166,40 @@ class TestImportCodesIntegration:
         assert "Import complete" in result.output
         assert "Codes extracted from PDF: 1" in result.output
 
+    def test_import_codes_keeps_good_rows_of_failed_batch(self, mock_snapshot, tmp_path):
+        """A row rejected by the database should not drop the rest of its batch."""
+        from typer.testing import CliRunner
+        from lsa.cli import app
+        from lsa.db import init_db, get_connection, count_message_codes
+        from lsa.parsers.pdf_parser import MessageCodeEntry
+
+        db_path = mock_snapshot / ".lsa" / "lsa.sqlite"
+        init_db(db_path)
+
+        pdf_file = tmp_path / "codes.pdf"
+        pdf_file.touch()
+
+        entries = [
+            MessageCodeEntry(code=f"PPCS{1000 + i}I", severity="I", title="t", body="b")
+            for i in range(300)
+        ]
+        entries[5].severity = None  # violates NOT NULL
+
+        runner = CliRunner()
+        with patch('lsa.parsers.pdf_parser.parse_pdf_file_safe') as mock_parse:
+            mock_parse.return_value = (entries, [])
+            result = runner.invoke(app, [
+                "import-codes",
+                str(mock_snapshot),
+                "--pdf", str(pdf_file),
+                "--verbose",
+            ])
+
+        assert result.exit_code == 0
+        assert "Error storing PPCS1005I" in result.output
+        with get_connection(db_path) as conn:
+            assert count_message_codes(conn) == 299
+
 
 class TestDatabaseOperations:
     """Test database operations for message codes."""
@@ -263,6 +297,25 @@ class TestDatabaseOperations:
         assert "NONEXISTENT" not in result
         assert len(result) == 2
 
+    def test_get_message_codes_batch_dedupes_and_chunks(self, db_connection):
+        """Repeated codes and lists above the parameter limit still resolve."""
+        from lsa.db import insert_message_code, get_message_codes_batch
+
+        insert_message_code(
+            db_connection,
+            code="PPDE2001E",
+            severity="E",
+            title="Title",
+            body="Body",
+            source_path="/test/source.pdf",
+            created_at="2026-01-01T00:00:00",
+        )
+
+        codes = [f"X{i:05d}" for i in range(2500)] + ["PPDE2001E"] * 3
+        result = get_message_codes_batch(db_connection, codes)
+
+        assert list(result) == ["PPDE2001E"]
+
     def test_count_message_codes(self, db_connection):
         """Test counting message codes."""
         from lsa.db import insert_message_code, count_message_codes
@@ -8,6 +8,7 @@ from pathlib import Path
 from lsa.db import init_db, get_connection
 from lsa.db.connection import (
     upsert_case_card,
+    upsert_case_cards,
     upsert_incident,
     get_incidents,
     get_incident_by_log_path,
@@ -148,6 +149,120 @@ class TestUpsertCaseCard:
             ).fetchone()
             assert row["title"] == "Title"
 
+    def test_batch_upsert_matches_single_upserts(self, tmp_path):
+        """upsert_case_cards should store and count like repeated upsert_case_card."""
+        db_path = tmp_path / "test.db"
+        init_db(db_path)
+
+        def row(chunk_id, title, content_hash):
+            return ("/test/history.txt", chunk_id, title, '["ORA-12345"]', None, None,
+                    None, None, None, "2026-01-01T00:00:00", content_hash)
+
+        with get_connection(db_path) as conn:
+            assert upsert_case_cards(conn, [row(0, "A", "h0"), row(1, "B", "h1")]) == 2
+            inserted = upsert_case_cards(conn, [
+                row(0, "A changed", "h0"),  # same hash: untouched
+                row(1, "B changed", "h9"),  # new hash: updated
+                row(2, "C", None),
+                row(2, "C again", None),    # duplicate in batch: updated
+            ])
+
+            assert inserted == 1
+            titles = [r["title"] for r in conn.execute(
+                "SELECT title FROM case_cards ORDER BY chunk_id"
+            )]
+            assert titles == ["A", "B changed", "C again"]
+
+
+class TestCaseSignalsIndex:
+    """Test the case_signals index used to prefilter similar cases."""
+
+    def _upsert(self, conn, signals):
+        return upsert_case_card(
+            conn,
+            source_path="/test/history.txt",
+            chunk_id=0,
+            title="Card",
+            signals_json=json.dumps(signals),
+            root_cause="rc",
+            fix_summary="fix",
+            verify_commands_json="[]",
+            related_files_json="[]",
+            tags_json="[]",
+            created_at=datetime.now().isoformat(),
+            content_hash=json.dumps(signals),
+        )
+
+    def test_index_follows_inserts_and_updates(self, tmp_path):
+        """Signals are indexed lowercased and replaced when the card changes."""
+        from lsa.analysis.similarity import find_similar_cases
+
+        db_path = tmp_path / "test.db"
+        init_db(db_path)
+
+        with get_connection(db_path) as conn:
+            card_id, _ = self._upsert(conn, ["ORA-12345", "PPCS1234E"])
+            indexed = {r[0] for r in conn.execute("SELECT signal FROM case_signals")}
+            assert indexed == {"ora-12345", "ppcs1234e"}
+            assert [c.case_id for c in find_similar_cases(conn, ["ora-12345"])] == [card_id]
+
+            self._upsert(conn, ["AFPR0001W"])
+            assert find_similar_cases(conn, ["ORA-12345"]) == []
+            assert [c.case_id for c in find_similar_cases(conn, ["afpr0001w"])] == [card_id]
+
+    def test_index_backfilled_for_existing_database(self, tmp_path):
+        """init_db fills case_signals for cards written before it existed."""
+        db_path = tmp_path / "test.db"
+        init_db(db_path)
+
+        with get_connection(db_path) as conn:
+            self._upsert(conn, ["ORA-12345"])
+            conn.executescript(
+                "DROP TRIGGER case_cards_signals_ai; DROP TRIGGER case_cards_signals_au;"
+                "DROP TRIGGER case_cards_signals_ad; DROP TABLE case_signals;"
+            )
+
+        init_db(db_path)
+
+        with get_connection(db_path) as conn:
+            indexed = [r[0] for r in conn.execute("SELECT signal FROM case_signals")]
+            assert indexed == ["ora-12345"]
+
+
+class TestFindSimilarCases:
+    """Test similar-case scoring."""
+
+    def test_score_is_jaccard_and_prepared_inputs_match(self, tmp_path):
+        """Score is |A∩B| / |A∪B|; the prepared entry point gives the same result."""
+        from lsa.analysis.similarity import find_similar_cases, find_similar_cases_prepared
+
+        db_path = tmp_path / "test.db"
+        init_db(db_path)
+
+        with get_connection(db_path) as conn:
+            upsert_case_card(
+                conn,
+                source_path="/test/history.txt",
+                chunk_id=0,
+                title="Card",
+                signals_json='["ORA-1", "PPCS1E", "AFPR2W"]',
+                root_cause="rc",
+                fix_summary="fix",
+                verify_commands_json="[]",
+                related_files_json="[]",
+                tags_json="[]",
+                created_at=datetime.now().isoformat(),
+            )
+
+            cases = find_similar_cases(conn, ["ora-1", "X-9"], threshold=0.2)
+            assert len(cases) == 1
+            assert cases[0].match_score == pytest.approx(1 / 4)
+
+            prepared = find_similar_cases_prepared(
+                conn, frozenset({"ora-1", "x-9"}), frozenset(), threshold=0.2,
+            )
+            assert prepared == cases
+
 
 class TestUpsertIncident:
     """Test upsert logic for incidents."""
@@ -250,6 +365,20 @@ class TestUpsertIncident:
             assert incidents[0]["log_path"] == "/d/test/new.log"
             assert incidents[1]["log_path"] == "/d/test/old.log"
 
+    def test_get_incidents_walks_recent_index(self, tmp_path):
+        """The recency ordering should come from the index, not a sort."""
+        db_path = tmp_path / "test.db"
+        init_db(db_path)
+
+        with get_connection(db_path) as conn:
+            plan = " ".join(row[3] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM incidents "
+                "ORDER BY COALESCE(updated_at, created_at) DESC LIMIT 5"
+            ))
+
+        assert "idx_incidents_recent" in plan
+        assert "TEMP B-TREE" not in plan
+
 
 class TestImportHistoriesGlob:
     """Test import-histories with glob patterns."""
@@ -486,7 +615,7 @@ class TestHistoriesPathAutoDetection:
         snapshot = parent / "snapshot"
         snapshot.mkdir(parents=True)
 
-        paths = _get_histories_search_paths(snapshot)
+        paths = list(_get_histories_search_paths(snapshot))
 
         assert len(paths) == 4
         assert paths[0] == snapshot / "histories"
@@ -0,0 +1,124 @@
+"""Tests for log-to-node matching."""
+
+from pathlib import Path
+
+from lsa.db import init_db
+from lsa.db.connection import get_connection, insert_edge, insert_node
+from lsa.graph.matching import (
+    _SQL_NEIGHBORS,
+    _SQL_PREFIX_PARTIAL,
+    _SQL_PROCS_BY_KEY_RANGE,
+    _key_range,
+    get_node_neighbors,
+    match_log_to_node,
+)
+from lsa.parsers.log_parser import LogAnalysis
+
+
+def _graph(conn):
+    ids = {
+        name: insert_node(conn, "proc", f"proc:{name}", name.upper(), commit=False)
+        for name in ("wccuds1", "wccuds12", "bkfnms1")
+    }
+    script = insert_node(conn, "script", "script:run.sh", "run.sh",
+                         original_path="/home/master/run.sh", commit=False)
+    insert_edge(conn, ids["bkfnms1"], script, "RUNS", commit=False)
+    return ids
+
+
+def test_match_log_to_node_looks_up_each_strategy_once(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    analysis = LogAnalysis(
+        path="x.log",
+        total_lines=0,
+        prefix_tokens=["wccu", "wccuds1", "zz"],
+        script_paths=["/home/master/run.sh", "/home/master/none.sh"],
+        jid_tokens=["ms1", "s1"],
+    )
+    with get_connection(db) as conn:
+        _graph(conn)
+        statements = []
+        conn.set_trace_callback(statements.append)
+        node, _, candidates = match_log_to_node(conn, analysis, Path("/logs/x.log"), debug=True)
+        conn.set_trace_callback(None)
+
+    # prefix exact + prefix partial + scripts + jids, then the log-path
+    # strategy's own exact and partial lookups for "x"
+    assert len(statements) == 6
+    assert node["key"] == "proc:wccuds1"
+    assert all(type(c.node) is dict and "token_i" not in c.node for c in candidates)
+    assert {c.node["key"]: c.strategies for c in candidates} == {
+        "proc:wccuds1": [("prefix_partial:wccu", 1.5), ("prefix_exact:wccuds1", 2.0), ("jid:s1", 0.5)],
+        "proc:wccuds12": [("prefix_partial:wccu", 1.5), ("jid:s1", 0.5)],
+        "proc:bkfnms1": [("script:run.sh", 1.2), ("jid:ms1", 0.5), ("jid:s1", 0.5)],
+    }
+
+
+def test_match_log_to_node_seeks_key_prefixes(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    analysis = LogAnalysis(path="x.log", total_lines=0, prefix_tokens=["wccu"])
+    with get_connection(db) as conn:
+        _graph(conn)
+        _, _, candidates = match_log_to_node(conn, analysis, Path("/logs/x.log"), debug=True)
+        forced, _, _ = match_log_to_node(conn, analysis, Path("/logs/x.log"), forced_proc="WCCUDS")
+        for sql, params in [
+            (_SQL_PROCS_BY_KEY_RANGE, _key_range("proc:wccu")),
+            (_SQL_PREFIX_PARTIAL.format(tokens="(?, ?, ?)"), (0, *_key_range("proc:wccu"))),
+        ]:
+            plan = " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+            assert "INDEX idx_nodes_type_key (type=? AND key>? AND key<?)" in plan
+
+    assert _key_range("proc:wccu") == ("proc:wccu", "proc:wccv")
+    assert [c.node["key"] for c in candidates] == ["proc:wccuds1", "proc:wccuds12"]
+    assert forced["key"] == "proc:wccuds1"
+
+
+def test_get_node_neighbors_reads_both_directions_in_one_statement(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    with get_connection(db) as conn:
+        ids = _graph(conn)
+        insert_edge(conn, ids["wccuds1"], ids["bkfnms1"], "RUNS", commit=False)
+        insert_edge(conn, ids["wccuds12"], ids["wccuds1"], "READS", commit=False)
+        statements = []
+        conn.set_trace_callback(statements.append)
+        neighbors = get_node_neighbors(conn, ids["bkfnms1"])
+        conn.set_trace_callback(None)
+        plan = " ".join(row[3] for row in conn.execute(
+            f"EXPLAIN QUERY PLAN {_SQL_NEIGHBORS}", (ids["bkfnms1"], ids["bkfnms1"])
+        ))
+
+    assert len(statements) == 1
+    assert "idx_edges_dst" in plan and "SCAN e" not in plan
+    assert [(n["node"]["key"], n["rel_type"]) for n in neighbors["upstream"]] == [("proc:wccuds1", "RUNS")]
+    assert [(n["node"]["key"], n["rel_type"]) for n in neighbors["downstream"]] == [("script:run.sh", "RUNS")]
+    assert "direction" not in neighbors["upstream"][0]["node"]
+
+
+def test_get_node_neighbors_walks_multiple_hops(tmp_path):
+    db = tmp_path / "t.sqlite"
+    init_db(db)
+    with get_connection(db) as conn:
+        ids = _graph(conn)
+        # wccuds1 -> wccuds12 -> bkfnms1 -> run.sh, and back to wccuds1
+        insert_edge(conn, ids["wccuds1"], ids["wccuds12"], "RUNS", commit=False)
+        insert_edge(conn, ids["wccuds12"], ids["bkfnms1"], "RUNS", commit=False)
+        insert_edge(conn, ids["bkfnms1"], ids["wccuds1"], "READS", commit=False)
+        one = get_node_neighbors(conn, ids["wccuds1"])
+        two = get_node_neighbors(conn, ids["wccuds1"], hops=2)
+        many = get_node_neighbors(conn, ids["wccuds1"], hops=10)
+
+    def keys(side):
+        return [(n["node"]["key"], n["depth"]) for n in side]
+
+    assert keys(one["upstream"]) == [("proc:bkfnms1", 1)]
+    assert keys(one["downstream"]) == [("proc:wccuds12", 1)]
+    assert keys(two["upstream"]) == [("proc:bkfnms1", 1), ("proc:wccuds12", 2)]
+    assert keys(two["downstream"]) == [
+        ("proc:wccuds12", 1), ("proc:bkfnms1", 2),
+    ]
+    # The cycle is walked round until the hop limit, not forever; run.sh
+    # hangs off it every third hop
+    assert [depth for _, depth in keys(many["downstream"])] == [1, 2, 3, 3, 4, 5, 6, 6, 7, 8, 9, 9, 10]
@@ -82,6 +82,29 @@ class TestPlanExactMatch:
                 assert candidates[0].score > candidates[1].score
 
 
+    def test_plan_runs_on_read_only_pool_reader(self, tmp_path):
+        """generate_plan must not write pragmas on a read-only connection."""
+        import sqlite3
+        from lsa.db import ConnectionPool
+
+        db_path = _setup_db(tmp_path)
+        with get_connection(db_path) as conn:
+            insert_node(conn, "proc", "proc:wccuds1", "WCCU - Papyrus",
+                        canonical_path="procs/wccuds1.procs")
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.close()
+
+        pool = ConnectionPool(db_path)
+        try:
+            with pool.reader() as conn:
+                _, candidates = generate_plan(conn, snapshot_path=tmp_path, cid="WCCU", job_id="ds1")
+        finally:
+            pool.close()
+
+        assert candidates[0].proc_key == "proc:wccuds1"
+
+
 class TestPlanControlByLetterNumber:
     """Test that control files matched by letter number appear in the bundle."""
 
@@ -211,6 +234,54 @@ class TestDfaFromControl:
             # Should appear exactly once despite 3 matching lines
             assert dfa_paths.count("docdef/WCCUDL014.dfa") == 1
 
+    def test_dfa_matches_code_inside_path_case_insensitively(self, tmp_path):
+        """Indexed lookup keeps LIKE '%CODE%' semantics on the uppercased path."""
+        db_path = _setup_db(tmp_path)
+
+        with get_connection(db_path) as conn:
+            insert_node(conn, "proc", "proc:wccudla", "WCCU - Papyrus",
+                        canonical_path="procs/wccudla.procs")
+            insert_artifact(conn, kind="control",
+                            path="control/wccudl014.control",
+                            mtime=0.0, size=200,
+                            text_content='format_dfa="wccudl014"\n')
+            for path in ("docdef/old_wccudl014a.dfa", "docdef/XWCCUDL014.DFAx",
+                         "docdef/WCCUDL015.dfa"):
+                insert_artifact(conn, kind="docdef", path=path, mtime=0.0, size=500)
+
+            intent, candidates = generate_plan(
+                conn, snapshot_path=tmp_path, cid="WCCU",
+                title="WCCU Letter 14 update",
+            )
+
+            dfa_paths = [f.path for f in candidates[0].files if f.kind == "docdef"]
+            assert dfa_paths == ["docdef/old_wccudl014a.dfa", "docdef/XWCCUDL014.DFAx"]
+
+    def test_docdef_codes_follow_replaced_artifacts(self, tmp_path):
+        """Re-inserting a path drops its old keys; init_db backfills old DBs."""
+        db_path = _setup_db(tmp_path)
+
+        with get_connection(db_path) as conn:
+            insert_artifact(conn, kind="docdef", path="docdef/WCCUDL014.dfa",
+                            mtime=0.0, size=500)
+            insert_artifact(conn, kind="docdef", path="docdef/WCCUDL014.dfa",
+                            mtime=1.0, size=500)
+            keys = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT artifact_id) FROM docdef_codes "
+                "WHERE code = 'WCCUDL014'"
+            ).fetchone()
+            assert tuple(keys) == (1, 1)
+            conn.execute("DROP TABLE docdef_codes")
+
+        init_db(db_path)
+
+        with get_connection(db_path) as conn:
+            row = conn.execute(
+                "SELECT a.path FROM docdef_codes dc JOIN artifacts a ON a.id = dc.artifact_id "
+                "WHERE dc.code = 'UDL014'"
+            ).fetchone()
+            assert row["path"] == "docdef/WCCUDL014.dfa"
+
 
 class TestDfaFromProcsTokens:
     """Test DFA resolution from .procs parsed_json DFA tokens."""
@@ -284,6 +355,56 @@ class TestTitlePhraseMatchRanking:
             assert candidates[0].score >= candidates[1].score + 25
 
 
+class TestKeywordFallback:
+    """Test the keyword fallback used when the title has no CID."""
+
+    def test_keyword_fallback_matches_substring_of_parsed_json(self, tmp_path):
+        """Keywords match inside longer words, case-insensitively."""
+        db_path = _setup_db(tmp_path)
+
+        with get_connection(db_path) as conn:
+            insert_node(conn, "proc", "proc:wccudla", "WCCU - Papyrus",
+                        canonical_path="procs/wccudla.procs")
+            insert_node(conn, "proc", "proc:wccuds1", "WCCU - DocExec",
+                        canonical_path="procs/wccuds1.procs")
+            insert_proc(conn, proc_name="wccudla", path="procs/wccudla.procs",
+                        parsed_json='{"text": "OVERDRAFTS notice"}')
+            insert_proc(conn, proc_name="wccuds1", path="procs/wccuds1.procs",
+                        parsed_json='{"text": "Daily statement processing"}')
+
+            intent, candidates = generate_plan(
+                conn,
+                snapshot_path=tmp_path,
+                title="overdraft letter",
+            )
+
+            assert [c.proc_key for c in candidates] == ["proc:wccudla"]
+
+    def test_keyword_fallback_without_fts_table(self, tmp_path):
+        """Databases without the procs index fall back to a full scan."""
+        db_path = _setup_db(tmp_path)
+
+        with get_connection(db_path) as conn:
+            conn.executescript(
+                "DROP TRIGGER procs_ai; DROP TRIGGER procs_ad; DROP TRIGGER procs_au;"
+                "DROP TABLE procs_fts;"
+            )
+            insert_node(conn, "proc", "proc:wccudla", "WCCU - Papyrus",
+                        canonical_path="procs/wccudla.procs")
+            conn.execute(
+                "INSERT INTO procs (proc_name, path, parsed_json) VALUES (?, ?, ?)",
+                ("wccudla", "procs/wccudla.procs", '{"text": "overdraft"}'),
+            )
+
+            intent, candidates = generate_plan(
+                conn,
+                snapshot_path=tmp_path,
+                title="overdraft letter",
+            )
+
+            assert [c.proc_key for c in candidates] == ["proc:wccudla"]
+
+
 class TestControlNotAttachedToUnrelatedProcs:
     """Test that job-family filtering prevents noisy control attachment."""
 
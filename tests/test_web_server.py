@@ -32,18 +32,35 @@ def _conn():
         CREATE TABLE artifacts (
             id INTEGER PRIMARY KEY,
             path TEXT,
-            kind TEXT,
+            kind TEXT
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE artifact_contents (
+            id INTEGER PRIMARY KEY,
+            artifact_id INTEGER UNIQUE,
             text_content TEXT
         )
         """
     )
     conn.executemany(
-        "INSERT INTO artifacts(path, kind, text_content) VALUES (?, ?, ?)",
+        "INSERT INTO artifacts(path, kind) VALUES (?, ?)",
+        [
+            ("procs/wccuds1.procs", "procs"),
+            ("master/run_main.sh", "script"),
+            ("control/wccu.ctl", "control"),
+            ("refs/notes.md", "refs"),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO artifact_contents(artifact_id, text_content) VALUES (?, ?)",
         [
-            ("procs/wccuds1.procs", "procs", "CID 123 and main proc"),
-            ("master/run_main.sh", "script", "echo running incident path"),
-            ("control/wccu.ctl", "control", "docdef=wccu"),
-            ("refs/notes.md", "refs", "support note"),
+            (1, "CID 123 and main proc"),
+            (2, "echo running incident path"),
+            (3, "docdef=wccu"),
+            (4, "support note"),
         ],
     )
     conn.execute(